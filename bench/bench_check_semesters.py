@@ -0,0 +1,91 @@
+"""Load test /check-semesters: 50 request bersamaan ke server API dengan stub Siakang.
+
+Server API (uvicorn, salinan repo di direktori sementara) melakukan login dan scraping
+list semester ke stub Siakang lokal yang sengaja lambat (--delay detik per request).
+Selama load test, satu client terus memanggil GET /tasks untuk melihat apakah polling
+dashboard ikut tertahan.
+
+Skenario:
+- akun sama: 50 request untuk satu login_id (harus digabung menjadi satu scrape)
+- akun berbeda: 50 request untuk 50 login_id (dibatasi SCRAPE_CONCURRENCY)
+
+Penggunaan:
+    python bench/bench_check_semesters.py [--requests 50] [--delay 0.3]
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+import harness
+
+def poll_tasks(url, stop, latencies):
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f"{url}/tasks", timeout=60).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.1)
+
+def fire(url, payloads):
+    """Mengirim semua payload bersamaan. Mengembalikan (latency ms per request, status code)."""
+    results = [None] * len(payloads)
+    barrier = threading.Barrier(len(payloads))
+
+    def call(i):
+        barrier.wait()
+        started = time.perf_counter()
+        res = requests.post(f"{url}/check-semesters", json=payloads[i], timeout=300)
+        results[i] = ((time.perf_counter() - started) * 1000, res.status_code, len(res.json().get("semesters", [])))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(payloads))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    stub = harness.SiakangStub(delay=args.delay)
+    repo = harness.sandbox(enter=False)
+    api, url = harness.start_api(repo, stub.env())
+
+    scenarios = [
+        ("akun sama", [{"login_id": "bench0001", "password": "secret", "refresh": True}] * args.requests),
+        ("akun berbeda", [{"login_id": f"bench{i:04d}", "password": "secret", "refresh": True} for i in range(args.requests)]),
+    ]
+    try:
+        print(f"{args.requests} request bersamaan, stub Siakang {args.delay * 1000:.0f} ms per request\n")
+        for name, payloads in scenarios:
+            stub.reset_counters()
+            stop, task_latencies = threading.Event(), []
+            poller = threading.Thread(target=poll_tasks, args=(url, stop, task_latencies), daemon=True)
+            poller.start()
+
+            started = time.perf_counter()
+            results = fire(url, payloads)
+            elapsed = time.perf_counter() - started
+            stop.set()
+            poller.join()
+
+            latencies = [r[0] for r in results]
+            ok = sum(1 for r in results if r[1] == 200 and r[2] > 0)
+            print(f"{name}: {ok}/{len(results)} sukses dalam {elapsed:.1f}s")
+            print(f"  /check-semesters  p50 {harness.percentile(latencies, 50):7.0f} ms  "
+                  f"p95 {harness.percentile(latencies, 95):7.0f} ms  max {max(latencies):7.0f} ms")
+            print(f"  /tasks (polling)  p50 {harness.percentile(task_latencies, 50):7.1f} ms  "
+                  f"p95 {harness.percentile(task_latencies, 95):7.1f} ms  max {max(task_latencies):7.1f} ms")
+            print(f"  request ke stub Siakang: {stub.total_hits()} {dict(sorted(stub.hits.items()))}\n")
+    finally:
+        api.terminate()
+        api.wait()
+
+if __name__ == "__main__":
+    main()
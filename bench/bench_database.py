@@ -0,0 +1,145 @@
+"""Microbenchmark layer database task (server/database.py).
+
+Membandingkan pola lama dengan layer sekarang pada salinan repo di direktori sementara:
+- before: sqlite3.connect baru per pemanggilan, journal rollback (DELETE) dengan
+  synchronous bawaan, dan satu UPDATE per id di reorder
+- after: koneksi dari pool (WAL, pragma tuning), executemany dalam satu transaksi
+
+Skenario (dipanggil langsung sebagai fungsi, tanpa overhead HTTP):
+- GET /tasks: list_tasks() dengan --tasks task
+- PUT /tasks/reorder: 1000 id dalam urutan acak
+- start/stop bersamaan: --threads thread mengubah status task (jalur DB start_process/stop_process)
+
+Penggunaan:
+    python bench/bench_database.py [--tasks 1000] [--threads 16] [--iterations 200]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import threading
+import time
+
+import harness
+
+def timed(func, iterations):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(latencies), harness.percentile(latencies, 95)
+
+def concurrent(func, threads, per_thread):
+    """Menjalankan func(thread_index, i) dari banyak thread. Mengembalikan operasi per detik."""
+    barrier = threading.Barrier(threads)
+
+    def run(index):
+        barrier.wait()
+        for i in range(per_thread):
+            func(index, i)
+
+    workers = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * per_thread / (time.perf_counter() - started)
+
+def report(name, before, after, unit="ms"):
+    if unit == "ms":
+        print(f"{name:<34} before {before[0]:8.2f} ms (p95 {before[1]:8.2f})   "
+              f"after {after[0]:8.2f} ms (p95 {after[1]:8.2f})   {before[0] / after[0]:5.1f}x")
+    else:
+        print(f"{name:<34} before {before:8.0f} op/s               after {after:8.0f} op/s               "
+              f"{after / before:5.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    harness.sandbox()
+    from server import database
+    from server import main as api
+    from server.manager import set_task_status
+
+    database.init_db()
+    conn = database.get_db_connection()
+    conn.executemany(
+        "INSERT INTO tasks (name, login_id, password, interval, monitor_type, position) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"bench {i}", f"bench{i:04d}", "secret", 300, "nilai", i) for i in range(args.tasks)]
+    )
+    conn.commit()
+    conn.close()
+
+    # Salinan database dengan pengaturan lama (tanpa WAL, koneksi baru per pemanggilan)
+    # (backup API, bukan salinan file: isi terbaru masih di file WAL)
+    before_path = os.path.join(database.DATA_DIR, "tasks_before.db")
+    source, legacy = sqlite3.connect(database.DB_PATH), sqlite3.connect(before_path)
+    source.backup(legacy)
+    legacy.execute("PRAGMA journal_mode=DELETE")
+    source.close()
+    legacy.close()
+
+    def legacy_connection():
+        conn = sqlite3.connect(before_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def list_before():
+        conn = legacy_connection()
+        rows = conn.execute("SELECT * FROM tasks ORDER BY position ASC, id ASC").fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def reorder_before(ids):
+        conn = legacy_connection()
+        for index, task_id in enumerate(ids):
+            conn.execute("UPDATE tasks SET position = ? WHERE id = ?", (index, task_id))
+        conn.commit()
+        conn.close()
+
+    def status_before(task_id, status, pid):
+        conn = legacy_connection()
+        conn.execute("UPDATE tasks SET status = ?, pid = ? WHERE id = ?", (status, pid, task_id))
+        conn.commit()
+        conn.close()
+
+    ids = list(range(1, args.tasks + 1))
+    reorder_ids = ids[:1000]
+
+    print(f"{args.tasks} task, {args.iterations} iterasi, {args.threads} thread\n")
+    report(f"GET /tasks ({args.tasks} task)", timed(list_before, args.iterations), timed(api.list_tasks, args.iterations))
+
+    def shuffled():
+        random.shuffle(reorder_ids)
+        return reorder_ids
+
+    iterations = max(1, args.iterations // 10)
+    report(f"PUT /tasks/reorder ({len(reorder_ids)} id)",
+           timed(lambda: reorder_before(shuffled()), iterations),
+           timed(lambda: api.reorder_tasks(shuffled()), iterations))
+
+    def toggle(update):
+        def run(index, i):
+            task_id = ids[(index * 31 + i) % len(ids)]
+            if i % 2:
+                update(task_id, "stopped", None)
+            else:
+                update(task_id, "running", 10000 + task_id)
+        return run
+
+    per_thread = max(1, args.iterations // 4)
+    report(f"start/stop bersamaan ({args.threads} thread)",
+           concurrent(toggle(status_before), args.threads, per_thread),
+           concurrent(toggle(lambda task_id, status, pid: set_task_status(task_id, status, pid)), args.threads, per_thread),
+           unit="ops")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark memori dan CPU per task untuk setiap ENGINE_MODE (subprocess, asyncio, pool).
+
+Untuk setiap kombinasi mode dan jumlah task, sebuah proses "server" baru (salinan repo
+di direktori sementara, lihat harness.sandbox) membuat N task nilai lalu menjalankan
+semuanya lewat server.manager.start_process dengan START_DELAY bertahap (--stagger detik
+per task, seperti restore_running_tasks saat server restart).
+Worker login dan scraping ke stub Siakang lokal (harness.SiakangStub) yang berjalan
+di proses benchmark ini, sehingga CPU stub tidak ikut terhitung.
+
+Yang diukur (proses server + seluruh proses turunannya, dari /proc, khusus Linux):
+- startup: waktu dan CPU sampai semua task menyelesaikan siklus pertama
+- RSS total dan per task setelah semua task berjalan
+- CPU selama jendela steady state (--window detik, interval task 30 detik)
+
+Penggunaan:
+    python bench/bench_engine.py [--tasks 10,100,500] [--modes subprocess,asyncio,pool] [--window 60] [--stagger 0.1]
+
+Catatan: mode subprocess dengan 500 task butuh belasan GB RAM (satu interpreter per task).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import harness
+
+def run_server(mode, tasks, window, stagger):
+    """Dijalankan di proses anak: memulai N task di mode tertentu dan mengukur pemakaiannya."""
+    os.environ["ENGINE_MODE"] = mode
+    harness.sandbox()
+
+    from server.database import init_db, get_db_connection
+    from server import manager
+
+    init_db()
+    conn = get_db_connection()
+    conn.executemany(
+        "INSERT INTO tasks (name, login_id, password, target_semester_code, interval, monitor_type) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"bench {i}", f"bench{i:04d}", "secret", "20251", 30, "nilai") for i in range(tasks)]
+    )
+    conn.commit()
+    ids = [row["id"] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+    conn.close()
+
+    pid = os.getpid()
+    rss_before, cpu_before = harness.process_usage(pid)
+    started = time.monotonic()
+    for index, task_id in enumerate(ids):
+        ok, msg = manager.start_process(task_id, start_delay=index * stagger)
+        if not ok:
+            raise RuntimeError(f"Task {task_id} gagal start: {msg}")
+
+    value_dir = os.path.join("data", "value")
+    ready = harness.wait_for(
+        lambda: all(os.path.exists(os.path.join(value_dir, f"stats_{task_id}.json")) for task_id in ids),
+        timeout=120 + tasks * (stagger + 1), interval=0.5
+    )
+    startup_seconds = time.monotonic() - started
+    rss_running, cpu_started = harness.process_usage(pid)
+
+    time.sleep(window)
+    rss_steady, cpu_steady = harness.process_usage(pid)
+
+    for task_id in ids:
+        manager.stop_process(task_id)
+
+    return {
+        "ready": ready,
+        "rss_before": rss_before,
+        "rss": max(rss_running, rss_steady),
+        "startup_seconds": startup_seconds,
+        "startup_cpu": cpu_started - cpu_before,
+        "steady_cpu": cpu_steady - cpu_started,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tasks", default="10,100,500")
+    parser.add_argument("--modes", default="subprocess,asyncio,pool")
+    parser.add_argument("--window", type=float, default=60)
+    parser.add_argument("--stagger", type=float, default=0.1)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "TASKS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_server(args.child[0], int(args.child[1]), args.window, args.stagger)
+        sys.stdout.write("RESULT " + json.dumps(result) + "\n")
+        return
+
+    stub = harness.SiakangStub()
+    env = {**os.environ, **stub.env()}
+    print(f"{'mode':<11} {'task':>5} {'siap':>5} {'startup':>9} {'CPU start':>10} {'RSS total':>10} "
+          f"{'RSS/task':>9} {'CPU/task start':>15} {'CPU/task/menit':>15}")
+
+    for tasks in [int(n) for n in args.tasks.split(",")]:
+        for mode in args.modes.split(","):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, str(tasks), "--window", str(args.window),
+                 "--stagger", str(args.stagger)],
+                env=env, capture_output=True, text=True
+            )
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("RESULT ")]
+            if proc.returncode != 0 or not lines:
+                print(f"{mode:<11} {tasks:>5} gagal:\n{proc.stderr[-2000:]}")
+                continue
+
+            r = json.loads(lines[-1][len("RESULT "):])
+            rss_tasks = r["rss"] - r["rss_before"]
+            per_minute = r["steady_cpu"] / tasks * 60 / args.window
+            print(f"{mode:<11} {tasks:>5} {'ya' if r['ready'] else 'tidak':>5} {r['startup_seconds']:>8.1f}s "
+                  f"{r['startup_cpu']:>9.2f}s {r['rss']:>8.0f}MB {rss_tasks / tasks:>7.1f}MB "
+                  f"{r['startup_cpu'] / tasks * 1000:>13.0f}ms {per_minute * 1000:>13.1f}ms")
+
+    print(f"\nRequest ke stub Siakang: {stub.total_hits()} ({stub.tunnels} koneksi TLS)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Benchmark HTTP client: request tanpa pool (perilaku lama) vs http_client.
+
+Server HTTPS lokal (sertifikat self-signed dibuat dengan openssl) menyajikan halaman
+~130 KB yang bisa dikompres gzip. Semua koneksi lewat proxy TCP penghitung byte
+sehingga ukuran di kabel (termasuk handshake TLS) ikut terukur.
+
+Skenario:
+- before: requests.post tanpa session (notifier lama) dan Session baru per panggilan (API scraper lama)
+- after: http_client.shared_session() dan http_client.new_session() di atas pool bersama
+
+Penggunaan:
+    python bench/bench_http.py [jumlah_request]
+"""
+
+import gzip
+import os
+import shutil
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BODY = ("<tr><td>Matkul Contoh</td><td>A</td><td>4.00</td></tr>\n" * 2500).encode()
+GZ_BODY = gzip.compress(BODY)
+
+counters = {"wire_bytes": 0, "connections": 0}
+counters_lock = threading.Lock()
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _send(self):
+        compressed = "gzip" in self.headers.get("Accept-Encoding", "")
+        body = GZ_BODY if compressed else BODY
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send()
+
+    def log_message(self, *args):
+        pass
+
+def make_certificate(directory):
+    """Sertifikat self-signed untuk 127.0.0.1. Mengembalikan (cert, key) atau None tanpa openssl."""
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+def start_server(certificate):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    if certificate:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*certificate)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_port
+
+def _pipe(source, target):
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            with counters_lock:
+                counters["wire_bytes"] += len(data)
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, target):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def start_proxy(upstream_port):
+    """Proxy TCP yang menghitung byte dua arah dan jumlah koneksi baru."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(256)
+
+    def accept():
+        while True:
+            client, _ = listener.accept()
+            upstream = socket.create_connection(("127.0.0.1", upstream_port))
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with counters_lock:
+                counters["connections"] += 1
+            threading.Thread(target=_pipe, args=(client, upstream), daemon=True).start()
+            threading.Thread(target=_pipe, args=(upstream, client), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+def run(name, call, iterations):
+    with counters_lock:
+        counters["wire_bytes"] = counters["connections"] = 0
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = call()
+        assert response.status_code == 200 and response.content == BODY
+        latencies.append((time.perf_counter() - started) * 1000)
+    time.sleep(0.2)  # Tunggu proxy selesai menghitung penutupan koneksi
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<48} mean {statistics.mean(latencies):7.2f} ms  p95 {p95:7.2f} ms  "
+          f"wire {counters['wire_bytes'] / iterations / 1024:7.1f} KB/req  koneksi {counters['connections']}")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as directory:
+        certificate = make_certificate(directory)
+        if certificate:
+            # requests dan http_client memverifikasi sertifikat lewat bundle ini
+            os.environ["REQUESTS_CA_BUNDLE"] = certificate[0]
+        else:
+            print("[WARNING] openssl tidak ditemukan, benchmark memakai HTTP tanpa TLS.")
+
+        import requests
+        import http_client
+
+        port = start_proxy(start_server(certificate))
+        url = f"{'https' if certificate else 'http'}://127.0.0.1:{port}/"
+        print(f"{iterations} request per skenario, body {len(BODY) / 1024:.0f} KB ({len(GZ_BODY) / 1024:.1f} KB gzip)\n")
+
+        run("before: requests.post tanpa session", lambda: requests.post(url, json={"text": "x"}), iterations)
+        run("before: Session baru per panggilan", lambda: requests.Session().get(url), iterations)
+        run("after: http_client.shared_session().post", lambda: http_client.shared_session().post(url, json={"text": "x"}), iterations)
+        run("after: http_client.new_session() per panggilan", lambda: http_client.new_session().get(url), iterations)
+
+if __name__ == "__main__":
+    main()
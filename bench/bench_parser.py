@@ -0,0 +1,73 @@
+"""Microbenchmark backend parser halaman Hasil Studi (parser_lib).
+
+Memakai halaman tersimpan di bench/fixtures dan memastikan semua backend
+menghasilkan dict yang sama sebelum mengukur waktu parsing dan puncak memori
+(tracemalloc selama satu kali parse; hanya alokasi Python, tree C milik lxml tidak terhitung).
+
+Penggunaan:
+    python bench/bench_parser.py [jumlah_iterasi]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parser_lib
+
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+
+def available_backends():
+    return [name for name in parser_lib.BACKENDS if parser_lib.resolve_backend(name) == name]
+
+def timeit(func, text, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    return (time.perf_counter() - start) / iterations * 1000
+
+def peak_memory(func, text):
+    """Puncak alokasi (KB) selama satu pemanggilan func(text)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        func(text)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    backends = available_backends()
+    print(f"Backend: {', '.join(backends)} | iterasi: {iterations}")
+
+    for name in sorted(os.listdir(FIXTURES)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            text = f.read()
+
+        results = {backend: parser_lib.parse_hasil_studi(text, backend) for backend in backends}
+        reference = results[backends[0]]
+        for backend, result in results.items():
+            if result != reference:
+                print(f"[ERROR] {name}: hasil backend {backend} berbeda dari {backends[0]}")
+                sys.exit(1)
+        if "\ue5d7" in reference["nama"]:
+            print(f"[ERROR] {name}: glyph ikon masih ada di nama user")
+            sys.exit(1)
+
+        print(f"\n{name} ({len(text) / 1024:.1f} KB, {len(reference['nilai'])} matkul, nama={reference['nama']!r})")
+        fingerprint = parser_lib.fingerprint_hasil_studi
+        print(f"  {'fingerprint':<12} {timeit(fingerprint, text, iterations):8.3f} ms  "
+              f"puncak {peak_memory(fingerprint, text):8.1f} KB")
+        for backend in backends:
+            parse = lambda t: parser_lib.parse_hasil_studi(t, backend)
+            print(f"  {backend:<12} {timeit(parse, text, iterations):8.3f} ms  "
+                  f"puncak {peak_memory(parse, text):8.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark CPU server API: polling GET /tasks vs stream status /tasks/events (SSE).
+
+Server API (uvicorn, salinan repo di direktori sementara) diisi --tasks task, lalu
+--dashboards client dashboard dijalankan selama --duration detik dengan dua pola:
+- polling: setiap dashboard memanggil GET /tasks setiap 3 detik (perilaku App.vue lama)
+- sse: setiap dashboard memuat /tasks sekali lalu berlangganan /tasks/events dan hanya
+  memuat ulang daftar saat menerima event "tasks"
+
+Di kedua pola ada perubahan status yang sama (satu POST /tasks/{id}/stop per detik), agar
+biaya publish event ikut terhitung. CPU diukur dari /proc proses server saja (Linux).
+
+Penggunaan:
+    python bench/bench_task_events.py [--tasks 200] [--dashboards 20] [--duration 60]
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+import harness
+
+POLL_INTERVAL = 3
+
+def polling_dashboard(url, stop, counters):
+    session = requests.Session()
+    while not stop.wait(POLL_INTERVAL):
+        session.get(f"{url}/tasks", timeout=30).raise_for_status()
+        counters["tasks_requests"] += 1
+
+def sse_dashboard(url, stop, counters, streams):
+    session = requests.Session()
+    session.get(f"{url}/tasks", timeout=30).raise_for_status()
+    counters["tasks_requests"] += 1
+
+    response = session.get(f"{url}/tasks/events", stream=True, timeout=60)
+    streams.append(response)
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if stop.is_set():
+                break
+            if line.startswith("event: "):
+                counters["events"] += 1
+                if line == "event: tasks":
+                    session.get(f"{url}/tasks", timeout=30).raise_for_status()
+                    counters["tasks_requests"] += 1
+    except (requests.exceptions.RequestException, AttributeError, ValueError):
+        # Stream ditutup dari thread utama saat benchmark selesai
+        pass
+
+def churn(url, task_ids, stop):
+    session = requests.Session()
+    index = 0
+    while not stop.wait(1):
+        session.post(f"{url}/tasks/{task_ids[index % len(task_ids)]}/stop", timeout=30)
+        index += 1
+
+def run(mode, url, api_pid, args, task_ids):
+    stop = threading.Event()
+    counters = {"tasks_requests": 0, "events": 0}
+    streams = []
+    target = polling_dashboard if mode == "polling" else sse_dashboard
+    extra = () if mode == "polling" else (streams,)
+    threads = [threading.Thread(target=target, args=(url, stop, counters) + extra, daemon=True)
+               for _ in range(args.dashboards)]
+    threads.append(threading.Thread(target=churn, args=(url, task_ids, stop), daemon=True))
+
+    for i, thread in enumerate(threads):
+        thread.start()
+        # Dashboard dibuka tidak bersamaan, seperti tab browser sungguhan
+        time.sleep(POLL_INTERVAL / args.dashboards if i < args.dashboards else 0)
+
+    _, cpu_start = harness.process_usage(api_pid, include_children=False)
+    time.sleep(args.duration)
+    _, cpu_end = harness.process_usage(api_pid, include_children=False)
+
+    stop.set()
+    for response in streams:
+        response.close()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    cpu = cpu_end - cpu_start
+    print(f"{mode:<8} CPU server {cpu:6.2f}s ({cpu / args.duration * 100:5.1f}% satu core)  "
+          f"GET /tasks {counters['tasks_requests']:5d}  event SSE diterima {counters['events']:5d}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--dashboards", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60)
+    args = parser.parse_args()
+
+    repo = harness.sandbox(enter=False)
+    api, url = harness.start_api(repo)
+    try:
+        session = requests.Session()
+        task_ids = []
+        for i in range(args.tasks):
+            res = session.post(f"{url}/tasks", json={
+                "name": f"bench {i}", "login_id": f"bench{i:04d}", "password": "secret",
+                "interval": 300, "monitor_type": "nilai"
+            })
+            res.raise_for_status()
+            task_ids.append(res.json()["data"]["id"])
+
+        print(f"{args.tasks} task, {args.dashboards} dashboard, {args.duration:.0f} detik per pola\n")
+        for mode in ("polling", "sse"):
+            run(mode, url, api.pid, args, task_ids)
+    finally:
+        api.terminate()
+        api.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Helper bersama untuk script benchmark di folder bench/.
+
+- sandbox(): menyalin kode repo ke direktori sementara dan pindah ke sana, sehingga
+  data/db, data/value dan data/logs benchmark tidak menyentuh data asli
+- SiakangStub: server HTTPS lokal yang meniru halaman Siakang yang dipakai worker
+  (login, list semester, aktivasi semester, Hasil Studi dari bench/fixtures)
+- Proxy CONNECT lokal yang meneruskan siakang.untirta.ac.id ke stub; worker diarahkan
+  ke sana lewat HTTPS_PROXY + REQUESTS_CA_BUNDLE tanpa mengubah kode worker, dan host
+  lain ditolak sehingga benchmark tidak pernah mengirim request ke luar
+- start_api(): menjalankan server FastAPI (uvicorn) di salinan repo sebagai subprocess
+- Pembacaan RSS/CPU proses dan turunannya dari /proc (Linux)
+"""
+
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+SIAKANG_HOST = "siakang.untirta.ac.id"
+SIAKANG = f"https://{SIAKANG_HOST}"
+
+def sandbox(enter=True):
+    """Menyalin modul repo ke direktori sementara. enter=True: chdir ke sana dan taruh di sys.path."""
+    target = os.path.join(tempfile.mkdtemp(prefix="siakang-bench-"), "repo")
+    shutil.copytree(ROOT, target, ignore=shutil.ignore_patterns(
+        ".git", "data", "frontend", "bench", "tests", "__pycache__", ".pytest_cache", ".env", "*.patch", "*.jsonl"
+    ))
+    if enter:
+        os.chdir(target)
+        sys.path.insert(0, target)
+    return target
+
+def start_api(repo, env=None, timeout=30):
+    """Menjalankan uvicorn server.main:app di salinan repo. Mengembalikan (Popen, base_url)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    log_path = os.path.join(repo, "api.log")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=repo, env={**os.environ, **(env or {})}, stdout=subprocess.DEVNULL, stderr=open(log_path, "wb")
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    def up():
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            return proc.poll() is not None
+
+    wait_for(up, timeout)
+    if proc.poll() is not None:
+        with open(log_path, encoding="utf-8", errors="replace") as f:
+            sys.exit(f"[ERROR] Server API gagal start:\n{f.read()[-2000:]}")
+    return proc, url
+
+def make_certificate(directory, name):
+    """Sertifikat self-signed untuk nama host (butuh openssl). Mengembalikan (cert, key)."""
+    if not shutil.which("openssl"):
+        sys.exit("[ERROR] openssl dibutuhkan untuk membuat sertifikat stub.")
+    cert, key = os.path.join(directory, "stub-cert.pem"), os.path.join(directory, "stub-key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", f"/CN={name}",
+         "-addext", f"subjectAltName=DNS:{name}", "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+def semester_page(count=4):
+    cards = "".join(
+        f'<div class="col-12 col-md-6 col-lg-4"><div class="card"><div class="card-body">'
+        f'<h5 class="card-title">Semester {code}</h5><p class="card-text">Kode Semester #{code}</p>'
+        f'<a class="btn btn-primary" href="{SIAKANG}/dashboard/semester/{code}">Pilih</a></div></div></div>'
+        for code in (f"{2025 - i // 2}{2 - i % 2}" for i in range(count))
+    )
+    return f"<html><body><div class='row'>{cards}</div></body></html>"
+
+class SiakangStub:
+    """Stub Siakang (HTTPS) + proxy CONNECT. delay: jeda per request untuk meniru server lambat."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.hits = {}
+        self.tunnels = 0
+        self._lock = threading.Lock()
+        self._dir = tempfile.mkdtemp(prefix="siakang-stub-")
+        self.cert, key = make_certificate(self._dir, SIAKANG_HOST)
+
+        with open(os.path.join(FIXTURES, "hasil_studi.html"), encoding="utf-8") as f:
+            hasil_studi = f.read().encode("utf-8")
+        pages = {
+            "/auth/login": b'<form method="post"><input type="hidden" name="_token" value="stub-token"></form>',
+            "/dashboard/list-semester": semester_page().encode("utf-8"),
+            "/hasil-studi": hasil_studi,
+        }
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                path = self.path.split("?", 1)[0]
+                with stub._lock:
+                    stub.hits[path] = stub.hits.get(path, 0) + 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                body = pages.get(path, b"ok") if self.command == "GET" else b"<html>Dashboard</html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if self.command == "POST":
+                    self.send_header("Set-Cookie", "siakang_session=stub; Path=/; Secure; HttpOnly")
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 1024
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert, key)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.proxy = socket.socket()
+        self.proxy.bind(("127.0.0.1", 0))
+        self.proxy.listen(1024)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def total_hits(self):
+        with self._lock:
+            return sum(self.hits.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.hits.clear()
+            self.tunnels = 0
+
+    def env(self):
+        """Environment yang mengarahkan requests (proses ini dan subprocess worker) ke stub."""
+        proxy_url = f"http://127.0.0.1:{self.proxy.getsockname()[1]}"
+        return {
+            "HTTPS_PROXY": proxy_url,
+            "https_proxy": proxy_url,
+            "NO_PROXY": "127.0.0.1,localhost",
+            "no_proxy": "127.0.0.1,localhost",
+            "REQUESTS_CA_BUNDLE": self.cert,
+        }
+
+    def install(self):
+        os.environ.update(self.env())
+        return self
+
+    def _accept(self):
+        while True:
+            client, _ = self.proxy.accept()
+            threading.Thread(target=self._tunnel, args=(client,), daemon=True).start()
+
+    def _tunnel(self, client):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            data = client.recv(4096)
+            if not data:
+                client.close()
+                return
+            request += data
+
+        target = request.split(b"\r\n", 1)[0].split()
+        if len(target) < 2 or target[0] != b"CONNECT" or not target[1].startswith(SIAKANG_HOST.encode()):
+            client.sendall(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n")
+            client.close()
+            return
+
+        upstream = socket.create_connection(("127.0.0.1", self.server.server_port))
+        with self._lock:
+            self.tunnels += 1
+        client.sendall(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+        threading.Thread(target=_pipe, args=(upstream, client), daemon=True).start()
+        _pipe(client, upstream)
+
+def _pipe(source, target):
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, target):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+def _children(pid):
+    """pid turunan (rekursif) dari proses pid, dibaca dari /proc."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents.setdefault(int(fields[1]), []).append(int(entry))
+        except OSError:
+            continue
+    found, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+def process_usage(pid, include_children=True):
+    """(RSS MB, CPU detik) proses pid ditambah seluruh turunannya yang masih hidup."""
+    rss_kb, ticks = 0, 0
+    for p in [pid] + (_children(pid) if include_children else []):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks += int(fields[11]) + int(fields[12])
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return rss_kb / 1024, ticks / CLOCK_TICKS
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def wait_for(predicate, timeout, interval=0.2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return predicate()
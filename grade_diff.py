@@ -0,0 +1,69 @@
+"""Diff snapshot nilai Hasil Studi berdasarkan nama mata kuliah.
+
+Snapshot lama dan baru diindeks dengan key mata kuliah (bukan posisi baris), sehingga
+urutan baris yang berubah di portal atau mata kuliah yang ditambah/dihapus tidak
+menghasilkan alert palsu maupun perubahan yang terlewat. Kompleksitas O(n) dengan
+lookup dict.
+
+Digunakan oleh:
+- main.py: Deteksi perubahan nilai di run_nilai_cycle
+"""
+
+import re
+
+EMPTY_GRADE = "---"
+
+def course_key(course):
+    """Key mata kuliah: nama dinormalisasi (spasi dirapikan, case-insensitive)."""
+    return re.sub(r"\s+", " ", str(course.get("matkul", ""))).strip().casefold()
+
+def index_courses(courses):
+    """Mengindeks daftar mata kuliah berdasarkan key.
+
+    Nama yang muncul lebih dari sekali (mis. mata kuliah mengulang) diberi nomor
+    kemunculan agar tidak saling menimpa.
+    """
+    index = {}
+    for course in courses or []:
+        key = course_key(course)
+        occurrence = 1
+        while (key, occurrence) in index:
+            occurrence += 1
+        index[(key, occurrence)] = course
+    return index
+
+def diff_courses(old_courses, new_courses):
+    """Membandingkan dua snapshot nilai.
+
+    Returns:
+        dict dengan list:
+        - added: mata kuliah yang hanya ada di snapshot baru
+        - removed: mata kuliah yang hanya ada di snapshot lama
+        - changed: {"key", "old", "new"} untuk mata kuliah yang nilai/mutunya berubah
+        - unchanged: mata kuliah yang sama persis nilainya
+        Urutan mengikuti snapshot baru (removed mengikuti snapshot lama).
+    """
+    old_index = index_courses(old_courses)
+    new_index = index_courses(new_courses)
+
+    result = {"added": [], "removed": [], "changed": [], "unchanged": []}
+    for key, new in new_index.items():
+        old = old_index.get(key)
+        if old is None:
+            result["added"].append(new)
+        elif old.get("nilai") != new.get("nilai") or old.get("mutu") != new.get("mutu"):
+            result["changed"].append({"key": key[0], "old": old, "new": new})
+        else:
+            result["unchanged"].append(new)
+
+    for key, old in old_index.items():
+        if key not in new_index:
+            result["removed"].append(old)
+
+    return result
+
+def released_grades(diff):
+    """Mata kuliah yang perlu di-alert: nilai berubah, atau baru muncul dan sudah bernilai."""
+    released = [change["new"] for change in diff["changed"]]
+    released.extend(course for course in diff["added"] if course.get("nilai") != EMPTY_GRADE)
+    return released
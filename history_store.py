@@ -0,0 +1,209 @@
+"""History Store untuk snapshot nilai dan ketersediaan KRS.
+
+FILE_DATA hanya menyimpan snapshot terakhir. Module ini mencatat perubahannya
+(delta) per task per siklus di SQLite (data/db/history.db) sehingga pertanyaan
+seperti "kapan nilai ini keluar" atau "berapa lama matkul ini terbuka di KRS"
+bisa dijawab.
+
+Struktur:
+- history_events: delta terbaru, satu baris per perubahan (append-only, index task_id+ts)
+- history_archive: delta yang lebih tua dari HISTORY_COMPACT_AGE, dipadatkan per task
+  per hari menjadi satu blob JSON terkompresi zlib
+
+Jenis event:
+- nilai: added / changed / removed (value: {"nilai", "mutu", "sks"}), gpa (value: {"ips", "ipk"})
+- krs: open / closed
+
+Siklus tanpa perubahan tidak menulis apa pun; siklus dengan perubahan ditulis dalam
+satu transaksi executemany.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'db')
+HISTORY_DB_PATH = os.path.join(DATA_DIR, "history.db")
+HISTORY_COMPACT_AGE = float(os.getenv("HISTORY_COMPACT_AGE", 30 * 86400))
+
+_local = threading.local()
+
+def get_history_connection():
+    """Koneksi SQLite per thread ke history.db (WAL)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        conn = sqlite3.connect(HISTORY_DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute('''CREATE TABLE IF NOT EXISTS history_events
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_id INTEGER,
+                    ts REAL,
+                    kind TEXT,
+                    event TEXT,
+                    item TEXT,
+                    value TEXT)''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_history_task_ts
+                    ON history_events (task_id, ts)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS history_archive
+                    (task_id INTEGER,
+                    start_ts REAL,
+                    end_ts REAL,
+                    events BLOB,
+                    PRIMARY KEY (task_id, start_ts))''')
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+def record_events(task_id, kind, events, ts=None):
+    """Menulis delta satu siklus. events: list (event, item, value dict atau None)."""
+    if not events:
+        return 0
+    ts = time.time() if ts is None else ts
+    conn = get_history_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO history_events (task_id, ts, kind, event, item, value) VALUES (?, ?, ?, ?, ?, ?)",
+            [(task_id, ts, kind, event, item, json.dumps(value, separators=(',', ':')) if value is not None else None)
+             for event, item, value in events]
+        )
+    return len(events)
+
+def _grade_value(course):
+    return {"nilai": course.get("nilai"), "mutu": course.get("mutu"), "sks": course.get("sks")}
+
+def nilai_events(diff, old_data=None, new_data=None):
+    """Menyusun event history dari hasil grade_diff.diff_courses dan perubahan IPS/IPK."""
+    events = [("added", course.get("matkul"), _grade_value(course)) for course in diff["added"]]
+    events += [("changed", change["new"].get("matkul"), _grade_value(change["new"])) for change in diff["changed"]]
+    events += [("removed", course.get("matkul"), None) for course in diff["removed"]]
+
+    old_data = old_data if isinstance(old_data, dict) else {}
+    new_data = new_data or {}
+    if (old_data.get("ips"), old_data.get("ipk")) != (new_data.get("ips"), new_data.get("ipk")):
+        events.append(("gpa", None, {"ips": new_data.get("ips"), "ipk": new_data.get("ipk")}))
+    return events
+
+def krs_events(opened, closed):
+    return [("open", course, None) for course in sorted(opened)] + [("closed", course, None) for course in sorted(closed)]
+
+def _row_to_event(row):
+    return {
+        "ts": row["ts"],
+        "kind": row["kind"],
+        "event": row["event"],
+        "item": row["item"],
+        "value": json.loads(row["value"]) if row["value"] else None
+    }
+
+def query_history(task_id, start=None, end=None, kind=None, item=None, limit=1000):
+    """Event history task dalam rentang waktu [start, end], urut dari yang terlama."""
+    start = 0 if start is None else start
+    end = time.time() if end is None else end
+    conn = get_history_connection()
+
+    events = []
+    archives = conn.execute(
+        "SELECT events FROM history_archive WHERE task_id = ? AND end_ts >= ? AND start_ts <= ? ORDER BY start_ts",
+        (task_id, start, end)
+    ).fetchall()
+    for archive in archives:
+        for event in json.loads(zlib.decompress(archive["events"])):
+            if start <= event["ts"] <= end:
+                events.append(event)
+
+    query = "SELECT ts, kind, event, item, value FROM history_events WHERE task_id = ? AND ts BETWEEN ? AND ?"
+    params = [task_id, start, end]
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    if item:
+        query += " AND item = ?"
+        params.append(item)
+    query += " ORDER BY ts, id LIMIT ?"
+    params.append(limit)
+    events += [_row_to_event(row) for row in conn.execute(query, params).fetchall()]
+
+    if kind:
+        events = [event for event in events if event["kind"] == kind]
+    if item:
+        events = [event for event in events if event["item"] == item]
+    return events[:limit]
+
+def summarize_item(events):
+    """Ringkasan history satu item.
+
+    nilai: kapan pertama terlihat, kapan nilainya keluar, dan nilai terakhir.
+    krs: interval open/closed beserta total durasi terbuka (detik).
+    """
+    summary = {"item": events[0]["item"], "kind": events[0]["kind"], "events": len(events)}
+    if events[0]["kind"] == "krs":
+        intervals = []
+        for event in events:
+            if event["event"] == "open":
+                intervals.append({"opened_at": event["ts"], "closed_at": None})
+            elif event["event"] == "closed" and intervals and intervals[-1]["closed_at"] is None:
+                intervals[-1]["closed_at"] = event["ts"]
+        now = time.time()
+        summary["intervals"] = intervals
+        summary["open_seconds"] = sum((i["closed_at"] or now) - i["opened_at"] for i in intervals)
+        summary["is_open"] = bool(intervals) and intervals[-1]["closed_at"] is None
+    else:
+        summary["first_seen"] = events[0]["ts"]
+        released = next((e for e in events if e["value"] and e["value"].get("nilai") not in (None, "---")), None)
+        summary["released_at"] = released["ts"] if released else None
+        summary["latest"] = events[-1]["value"]
+    return summary
+
+def compact_history(older_than=HISTORY_COMPACT_AGE):
+    """Memadatkan event yang lebih tua dari older_than detik ke history_archive (satu blob per task per hari)."""
+    cutoff = time.time() - older_than
+    conn = get_history_connection()
+    rows = conn.execute(
+        "SELECT id, task_id, ts, kind, event, item, value FROM history_events WHERE ts < ? ORDER BY task_id, ts, id",
+        (cutoff,)
+    ).fetchall()
+    if not rows:
+        return 0
+
+    buckets = {}
+    for row in rows:
+        day_start = row["ts"] - (row["ts"] % 86400)
+        buckets.setdefault((row["task_id"], day_start), []).append(row)
+
+    with conn:
+        for (task_id, day_start), day_rows in buckets.items():
+            existing = conn.execute(
+                "SELECT events FROM history_archive WHERE task_id = ? AND start_ts = ?", (task_id, day_start)
+            ).fetchone()
+            events = json.loads(zlib.decompress(existing["events"])) if existing else []
+            events += [_row_to_event(row) for row in day_rows]
+            conn.execute(
+                "INSERT OR REPLACE INTO history_archive (task_id, start_ts, end_ts, events) VALUES (?, ?, ?, ?)",
+                (task_id, day_start, day_start + 86400, zlib.compress(json.dumps(events, separators=(',', ':')).encode(), 9))
+            )
+        conn.executemany("DELETE FROM history_events WHERE id = ?", [(row["id"],) for row in rows])
+    return len(rows)
+
+def delete_history(task_id):
+    conn = get_history_connection()
+    with conn:
+        conn.execute("DELETE FROM history_events WHERE task_id = ?", (task_id,))
+        conn.execute("DELETE FROM history_archive WHERE task_id = ?", (task_id,))
+
+def watch_history(interval=3600):
+    """Loop background pemadatan history."""
+    while True:
+        try:
+            compact_history()
+        except Exception as e:
+            print(f"[WARNING] History compactor error: {e}")
+        time.sleep(interval)
+
+def start_history_compactor():
+    threading.Thread(target=watch_history, name="history-compactor", daemon=True).start()
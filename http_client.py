@@ -0,0 +1,97 @@
+"""HTTP client bersama untuk Monitoring Akademik Siakang.
+
+Semua request keluar (Siakang, Telegram, WAHA) memakai session dari module ini:
+- Connection pool urllib3 dibagi per proses: session per akun tetap punya cookie jar
+  sendiri, tetapi koneksi TCP/TLS ke host yang sama dipakai ulang (keep-alive) oleh
+  semua worker di proses tersebut
+- Ukuran pool bisa diatur (HTTP_POOL_CONNECTIONS host, HTTP_POOL_MAXSIZE koneksi per host,
+  default minimal ENGINE_MAX_THREADS)
+- Timeout connect/read eksplisit untuk setiap request yang tidak memberi timeout sendiri
+- Accept-Encoding gzip/deflate, ditambah br (brotli) dan zstd jika package-nya terpasang
+- HTTP/2 opsional (HTTP2=1) lewat dukungan eksperimental urllib3, butuh package h2
+- Koneksi ke host di RESOLVER_HOSTS memakai DNS cache resolver.py (IPv4 untuk RESOLVER_IPV4_HOSTS)
+
+Digunakan oleh:
+- main.py: Session per worker
+- scraper_lib.py: Session SiakangScraper (API /check-semesters) dan CircuitBreakerAdapter
+- notifier.py: Pengiriman Telegram/WAHA
+"""
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+import resolver
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 10))
+# Default mengikuti ENGINE_MAX_THREADS (server/engine.py): di mode asyncio semua thread worker
+# berbagi pool ini, pool yang lebih kecil membuang koneksi keep-alive saat siklus bersamaan
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE") or max(20, int(os.getenv("ENGINE_MAX_THREADS", 32))))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 30))
+HTTP2 = os.getenv("HTTP2", "0") == "1"
+
+# Hanya encoding yang bisa di-decode urllib3 di environment ini (br/zstd jika package-nya ada)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+_pool_lock = threading.Lock()
+_session_lock = threading.Lock()
+_pool_managers = {}
+_shared_session = None
+
+if HTTP2:
+    try:
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+    except ImportError:
+        print("[WARNING] HTTP2=1 tapi package h2 tidak terpasang, memakai HTTP/1.1.")
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter dengan PoolManager bersama per proses dan timeout default."""
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        kwargs.setdefault("pool_connections", HTTP_POOL_CONNECTIONS)
+        kwargs.setdefault("pool_maxsize", HTTP_POOL_MAXSIZE)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        key = (connections, maxsize, block)
+        with _pool_lock:
+            manager = _pool_managers.get(key)
+            if manager is None:
+                super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+                self.poolmanager.pool_classes_by_scheme = resolver.pool_classes()
+                _pool_managers[key] = self.poolmanager
+            self.poolmanager = _pool_managers[key]
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=timeout or self.timeout, **kwargs)
+
+    def close(self):
+        # Pool dipakai session lain; cukup tutup koneksi proxy milik adapter ini
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+def new_session(headers=None, adapter=None):
+    """Session baru (cookie jar sendiri) di atas connection pool bersama."""
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    if headers:
+        session.headers.update(headers)
+    adapter = adapter or PooledAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def shared_session():
+    """Session tanpa state login untuk API pesan (Telegram/WAHA), satu per proses."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = new_session()
+        return _shared_session
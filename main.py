@@ -5,35 +5,66 @@ Script ini berjalan sebagai subprocess dan memantau halaman Siakang Untirta seca
 Mode Monitoring:
 - Monitoring Nilai: Mengecek perubahan nilai atau nilai baru di halaman Hasil Studi
 - Monitoring KRS: Mengecek ketersediaan Mata Kuliah tertentu di halaman KRS (Livewire)
+  (hasil pencarian per matkul dibagi antar task lewat shared_state, lihat KRS_SEARCH_CACHE_TTL)
 
 Notifikasi:
 - Telegram: Menggunakan Bot API dengan Markdown formatting
 - WhatsApp: Menggunakan WAHA (WhatsApp HTTP API)
+- Pesan ditulis ke outbox durable dan dikirim oleh notifier.NotificationDispatcher,
+  sehingga loop monitoring tidak menunggu API pesan
+- Digest (opsional, NOTIFY_DIGEST=1): semua perubahan nilai dalam satu siklus dikirim sebagai
+  satu pesan, bukan satu pesan per matkul (default); NOTIFY_DIGEST_WINDOW > 0 juga
+  menggabungkan digest beberapa task ke chat yang sama
+
+Penjadwalan:
+- Jeda antar siklus dihitung scheduler.PollScheduler: fase per task + jitter, backoff saat
+  siklus gagal/respon 5xx, interval lebih pendek di HOT_WINDOWS, dibatasi INTERVAL_MIN/INTERVAL_MAX
+- Circuit breaker bersama (scraper_lib.CircuitBreakerAdapter): selama portal down siklus
+  dilewati tanpa login ulang, dan hanya satu worker yang mengirim request probe
 
 Konfigurasi melalui Environment Variables yang diinjeksi oleh server/manager.py.
-Script ini didesain untuk dijalankan standalone atau via subprocess.
+Script ini didesain untuk dijalankan standalone atau via subprocess. Seluruh state
+per task disimpan di class MonitorWorker sehingga server/engine.py juga dapat
+menjalankan banyak task sekaligus di dalam satu proses.
 """
 
-import requests
 from bs4 import BeautifulSoup
 import time
 import json
 import os
 import sys
+import contextvars
 from dotenv import load_dotenv
 import builtins
 from datetime import datetime
 import re
 import html
+import collections
+import math
+import tempfile
+import threading
+import concurrent.futures
 import scraper_lib
+import http_client
+import resolver
+import parser_lib
+import shared_state
+import notifier
+import grade_diff
+import history_store
+import scheduler
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
+# Stream log untuk task yang sedang berjalan. Di mode subprocess nilainya None (stdout),
+# di mode engine setiap coroutine task mengisinya dengan file log task tersebut.
+log_stream = contextvars.ContextVar('log_stream', default=None)
+
 def print(*args, **kwargs):
     now = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
     msg = ' '.join(str(arg) for arg in args)
-    
+
     if '[ERROR]' in msg or '[GAGAL]' in msg:
         colored_msg = msg.replace('[ERROR]', f'{Fore.RED}[ERROR]{Style.RESET_ALL}').replace('[GAGAL]', f'{Fore.RED}[GAGAL]{Style.RESET_ALL}')
     elif '[SUCCESS]' in msg or '[SUKSES]' in msg:
@@ -52,7 +83,11 @@ def print(*args, **kwargs):
         colored_msg = msg.replace('[UPDATE]', f'{Fore.CYAN}[UPDATE]{Style.RESET_ALL}')
     else:
         colored_msg = msg
-    
+
+    stream = log_stream.get()
+    if stream is not None:
+        kwargs.setdefault('file', stream)
+        kwargs.setdefault('flush', True)
     builtins.print(f"{Fore.WHITE}{now}{Style.RESET_ALL}", colored_msg, **kwargs)
 
 if sys.platform == 'win32':
@@ -61,629 +96,1076 @@ if sys.platform == 'win32':
 
 load_dotenv()
 
+SIAKANG_HOST = "siakang.untirta.ac.id"
+
 URL_LOGIN = "https://siakang.untirta.ac.id/auth/login"
 URL_TARGET = "https://siakang.untirta.ac.id/hasil-studi"
 URL_LIST_SEMESTER = "https://siakang.untirta.ac.id/dashboard/list-semester"
+URL_KRS = "https://siakang.untirta.ac.id/krs-mahasiswa"
+
+# Hasil pencarian KRS dibagi antar task dengan scope yang sama. Bedakan scope jika
+# hasil pencarian matkul bisa berbeda antar akun (mis. beda prodi).
+KRS_SEARCH_SCOPE = os.getenv("KRS_SEARCH_SCOPE", "default")
+KRS_SEARCH_LEASE = 30
 
-LOGIN_ID = os.getenv("LOGIN_ID")
-PASSWORD = os.getenv("PASSWORD")
+# Penanda get_data() untuk halaman Hasil Studi yang identik dengan siklus sebelumnya.
+PAGE_UNCHANGED = object()
 
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-CHAT_ID = os.getenv("CHAT_ID")
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 
-WAHA_BASE_URL = os.getenv("WAHA_BASE_URL")
-WAHA_SESSION = os.getenv("WAHA_SESSION", "default")
-WAHA_API_KEY = os.getenv("WAHA_API_KEY")
+def write_file_atomic(path, content, fsync=True):
+    """Menulis file via temp file + fsync + rename sehingga pembaca tidak pernah melihat file setengah jadi."""
+    # Nama temp unik per pemanggilan: di mode engine banyak thread berbagi satu pid
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def percentile(values, pct):
+    """Nilai persentil (nearest-rank) dari kumpulan angka."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class MonitorWorker:
+    """State dan logic monitoring untuk satu task.
+
+    Konfigurasi dibaca dari mapping environment (os.environ di mode subprocess,
+    dict hasil manager.build_task_env di mode engine).
+    """
 
-WHATSAPP_NUMBER = os.getenv("WHATSAPP_NUMBER")
+    def __init__(self, env, run_once=False):
+        self.login_id = env.get("LOGIN_ID")
+        self.password = env.get("PASSWORD")
 
-FILE_DATA = os.getenv("FILE_DATA")
-INTERVAL = int(os.getenv("INTERVAL", 300))
-TARGET_SEMESTER_CODE = os.getenv("TARGET_SEMESTER_CODE")
+        self.telegram_token = env.get("TELEGRAM_TOKEN")
+        self.chat_id = env.get("CHAT_ID")
 
-MONITOR_TYPE = os.getenv("MONITOR_TYPE", "nilai")
-TARGET_COURSES_STR = os.getenv("TARGET_COURSES")
-try:
-    TARGET_COURSES = json.loads(TARGET_COURSES_STR) if TARGET_COURSES_STR else []
-except:
-    TARGET_COURSES = []
+        self.waha_base_url = env.get("WAHA_BASE_URL")
+        self.waha_session = env.get("WAHA_SESSION", "default")
+        self.waha_api_key = env.get("WAHA_API_KEY")
 
-URL_KRS = "https://siakang.untirta.ac.id/krs-mahasiswa"
+        self.whatsapp_number = env.get("WHATSAPP_NUMBER")
+        self.digest = env.get("NOTIFY_DIGEST", "0") == "1"
+        self.digest_window = float(env.get("NOTIFY_DIGEST_WINDOW", 0))
 
-SELECTED_SEMESTER_URL = None
+        self.file_data = env.get("FILE_DATA")
+        # (mtime_ns, size, data) snapshot terakhir yang dibaca/ditulis worker ini
+        self.snapshot_cache = None
+        self.task_id = int(env["TASK_ID"]) if env.get("TASK_ID", "").isdigit() else 0
+        self.stats_file = env.get("STATS_FILE")
+        self.interval = int(env.get("INTERVAL", 300))
+        self.target_semester_code = env.get("TARGET_SEMESTER_CODE")
 
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-})
+        self.monitor_type = env.get("MONITOR_TYPE", "nilai")
+        target_courses_str = env.get("TARGET_COURSES")
+        try:
+            self.target_courses = json.loads(target_courses_str) if target_courses_str else []
+        except:
+            self.target_courses = []
+
+        self.run_once = run_once
+        self.start_delay = float(env.get("START_DELAY", 0))
+        # Diset engine/pool saat task dihentikan; loop tunggu di start() berhenti lewat event ini
+        self.stop_event = threading.Event()
+        # Batas total tunggu di start() (circuit open / daftar semester kosong) sebelum task gagal
+        self.start_max_wait = float(env.get("START_MAX_WAIT", 1800))
+        self.start_deadline = 0
+        self.semester_stop_early = env.get("SEMESTER_STOP_EARLY", "1") == "1"
+        self.session_key = scraper_lib.session_key(f"task-{env.get('TASK_ID', 'standalone')}", self.login_id, self.password)
+        self.selected_semester_url = None
+        self.selected_semester_title = ""
+        self.semesters = []
+
+        self.krs_batch_size = max(1, int(env.get("KRS_BATCH_SIZE", 5)))
+        # Setelah server menolak bentuk request batch, batch dimatikan sampai waktu ini (epoch)
+        self.krs_batch_cooldown = float(env.get("KRS_BATCH_COOLDOWN", 1800))
+        self.krs_batching_resume_at = 0
+        self.krs_max_in_flight = max(1, int(env.get("KRS_MAX_IN_FLIGHT", 1)))
+        self.krs_context_ttl = int(env.get("KRS_CONTEXT_TTL", 600))
+        self.krs_context = None
+        self.krs_search_cache_ttl = float(env.get("KRS_SEARCH_CACHE_TTL", 20))
+        self.host_bucket = shared_state.TokenBucket(
+            SIAKANG_HOST,
+            rate=float(env.get("SIAKANG_RATE", 5)),
+            capacity=float(env.get("SIAKANG_BURST", 10))
+        )
+        self.rate_limiter = scraper_lib.AdaptiveRateLimiter(
+            min_delay=float(env.get("KRS_MIN_DELAY", 0.2)),
+            max_delay=float(env.get("KRS_MAX_DELAY", 10))
+        )
+
+        self.page_fingerprint = None
+        self.page_validators = {}
+        self.stats = {"cycles": 0, "short_circuited": 0, "not_modified": 0}
+        self.cycle_times = collections.deque(maxlen=100)
+
+        self.scheduler = scheduler.PollScheduler.from_env(env, self.interval, self.monitor_type, self.task_id)
+        self.next_delay = self.scheduler.interval
+        self.cycle_failures, self.cycle_outcome = 0, None
+        # Respon 5xx dalam satu siklus dihitung lewat response hook; dipakai untuk backoff
+        self.server_errors = 0
+
+        self.session = http_client.new_session({
+            'User-Agent': USER_AGENT,
+        })
+        self.session.hooks['response'].append(self._observe_response)
+        self.circuit = scraper_lib.mount_circuit_breaker(self.session)
+
+    def _observe_response(self, response, *args, **kwargs):
+        if response.status_code >= 500:
+            self.server_errors += 1
+
+    def _enqueue(self, channel, target, payload, digest):
+        if digest and self.digest_window > 0:
+            # Ditahan sebentar agar digest task lain ke chat yang sama bisa digabung
+            notifier.enqueue(channel, target, dict(payload, digest=True), delay=self.digest_window)
+        else:
+            notifier.enqueue(channel, target, payload)
 
-def send_telegram(message):
-    """
-    Mengirim pesan teks ke bot Telegram yang dikonfigurasi.
-    """
-    if not TELEGRAM_TOKEN or not CHAT_ID:
-        return
+    def send_telegram(self, message, digest=False):
+        """
+        Mengantrikan pesan teks ke bot Telegram yang dikonfigurasi (dikirim oleh notifier).
+        """
+        if not self.telegram_token or not self.chat_id:
+            return
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": message, "parse_mode": "Markdown"}
-    
-    for attempt in range(3):
+        self._enqueue("telegram", self.chat_id, {"text": message, "parse_mode": "Markdown"}, digest)
+
+    def send_waha(self, message, digest=False):
+        """
+        Mengantrikan pesan teks via WAHA (WhatsApp HTTP API) (dikirim oleh notifier).
+        """
+        if not self.waha_base_url:
+            return
+
+        target_number = self.whatsapp_number
+        if not target_number and self.chat_id and self.chat_id.isdigit():
+            target_number = self.chat_id
+
+        if not target_number:
+            return
+
+        wa_message = re.sub(r'\[(.*?)\]\((.*?)\)', r'\1 (\2)', message)
+
+        target_number = str(target_number).strip()
+
+        if '@' not in target_number:
+            sanitized = re.sub(r'[^0-9]', '', target_number)
+            if sanitized:
+                target_number = f"{sanitized}@c.us"
+
+        self._enqueue("waha", target_number, {"text": wa_message, "session": self.waha_session}, digest)
+
+    def send_notification(self, message, digest=False):
+        """Wrapper untuk mengirim ke semua channel yang tersedia."""
+        if self.telegram_token and self.chat_id:
+            self.send_telegram(message, digest)
+
+        if self.waha_base_url and (self.whatsapp_number or (self.chat_id and self.chat_id.isdigit())):
+            self.send_waha(message, digest)
+
+    def record_history(self, kind, events):
+        """Mencatat delta siklus ke history_store; kegagalan tidak menghentikan monitoring."""
         try:
-            response = requests.post(url, json=payload, timeout=30)
-            if response.status_code == 200:
-                return
-            if response.status_code >= 400 and response.status_code < 500:
-                print(f"[WARNING] Telegram API Error: {response.text}")
-                return
+            history_store.record_events(self.task_id, kind, events)
         except Exception as e:
-            print(f"[WARNING] Gagal kirim Telegram (Percobaan {attempt+1}/3): {e}")
-        
-        if attempt < 2:
-            time.sleep(5)
+            print(f"[WARNING] Gagal mencatat history: {e}")
+
+    def build_nilai_digest(self, nama, changed_courses, gpa_changes, complete_msg=None):
+        """Menggabungkan seluruh perubahan nilai satu siklus menjadi satu pesan."""
+        semester_info = f"🎓 *{self.selected_semester_title}*\n" if self.selected_semester_title else ""
+        # Digest beberapa task bisa digabung ke satu grup, jadi sertakan nama mahasiswa
+        name_info = f"👤 *{nama}*\n" if self.digest_window > 0 and nama else ""
+        lines = []
+        if changed_courses:
+            lines.append(f"🔔 *NILAI KELUAR!* ({len(changed_courses)} matkul)\n{name_info}{semester_info}")
+            for cur in changed_courses:
+                lines.append(f"📚 *{cur['matkul']}*\n📊 Nilai: `{cur['nilai']}` | ✨ Mutu: `{cur['mutu']}`")
+        lines.extend(gpa_changes)
+        if complete_msg:
+            lines.append(complete_msg)
+        else:
+            lines.append(f"Cek di: [Siakang Untirta]({URL_TARGET})")
+        return "\n\n".join(lines)
 
-def send_waha(message):
-    """
-    Mengirim pesan teks via WAHA (WhatsApp HTTP API).
-    """
-    if not WAHA_BASE_URL:
-        return
-        
-    target_number = WHATSAPP_NUMBER
-    if not target_number and CHAT_ID and CHAT_ID.isdigit():
-        target_number = CHAT_ID
-        
-    if not target_number:
-        return
-
-    wa_message = re.sub(r'\[(.*?)\]\((.*?)\)', r'\1 (\2)', message)
-    
-    target_number = str(target_number).strip()
-    
-    if '@' not in target_number:
-        sanitized = re.sub(r'[^0-9]', '', target_number)
-        if sanitized:
-            target_number = f"{sanitized}@c.us"
-    
-    url = f"{WAHA_BASE_URL}/api/sendText"
-    payload = {
-        "chatId": target_number,
-        "text": wa_message,
-        "session": WAHA_SESSION
-    }
-    
-    headers = {}
-    if WAHA_API_KEY:
-        headers["X-Api-Key"] = WAHA_API_KEY
-    
-    for attempt in range(3):
+    def do_login(self):
+        """Melakukan proses login untuk mendapatkan session cookie."""
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            if response.status_code == 201 or response.status_code == 200:
-                return
-            print(f"[WARNING] WAHA API Error: {response.text}")
+            print("[INFO] Mencoba login ke Siakang...")
+            res_page = self.session.get(URL_LOGIN)
+            soup = BeautifulSoup(res_page.text, 'html.parser')
+            csrf_token = soup.find('input', {'name': '_token'})['value']
+
+            login_data = {
+                '_token': csrf_token,
+                'email': self.login_id,
+                'username': self.login_id,
+                'password': self.password
+            }
+
+            response = self.session.post(URL_LOGIN, data=login_data)
+            if response.ok:
+                if "Identitas tersebut tidak cocok dengan data kami" in response.text:
+                    print("[ERROR] Login gagal: Identitas (NIM/Password) salah.")
+                    return False
+
+                print("[SUCCESS] Login berhasil.")
+                self.persist_session()
+                if self.selected_semester_url:
+                    print("[INFO] Mengaktifkan kembali semester terpilih...")
+                    try:
+                        self.session.get(self.selected_semester_url)
+                        print("[SUCCESS] Semester berhasil diaktifkan ulang.")
+                    except Exception as e:
+                        print(f"[WARNING] Gagal mengaktifkan ulang semester: {e}")
+                return True
         except Exception as e:
-            print(f"[WARNING] Gagal kirim WAHA (Percobaan {attempt+1}/3): {e}")
-        
-        if attempt < 2:
-            time.sleep(2)
-
-def send_notification(message):
-    """Wrapper untuk mengirim ke semua channel yang tersedia."""
-    if TELEGRAM_TOKEN and CHAT_ID:
-        send_telegram(message)
-    
-    if WAHA_BASE_URL and (WHATSAPP_NUMBER or (CHAT_ID and CHAT_ID.isdigit())):
-        send_waha(message)
-
-def do_login():
-    """Melakukan proses login untuk mendapatkan session cookie."""
-    try:
-        print("[INFO] Mencoba login ke Siakang...")
-        res_page = session.get(URL_LOGIN)
-        soup = BeautifulSoup(res_page.text, 'html.parser')
-        csrf_token = soup.find('input', {'name': '_token'})['value']
-        
-        login_data = {
-            '_token': csrf_token,
-            'email': LOGIN_ID,
-            'username': LOGIN_ID,
-            'password': PASSWORD
-        }
-        
-        response = session.post(URL_LOGIN, data=login_data)
-        if response.ok:
-            if "Identitas tersebut tidak cocok dengan data kami" in response.text:
-                print("[ERROR] Login gagal: Identitas (NIM/Password) salah.")
-                return False
-                
-            print("[SUCCESS] Login berhasil.")
-            if SELECTED_SEMESTER_URL:
-                print("[INFO] Mengaktifkan kembali semester terpilih...")
-                try:
-                    session.get(SELECTED_SEMESTER_URL)
-                    print("[SUCCESS] Semester berhasil diaktifkan ulang.")
-                except Exception as e:
-                    print(f"[WARNING] Gagal mengaktifkan ulang semester: {e}")
+            print(f"[ERROR] Error saat login: {e}")
+        return False
+
+    def restore_session(self):
+        """Memakai cookie login tersimpan dari run sebelumnya jika masih berlaku."""
+        if scraper_lib.restore_cookies(self.session, self.session_key):
+            print("[SUCCESS] Memakai sesi login tersimpan.")
             return True
-    except Exception as e:
-        print(f"[ERROR] Error saat login: {e}")
-    return False
-
-def get_all_semesters():
-    """Mengambil semua daftar semester yang tersedia dengan pagination."""
-    print("[INFO] Mengambil daftar semester...")
-    semesters = []
-    current_url = URL_LIST_SEMESTER
-    
-    while current_url:
-        try:
-            res = session.get(current_url)
-            if res.status_code != 200:
-                print(f"[WARNING] Gagal akses list semester: {res.status_code}")
-                break
+        return False
 
-            soup = BeautifulSoup(res.text, 'html.parser')
-            
-            cards = soup.find_all('div', class_='col-12 col-md-6 col-lg-4')
-            for card in cards:
-                title_elm = card.find('h5', class_='card-title')
-                if not title_elm: continue
-                
-                title = title_elm.get_text(strip=True)
-                
-                code_elm = card.find('p', class_='card-text')
-                code = code_elm.get_text(strip=True).replace("Kode Semester #", "") if code_elm else ""
-                
-                link_elm = card.find('a', class_='btn-primary')
-                url = link_elm['href'] if link_elm else None
-                
-                if title and url:
-                    semesters.append({
-                        'title': title,
-                        'code': code,
-                        'url': url
-                    })
-
-            next_link = soup.find('a', rel='next')
-            if next_link and next_link.has_attr('href'):
-                current_url = next_link['href']
-                if not current_url.startswith('http'):
-                    pass
-            else:
-                current_url = None
-                
+    def persist_session(self):
+        """Menyimpan cookie session terbaru agar restart berikutnya tidak perlu login."""
+        try:
+            scraper_lib.save_cookies(self.session, self.session_key)
         except Exception as e:
-            print(f"[WARNING] Error parsing list semester: {e}")
-            break
-            
-    return semesters
+            print(f"[WARNING] Gagal menyimpan sesi login: {e}")
 
-def get_data():
-    """Mengambil data nilai menggunakan session yang ada."""
-    try:
-        res = session.get(URL_TARGET)
-        
-        if res.status_code != 200:
-            print(f"[WARNING] Server Kampus memberikan respon tidak normal: {res.status_code}")
-            return []
+    def get_all_semesters(self, stop_at_code=None):
+        """Mengambil semua daftar semester yang tersedia dengan pagination.
 
-        soup_target = BeautifulSoup(res.text, 'html.parser')
+        Jika stop_at_code diisi, pagination berhenti di halaman yang memuat kode tersebut.
 
-        try:
-            hitung_ips_link = None
-            for a_tag in soup_target.find_all('a'):
-                if "Hitung IPS" in a_tag.get_text():
-                    hitung_ips_link = a_tag['href']
+        Returns:
+            tuple: (list semester, True jika semua halaman sudah diambil)
+        """
+        print("[INFO] Mengambil daftar semester...")
+        semesters = []
+        current_url = URL_LIST_SEMESTER
+        relogged = False
+        complete = False
+
+        while current_url:
+            try:
+                res = self.session.get(current_url)
+                if res.status_code != 200:
+                    print(f"[WARNING] Gagal akses list semester: {res.status_code}")
                     break
-            
-            if hitung_ips_link:
-                print("[INFO] Menjalankan proses Hitung IPS...")
-                session.get(hitung_ips_link)
-                res = session.get(URL_TARGET)
-                soup_target = BeautifulSoup(res.text, 'html.parser')
-        except Exception as e:
-            print(f"[WARNING] Gagal menjalankan Hitung IPS: {e}")
 
-        tbody = soup_target.find('tbody')
+                if "auth/login" in res.url:
+                    print("[WARNING] Sesi habis (Redirect ke login).")
+                    if relogged or not self.do_login():
+                        break
+                    relogged = True
+                    continue
 
-        if not tbody:
-            if "auth/login" in res.url:
-                print("[WARNING] Sesi habis (Redirect ke login).")
+                soup = BeautifulSoup(res.text, 'html.parser')
+
+                cards = soup.find_all('div', class_='col-12 col-md-6 col-lg-4')
+                for card in cards:
+                    title_elm = card.find('h5', class_='card-title')
+                    if not title_elm: continue
+
+                    title = title_elm.get_text(strip=True)
+
+                    code_elm = card.find('p', class_='card-text')
+                    code = code_elm.get_text(strip=True).replace("Kode Semester #", "") if code_elm else ""
+
+                    link_elm = card.find('a', class_='btn-primary')
+                    url = link_elm['href'] if link_elm else None
+
+                    if title and url:
+                        semesters.append({
+                            'title': title,
+                            'code': code,
+                            'url': url
+                        })
+
+                if stop_at_code and any(sem['code'] == stop_at_code for sem in semesters):
+                    break
+
+                next_link = soup.find('a', rel='next')
+                if next_link and next_link.has_attr('href'):
+                    current_url = next_link['href']
+                    if not current_url.startswith('http'):
+                        pass
+                else:
+                    current_url = None
+                    complete = True
+
+            except Exception as e:
+                print(f"[WARNING] Error parsing list semester: {e}")
+                break
+
+        return semesters, complete
+
+    def load_semesters(self):
+        """Daftar semester dari cache bersama, atau scraping jika cache tidak memadai.
+
+        Cache dipakai jika lengkap, atau jika sudah memuat TARGET_SEMESTER_CODE.
+        """
+        cached = scraper_lib.load_cached_semesters(self.login_id, self.password)
+        if cached:
+            semesters, complete = cached
+            if self.target_semester_code:
+                usable = any(sem['code'] == self.target_semester_code and sem.get('url') for sem in semesters)
             else:
-                print("[WARNING] Tabel tidak ditemukan (Sesi gantung/halaman error).")
-            
-            print("[INFO] Memaksa login ulang untuk menyegarkan sesi...")
-            if do_login():
-                res = session.get(URL_TARGET)
-                soup_target = BeautifulSoup(res.text, 'html.parser')
-                tbody = soup_target.find('tbody')
-            
-            if not tbody:
-                print("[ERROR] Masih gagal mendapatkan tabel setelah login ulang. Server mungkin sedang down.")
-                return []
-
-        results = []
-        rows = tbody.find_all('tr')
-        total_sks = 0
-        
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) >= 6 and not row.get('class'):
-                matkul_cell = cols[2]
-                
-                sks_val = 0
-                for badge in matkul_cell.find_all('span', class_='badge'):
-                    badge_text = badge.get_text(strip=True)
-                    if "SKS" in badge_text:
-                        try:
-                            sks_val = int(badge_text.replace("SKS", "").strip())
-                        except:
-                            pass
-                    badge.decompose()
-                
-                total_sks += sks_val
-                matkul = matkul_cell.get_text(strip=True)
-                
-                col_nilai = cols[4]
-                col_mutu = cols[5]
-                
-                is_placeholder = "placeholder" in str(col_nilai)
-                is_empty = not col_nilai.get_text(strip=True)
-                
-                results.append({
-                    "matkul": matkul,
-                    "sks": sks_val,
-                    "nilai": "---" if (is_placeholder or is_empty) else col_nilai.get_text(strip=True),
-                    "mutu": "---" if (is_placeholder or is_empty) else col_mutu.get_text(strip=True)
-                })
-
-        ip_val = "-"
-        ipk_val = "-"
+                usable = complete
+            if usable:
+                print("[INFO] Memakai daftar semester dari cache.")
+                return semesters
+
+        stop_at_code = self.target_semester_code if self.semester_stop_early else None
+        semesters, complete = self.get_all_semesters(stop_at_code=stop_at_code)
+        if semesters:
+            scraper_lib.cache_semesters(self.login_id, self.password, semesters, complete)
+        return semesters
+
+    def get_data(self):
+        """Mengambil data nilai menggunakan session yang ada.
+
+        Mengembalikan tuple (data, page_state). data bernilai PAGE_UNCHANGED jika server
+        menjawab 304 atau fingerprint region nilai sama dengan siklus sebelumnya, sehingga
+        parsing dan diff bisa dilewati. page_state berisi (fingerprint, validators) halaman
+        yang baru diparsing; pemanggil baru menyimpannya setelah snapshot berhasil ditulis.
+        """
         try:
-            for p in soup_target.find_all('p'):
-                text = p.get_text(strip=True)
-                if "IP :" in text and "IPK" not in text:
-                    ip_val = text.split(":")[-1].strip()
-                elif "IPK :" in text:
-                    ipk_val = text.split(":")[-1].strip()
+            can_skip = self.page_fingerprint and os.path.exists(self.file_data)
+            headers = {}
+            if can_skip and self.page_validators.get('etag'):
+                headers['If-None-Match'] = self.page_validators['etag']
+            if can_skip and self.page_validators.get('last_modified'):
+                headers['If-Modified-Since'] = self.page_validators['last_modified']
+
+            res = self.session.get(URL_TARGET, headers=headers)
+
+            if res.status_code == 304 and can_skip:
+                self.stats['not_modified'] += 1
+                return PAGE_UNCHANGED, None
+
+            if res.status_code != 200:
+                print(f"[WARNING] Server Kampus memberikan respon tidak normal: {res.status_code}")
+                return [], None
+
+            if can_skip and parser_lib.fingerprint_hasil_studi(res.text) == self.page_fingerprint:
+                return PAGE_UNCHANGED, None
+
+            page = parser_lib.parse_hasil_studi(res.text)
+
+            try:
+                if page['hitung_ips_url']:
+                    print("[INFO] Menjalankan proses Hitung IPS...")
+                    self.session.get(page['hitung_ips_url'])
+                    res = self.session.get(URL_TARGET)
+                    page = parser_lib.parse_hasil_studi(res.text)
+            except Exception as e:
+                print(f"[WARNING] Gagal menjalankan Hitung IPS: {e}")
+
+            if not page['has_table']:
+                if "auth/login" in res.url:
+                    print("[WARNING] Sesi habis (Redirect ke login).")
+                else:
+                    print("[WARNING] Tabel tidak ditemukan (Sesi gantung/halaman error).")
+
+                print("[INFO] Memaksa login ulang untuk menyegarkan sesi...")
+                if self.do_login():
+                    res = self.session.get(URL_TARGET)
+                    page = parser_lib.parse_hasil_studi(res.text)
+
+                if not page['has_table']:
+                    print("[ERROR] Masih gagal mendapatkan tabel setelah login ulang. Server mungkin sedang down.")
+                    return [], None
+
+            page_state = (parser_lib.fingerprint_hasil_studi(res.text), {
+                'etag': res.headers.get('ETag'),
+                'last_modified': res.headers.get('Last-Modified')
+            })
+
+            final_data = {
+                "nama": page['nama'],
+                "nim": self.login_id,
+                "ips": page['ips'],
+                "ipk": page['ipk'],
+                "total_sks": page['total_sks'],
+                "nilai": page['nilai']
+            }
+
+            return final_data, page_state
+
         except Exception as e:
-            print(f"[WARNING] Gagal parsing IP/IPK: {e}")
-        
-        user_name = "-"
-        user_nim = LOGIN_ID
-        
+            print(f"[ERROR] Error serius di get_data: {e}")
+            return None, None
+
+    def _load_krs_context(self):
+        """Memuat halaman KRS dan menyiapkan CSRF token serta snapshot Livewire.
+
+        Returns:
+            dict: keys 'livewire_url', 'headers', 'csrf_token', 'snapshot', 'expires_at'
+            atau None jika komponen tidak bisa disiapkan.
+        """
         try:
-            name_elem = soup_target.select_one('.pro-user-name')
-            if name_elem:
-                full_text = name_elem.get_text(strip=True)
-                user_name = full_text
-            else:
-                user_box_name = soup_target.select_one('.user-box .dropdown-toggle')
-                if user_box_name:
-                    user_name = user_box_name.get_text(strip=True)
-                    
-            user_name = user_name.replace("", "").strip()
-                
-        except Exception as e:
-            print(f"[WARNING] Gagal parsing Nama User: {e}")
-
-        final_data = {
-            "nama": user_name,
-            "nim": user_nim,
-            "ips": ip_val,
-            "ipk": ipk_val,
-            "total_sks": total_sks,
-            "nilai": results
-        }
+            print(f"[INFO] Mengakses halaman KRS: {URL_KRS}")
+            res = self.session.get(URL_KRS)
 
-        return final_data
+            if res.status_code != 200:
+                print(f"[WARNING] Gagal akses KRS: {res.status_code}")
+                return None
 
-    except Exception as e:
-        print(f"[ERROR] Error serius di get_data: {e}")
-        return None
+            if "auth/login" in res.url:
+                print("[WARNING] Sesi habis (Redirect ke login).")
+                if self.do_login():
+                    res = self.session.get(URL_KRS)
+                else:
+                    return None
 
-def get_krs_data():
-    """Mengambil data ketersediaan matkul di halaman KRS."""
-    try:
-        print(f"[INFO] Mengakses halaman KRS: {URL_KRS}")
-        res = session.get(URL_KRS)
-        
-        if res.status_code != 200:
-            print(f"[WARNING] Gagal akses KRS: {res.status_code}")
-            return None
+            soup = BeautifulSoup(res.text, 'html.parser')
+            csrf_token = None
 
-        if "auth/login" in res.url:
-            print("[WARNING] Sesi habis (Redirect ke login).")
-            if do_login():
-                res = session.get(URL_KRS)
-            else:
+            script_csrf = soup.find('script', {'data-csrf': True})
+            if script_csrf:
+                csrf_token = script_csrf['data-csrf']
+
+            if not csrf_token:
+                meta_csrf = soup.find('meta', {'name': 'csrf-token'})
+                if meta_csrf:
+                    csrf_token = meta_csrf['content']
+
+            if not csrf_token:
+                input_csrf = soup.find('input', {'name': '_token'})
+                if input_csrf:
+                    csrf_token = input_csrf['value']
+
+            if not csrf_token:
+                print("[WARNING] Gagal mendapatkan CSRF Token untuk request Livewire.")
                 return None
-        
-        soup = BeautifulSoup(res.text, 'html.parser')
-        csrf_token = None
-        
-        script_csrf = soup.find('script', {'data-csrf': True})
-        if script_csrf:
-            csrf_token = script_csrf['data-csrf']
-        
-        if not csrf_token:
-            meta_csrf = soup.find('meta', {'name': 'csrf-token'})
-            if meta_csrf:
-                csrf_token = meta_csrf['content']
-
-        if not csrf_token:
-            input_csrf = soup.find('input', {'name': '_token'})
-            if input_csrf:
-                csrf_token = input_csrf['value']
-        
-        if not csrf_token:
-            print("[WARNING] Gagal mendapatkan CSRF Token untuk request Livewire.")
-            return None
 
-        target_component_name = "rencana-studi.rencana-studi-index"
-        snapshot = None
-        component_id = None
-
-        tag_match = re.search(r'<[^>]+wire:snapshot="[^"]*rencana-studi\.rencana-studi-index[^"]*"[^>]*>', res.text)
-        
-        if tag_match:
-            full_tag = tag_match.group(0)
-            id_match = re.search(r'wire:id=["\']([^"\']+)["\']', full_tag)
-            if id_match:
-                component_id = id_match.group(1)
-            
-            snap_match = re.search(r'wire:snapshot=(["\'])(.*?)\1', full_tag)
-            if snap_match:
-                raw_snapshot = snap_match.group(2)
-                snapshot = html.unescape(raw_snapshot)
-        
-        if not snapshot or not component_id:
-            print(f"[WARNING] Komponen Livewire '{target_component_name}' tidak ditemukan.")
-            return None
+            target_component_name = "rencana-studi.rencana-studi-index"
+            snapshot = None
+            component_id = None
+
+            tag_match = re.search(r'<[^>]+wire:snapshot="[^"]*rencana-studi\.rencana-studi-index[^"]*"[^>]*>', res.text)
+
+            if tag_match:
+                full_tag = tag_match.group(0)
+                id_match = re.search(r'wire:id=["\']([^"\']+)["\']', full_tag)
+                if id_match:
+                    component_id = id_match.group(1)
+
+                snap_match = re.search(r'wire:snapshot=(["\'])(.*?)\1', full_tag)
+                if snap_match:
+                    raw_snapshot = snap_match.group(2)
+                    snapshot = html.unescape(raw_snapshot)
+
+            if not snapshot or not component_id:
+                print(f"[WARNING] Komponen Livewire '{target_component_name}' tidak ditemukan.")
+                return None
+
+            print(f"[SUCCESS] Livewire Component Found: ID={component_id}")
+
+            if '"lazyIsolated":true' in snapshot or '"lazyLoaded":false' in snapshot:
+                print("[INFO] Component is Lazy Loaded. Waking it up...")
+
+                lazy_params = []
+                x_intersect_match = re.search(r'x-intersect=["\']([^"\']+)["\']', full_tag)
+                if x_intersect_match:
+                    x_val_raw = x_intersect_match.group(1)
+                    x_val = html.unescape(x_val_raw)
+                    lazy_arg_match = re.search(r"\$wire\.__lazyLoad\(['\"]([^'\"]+)['\"]\)", x_val)
+                    if lazy_arg_match:
+                        lazy_params = [lazy_arg_match.group(1)]
+
+                hydrate_url = f"{res.url.split('/krs-mahasiswa')[0]}/livewire/update"
+
+                headers = {
+                    'X-Livewire': 'true',
+                    'X-CSRF-TOKEN': csrf_token,
+                    'Content-Type': 'application/json',
+                    'User-Agent': self.session.headers['User-Agent']
+                }
+
+                hydrate_payload = {
+                    "_token": csrf_token,
+                    "components": [
+                        {
+                            "snapshot": snapshot,
+                            "updates": {},
+                            "calls": [
+                                {
+                                    "path": "",
+                                    "method": "__lazyLoad",
+                                    "params": lazy_params
+                                }
+                            ]
+                        }
+                    ]
+                }
+
+                try:
+                    h_res = self.session.post(hydrate_url, json=hydrate_payload, headers=headers)
+                    if h_res.status_code == 200:
+                        h_json = h_res.json()
+                        new_snapshot = h_json['components'][0].get('snapshot')
+                        if new_snapshot:
+                            snapshot = new_snapshot
+                            print("[SUCCESS] Component hydrated! Snapshot updated.")
+                        else:
+                            print("[WARNING] Hydration succeeded but no new snapshot returned.")
+                    else:
+                        print(f"[WARNING] Failed to hydrate lazy component ({h_res.status_code})")
+                except Exception as e:
+                    print(f"[WARNING] Error during hydration: {e}")
+
+            livewire_url = f"{res.url.split('/krs-mahasiswa')[0]}/livewire/update"
 
-        print(f"[SUCCESS] Livewire Component Found: ID={component_id}")
-
-        if '"lazyIsolated":true' in snapshot or '"lazyLoaded":false' in snapshot:
-            print("[INFO] Component is Lazy Loaded. Waking it up...")
-            
-            lazy_params = []
-            x_intersect_match = re.search(r'x-intersect=["\']([^"\']+)["\']', full_tag)
-            if x_intersect_match:
-                x_val_raw = x_intersect_match.group(1)
-                x_val = html.unescape(x_val_raw)
-                lazy_arg_match = re.search(r"\$wire\.__lazyLoad\(['\"]([^'\"]+)['\"]\)", x_val)
-                if lazy_arg_match:
-                    lazy_params = [lazy_arg_match.group(1)]
-
-            hydrate_url = f"{res.url.split('/krs-mahasiswa')[0]}/livewire/update"
-            
             headers = {
                 'X-Livewire': 'true',
                 'X-CSRF-TOKEN': csrf_token,
                 'Content-Type': 'application/json',
-                'User-Agent': session.headers['User-Agent']
+                'Origin': 'https://siakang.untirta.ac.id',
+                'Referer': URL_KRS,
+                'User-Agent': self.session.headers['User-Agent']
             }
-            
-            hydrate_payload = {
-                "_token": csrf_token,
-                "components": [
-                    {
-                        "snapshot": snapshot,
-                        "updates": {},
-                        "calls": [
-                            {
-                                "path": "",
-                                "method": "__lazyLoad",
-                                "params": lazy_params
-                            }
-                        ]
-                    }
-                ]
+
+            return {
+                "livewire_url": livewire_url,
+                "headers": headers,
+                "csrf_token": csrf_token,
+                "snapshot": snapshot,
+                "expires_at": time.monotonic() + self.krs_context_ttl
             }
-            
+
+        except Exception as e:
+            print(f"[ERROR] Error get_krs_data: {e}")
+            return None
+
+    def get_krs_data(self):
+        """Mengambil data ketersediaan matkul di halaman KRS.
+
+        CSRF token dan snapshot Livewire disimpan selama KRS_CONTEXT_TTL detik, sehingga
+        siklus berikutnya cukup mengirim request pencarian. Cache dibuang saat server
+        membalas 419 atau redirect ke halaman login, lalu halaman KRS dimuat ulang.
+        """
+        for attempt in range(2):
+            context = self.krs_context
+            from_cache = bool(context and context['expires_at'] > time.monotonic())
+
+            if from_cache:
+                self.stats['krs_context_hits'] = self.stats.get('krs_context_hits', 0) + 1
+                print("[INFO] Menggunakan snapshot Livewire dari cache.")
+            else:
+                context = self.krs_context = self._load_krs_context()
+                if not context:
+                    return None
+
             try:
-                h_res = session.post(hydrate_url, json=hydrate_payload, headers=headers)
-                if h_res.status_code == 200:
-                    h_json = h_res.json()
-                    new_snapshot = h_json['components'][0].get('snapshot')
-                    if new_snapshot:
-                        snapshot = new_snapshot
-                        print("[SUCCESS] Component hydrated! Snapshot updated.")
-                    else:
-                        print("[WARNING] Hydration succeeded but no new snapshot returned.")
-                else:
-                    print(f"[WARNING] Failed to hydrate lazy component ({h_res.status_code})")
+                found_courses, expired = self.search_courses(
+                    context['livewire_url'], context['headers'], context['csrf_token'], context['snapshot']
+                )
             except Exception as e:
-                print(f"[WARNING] Error during hydration: {e}")
+                print(f"[ERROR] Error get_krs_data: {e}")
+                return None
 
-        found_courses = []
-        
-        livewire_url = f"{res.url.split('/krs-mahasiswa')[0]}/livewire/update"
-        
-        headers = {
-            'X-Livewire': 'true',
-            'X-CSRF-TOKEN': csrf_token,
-            'Content-Type': 'application/json',
-            'Origin': 'https://siakang.untirta.ac.id',
-            'Referer': URL_KRS, 
-            'User-Agent': session.headers['User-Agent']
+            if expired:
+                self.krs_context = None
+                if from_cache:
+                    print("[INFO] Snapshot cache tidak berlaku lagi, memuat ulang halaman KRS...")
+                    continue
+
+            return {"found": found_courses}
+
+    def _livewire_search(self, livewire_url, headers, csrf_token, snapshot, course_names):
+        """Mengirim satu request /livewire/update berisi pencarian untuk beberapa matkul.
+
+        Setiap matkul menjadi satu entry `components` dengan snapshot yang sama,
+        sehingga server merender hasil pencarian masing-masing dalam satu round trip.
+
+        Returns:
+            tuple: (status_code, list html per matkul atau None jika respon tidak valid)
+        """
+        payload = {
+            "_token": csrf_token,
+            "components": [
+                {
+                    "snapshot": snapshot,
+                    "updates": {
+                        "search": course_name
+                    },
+                    "calls": []
+                }
+                for course_name in course_names
+            ]
         }
 
-        for course_name in TARGET_COURSES:
-            if not course_name: continue
-            
-            print(f"[INFO] Mencari matkul: {course_name}...")
-            
-            payload = {
-                "_token": csrf_token,
-                "components": [
-                    {
-                        "snapshot": snapshot,
-                        "updates": {
-                            "search": course_name
-                        },
-                        "calls": []
-                    }
+        self.host_bucket.acquire()
+        self.rate_limiter.wait()
+        started = time.monotonic()
+        p_res = self.session.post(livewire_url, json=payload, headers=headers)
+        self.rate_limiter.record(p_res.status_code, time.monotonic() - started)
+
+        if "auth/login" in p_res.url:
+            return 419, None
+
+        if p_res.status_code != 200:
+            return p_res.status_code, None
+
+        try:
+            components = p_res.json().get('components', [])
+        except json.JSONDecodeError:
+            print("[WARNING] Response bukan valid JSON")
+            return p_res.status_code, None
+
+        if len(components) != len(course_names):
+            return p_res.status_code, None
+
+        return p_res.status_code, [html.unescape(c.get('effects', {}).get('html', '')) for c in components]
+
+    def _search_batch(self, livewire_url, headers, csrf_token, snapshot, batch):
+        """Mencari satu kelompok matkul.
+
+        Returns:
+            tuple: (list matkul yang ditemukan, True jika token CSRF kedaluwarsa,
+                    list matkul yang berhasil dicek)
+        """
+        print(f"[INFO] Mencari matkul: {', '.join(batch)}...")
+
+        try:
+            status_code, results = self._livewire_search(livewire_url, headers, csrf_token, snapshot, batch)
+        except Exception as e:
+            print(f"[WARNING] Error during search request: {e}")
+            return [], False, []
+
+        if status_code == 419:
+            print(f"[WARNING] Gagal search ({status_code})")
+            print("[WARNING] Token expired, re-login next loop.")
+            return [], True, []
+
+        # Hanya penolakan bentuk request (200 dengan jumlah komponen tidak sesuai, atau 4xx selain 429)
+        # yang diulang per matkul; 429/5xx berarti server sedang sibuk dan batch cukup dianggap gagal
+        shape_rejected = status_code == 200 or (400 <= status_code < 500 and status_code != 429)
+        if results is None and len(batch) > 1 and shape_rejected:
+            print(f"[WARNING] Batch Livewire ditolak ({status_code}), beralih ke satu request per matkul "
+                  f"selama {self.krs_batch_cooldown:.0f} detik.")
+            self.krs_batching_resume_at = time.time() + self.krs_batch_cooldown
+            found_courses, checked_courses = [], []
+            for course_name in batch:
+                found, expired, checked = self._search_batch(livewire_url, headers, csrf_token, snapshot, [course_name])
+                found_courses += found
+                checked_courses += checked
+                if expired:
+                    return found_courses, True, checked_courses
+            return found_courses, False, checked_courses
+
+        if status_code != 200 or results is None:
+            print(f"[WARNING] Gagal search ({status_code})")
+            return [], False, []
+
+        found_courses = []
+        for course_name, decoded_html in zip(batch, results):
+            if course_name.lower() in decoded_html.lower():
+                print(f"[SUCCESS] DITEMUKAN: {course_name}")
+                found_courses.append(course_name)
+        return found_courses, False, list(batch)
+
+    def _probe_courses(self, livewire_url, headers, csrf_token, snapshot, courses):
+        """Mencari matkul langsung ke server, dikelompokkan per KRS_BATCH_SIZE matkul per request.
+
+        Jika KRS_MAX_IN_FLIGHT > 1, kelompok-kelompok tersebut dikirim paralel.
+        Jika server menolak bentuk request batch, pencarian diulang satu matkul per request
+        dan mode batch dimatikan selama KRS_BATCH_COOLDOWN detik.
+
+        Returns:
+            tuple: (list matkul yang ditemukan, True jika token/sesi kedaluwarsa,
+                    list matkul yang berhasil dicek)
+        """
+        size = self.krs_batch_size
+        if self.krs_batching_resume_at:
+            if time.time() < self.krs_batching_resume_at:
+                size = 1
+            else:
+                print("[INFO] Masa jeda batch Livewire selesai, mencoba mode batch lagi.")
+                self.krs_batching_resume_at = 0
+        batches = [courses[i:i + size] for i in range(0, len(courses), size)]
+        args = (livewire_url, headers, csrf_token, snapshot)
+
+        outcomes = []
+        if self.krs_max_in_flight > 1 and len(batches) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.krs_max_in_flight, len(batches))) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._search_batch, *args, batch)
+                    for batch in batches
                 ]
-            }
-            
-            try:
-                p_res = session.post(livewire_url, json=payload, headers=headers)
-                
-                if p_res.status_code != 200:
-                    print(f"[WARNING] Gagal search ({p_res.status_code})")
-                    if p_res.status_code == 419:
-                        print("[WARNING] Token expired, re-login next loop.")
-                        break
-                    continue
+                outcomes = [f.result() for f in futures]
+        else:
+            for batch in batches:
+                outcomes.append(self._search_batch(*args, batch))
+                if outcomes[-1][1]:
+                    break
 
-                try:
-                    resp_json = p_res.json()
-                    c_effects = resp_json.get('components', [{}])[0].get('effects', {})
-                    html_content = c_effects.get('html', '')
-                    decoded_html = html.unescape(html_content)
-
-                    if course_name.lower() in decoded_html.lower():
-                        print(f"[SUCCESS] DITEMUKAN!")
-                        found_courses.append(course_name)
-                    
-                except json.JSONDecodeError:
-                        print("[WARNING] Response bukan valid JSON")
-            
-            except Exception as e:
-                print(f"[WARNING] Error during search request: {e}")
-            
-            time.sleep(1)
+        found_courses = [course for found, _, _ in outcomes for course in found]
+        checked_courses = [course for _, _, checked in outcomes for course in checked]
+        return found_courses, any(expired for _, expired, _ in outcomes), checked_courses
 
-        return {"found": found_courses}
+    def krs_search_key(self, course_name):
+        """Key hasil pencarian bersama: scope + semester + nama matkul dinormalisasi."""
+        name = re.sub(r"\s+", " ", course_name).strip().casefold()
+        return f"{KRS_SEARCH_SCOPE}|{self.target_semester_code or 'current'}|{name}"
 
-    except Exception as e:
-        print(f"[ERROR] Error get_krs_data: {e}")
-        return None
+    def search_courses(self, livewire_url, headers, csrf_token, snapshot):
+        """Mencari semua target matkul, berbagi hasil pencarian dengan task lain.
 
-def monitor():
-    """
-    Loop utama monitoring.
-    1. Login ke sistem.
-    2. Cek tipe monitoring (Nilai / KRS).
-    3. Jalankan loop sesuai tipe.
-    """
-    global SELECTED_SEMESTER_URL
-    
-    run_once = "--run-once" in sys.argv
-    MONITOR_TEXT = "KRS" if MONITOR_TYPE == 'krs' else "NILAI"
-    print(f"[INFO] Monitoring Akademik Siakang ({MONITOR_TEXT}) Dimulai... {'(Mode Sekali Jalan)' if run_once else ''}")
-    
-    if not do_login():
-        print("[ERROR] Login awal gagal. Hentikan script.")
-        return
-
-    SELECTED_SEMESTER_TITLE = ""
-    semesters = get_all_semesters()
-    
-    if semesters:
-        selected = None
-        if TARGET_SEMESTER_CODE:
-            print(f"[INFO] Mencari semester dengan kode konfigurasi: {TARGET_SEMESTER_CODE}")
-            for sem in semesters:
-                if sem['code'] == TARGET_SEMESTER_CODE:
-                    selected = sem
+        Hasil per matkul disimpan di shared.db selama KRS_SEARCH_CACHE_TTL detik. Untuk
+        matkul yang sama hanya satu task yang mencari ke server; task lain memakai
+        hasilnya atau menunggu pencarian yang sedang berjalan, sehingga jumlah request
+        sebanding dengan jumlah matkul berbeda, bukan jumlah task.
+
+        Returns:
+            tuple: (list matkul yang ditemukan, True jika token/sesi kedaluwarsa)
+        """
+        courses = [c for c in self.target_courses if c]
+        args = (livewire_url, headers, csrf_token, snapshot)
+        if self.krs_search_cache_ttl <= 0:
+            return self._probe_courses(*args, courses)[:2]
+
+        keys = {course: self.krs_search_key(course) for course in courses}
+        decisions = shared_state.claim_krs_searches(set(keys.values()), self.krs_search_cache_ttl, KRS_SEARCH_LEASE)
+
+        found_courses = []
+        to_probe, waiting = [], []
+        hits = 0
+        for course in courses:
+            decision, found = decisions[keys[course]]
+            if decision == "hit":
+                hits += 1
+                if found:
+                    print(f"[SUCCESS] DITEMUKAN: {course} (hasil bersama)")
+                    found_courses.append(course)
+            elif decision == "wait":
+                waiting.append(course)
+            else:
+                to_probe.append(course)
+
+        if hits:
+            self.stats['krs_shared_hits'] = self.stats.get('krs_shared_hits', 0) + hits
+
+        expired = False
+        while to_probe or waiting:
+            if to_probe:
+                found, expired, checked = self._probe_courses(*args, to_probe)
+                found_courses += found
+                shared_state.store_krs_searches({keys[c]: c in found for c in checked})
+                shared_state.release_krs_searches([keys[c] for c in to_probe if c not in checked])
+                to_probe = []
+                if expired:
                     break
-            if not selected:
-                print(f"[ERROR] Semester dengan kode '{TARGET_SEMESTER_CODE}' tidak ditemukan. Menggunakan default.")
-        
-        
-        if selected:
-            SELECTED_SEMESTER_URL = selected['url']
-            SELECTED_SEMESTER_TITLE = selected['title']
-            print(f"[SUCCESS] Memilih Semester: {selected['title']}")
-            print("[INFO] Mengaktifkan semester...")
-            session.get(SELECTED_SEMESTER_URL)
-            time.sleep(1)
-        else:
-            print("[INFO] Menggunakan semester aktif saat ini (tidak ada perubahan).")
 
-    if MONITOR_TYPE == 'krs':
-        print(f"[INFO] Target Matkul ({len(TARGET_COURSES)}): {', '.join(TARGET_COURSES)}")
-        if not TARGET_COURSES:
-            print("[WARNING] Tidak ada matkul yang ditargetkan! Pastikan konfigurasi 'Target Courses' diisi.")
+            if waiting:
+                # Tunggu task lain yang sedang mencari; yang tidak selesai dalam masa sewa dicari sendiri
+                pending_keys = [keys[c] for c in waiting]
+                deadline = time.monotonic() + KRS_SEARCH_LEASE
+                results = shared_state.load_krs_searches(pending_keys, self.krs_search_cache_ttl)
+                while len(results) < len(pending_keys) and time.monotonic() < deadline:
+                    time.sleep(0.5)
+                    results = shared_state.load_krs_searches(pending_keys, self.krs_search_cache_ttl)
+
+                for course in waiting:
+                    if keys[course] not in results:
+                        to_probe.append(course)
+                    elif results[keys[course]]:
+                        print(f"[SUCCESS] DITEMUKAN: {course} (hasil bersama)")
+                        found_courses.append(course)
+                self.stats['krs_shared_hits'] = self.stats.get('krs_shared_hits', 0) + len(results)
+                waiting = []
+
+        return found_courses, expired
+
+    def pause(self, seconds):
+        """Jeda di tahap start. Mengembalikan False jika task dihentikan atau START_MAX_WAIT terlewati."""
+        remaining = self.start_deadline - time.monotonic()
+        if remaining <= 0 or self.stop_event.wait(min(seconds, remaining)):
+            return False
+        return time.monotonic() < self.start_deadline
+
+    def abort_start(self):
+        """Log alasan start() dibatalkan (task dihentikan atau batas tunggu habis). Selalu False."""
+        if self.stop_event.is_set():
+            print("[INFO] Task dihentikan sebelum monitoring dimulai.")
+        else:
+            print(f"[ERROR] Persiapan task melebihi {self.start_max_wait:.0f}s (START_MAX_WAIT). Hentikan script.")
+        return False
+
+    def wait_for_circuit(self):
+        """
+        Menunggu sampai circuit breaker Siakang mengizinkan request (tidak menunggu di mode sekali jalan).
+        Mengembalikan False jika task dihentikan atau batas tunggu terlewati.
+        """
+        if self.run_once or self.circuit.breaker.would_allow():
+            return True
+        print(f"[WARNING] Circuit {self.circuit.breaker.name} OPEN, menunggu server pulih...")
+        while not self.circuit.breaker.would_allow():
+            if not self.pause(self.circuit.breaker.open_seconds):
+                return False
+        return True
+
+    def start(self):
+        """
+        Tahap persiapan sebelum loop monitoring.
+        1. Login ke sistem.
+        2. Pilih dan aktifkan semester target.
+        3. Kirim notifikasi bot aktif.
+        Mengembalikan False jika login awal gagal, task dihentikan, atau START_MAX_WAIT terlewati.
+        """
+        self.start_deadline = time.monotonic() + self.start_max_wait
+        monitor_text = "KRS" if self.monitor_type == 'krs' else "NILAI"
+        print(f"[INFO] Monitoring Akademik Siakang ({monitor_text}) Dimulai... {'(Mode Sekali Jalan)' if self.run_once else ''}")
+
+        # Selama portal down (circuit open) login dan fetch semester ditunda, bukan dianggap gagal.
+        # Hanya satu worker yang mendapat probe; worker lain yang ditolak menunggu lalu mencoba lagi.
+        while True:
+            if not self.wait_for_circuit():
+                return self.abort_start()
+            self.circuit.rejected = 0
+            logged_in = self.restore_session() or self.do_login()
+            if logged_in or not self.circuit.rejected or self.run_once:
+                break
+            print("[WARNING] Login ditahan circuit breaker, mencoba lagi setelah server pulih...")
 
-        if not run_once:
-            send_notification(f"🤖 Bot Monitoring KRS Aktif!\nMemantau: {', '.join(TARGET_COURSES)}")
+        if not logged_in:
+            print("[ERROR] Login awal gagal. Hentikan script.")
+            return False
 
         while True:
-            try:
-                data = get_krs_data() 
-                next_check = time.strftime('%H:%M:%S', time.localtime(time.time() + INTERVAL))
-                
-                if data:
-                    current_found = set(data['found'])
-                    
-                    old_found = set()
-                    if os.path.exists(FILE_DATA):
-                        try:
-                            with open(FILE_DATA, "r") as f:
-                                old_data = json.load(f)
-                                if isinstance(old_data, dict):
-                                    old_found = set(old_data.get('found', []))
-                        except Exception:
-                            pass
-                    
-                    newly_found = current_found - old_found
-                    
-                    if newly_found:
-                        msg = "🔔 *MATKUL DITEMUKAN DI KRS!*\n"
-                        for course in newly_found:
-                            msg += f"✅ {course}\n"
-                        
-                        if len(current_found) >= len(TARGET_COURSES) and len(TARGET_COURSES) > 0:
-                             msg += "\n🎉 *SEMUA MATKUL INCARAN LENGKAP!* 💯\nSegera 'Ambil' sekarang sebelum habis!\n"
-
-                        msg += f"\nCek segera di: [KRS Online]({URL_KRS})"
-                        send_notification(msg)
-                        print(f"[SUCCESS] Ditemukan {len(newly_found)} matkul baru yang sebelumnya tidak ada.")
-                    
-                    lost_found = old_found - current_found
-                    if lost_found:
-                        print(f"[INFO] Matkul hilang dari pencarian: {', '.join(lost_found)}")
-
-                    print(f"[STATUS] Status: {len(current_found)}/{len(TARGET_COURSES)} matkul ditemukan. (Next: {next_check})")
-                    
-                    with open(FILE_DATA, "w") as f:
-                        json.dump({"found": list(current_found)}, f)
-                else:
-                    print(f"[WARNING] Gagal mendapatkan data KRS. (Next: {next_check})")
-                
-            except Exception as e:
-                print(f"[ERROR] Error loop KRS: {e}")
-                import traceback
-                traceback.print_exc()
-            
-            if run_once: break
-            time.sleep(INTERVAL)
-        return
-
-    if not semesters:
-        print("[WARNING] Tidak dapat menemukan daftar semester. Menggunakan default sistem.")
-    
-    if not run_once:
-        send_notification("🤖 Bot Monitoring Akademik Siakang Aktif!") 
-
-    while True:
+            if not self.wait_for_circuit():
+                return self.abort_start()
+            self.circuit.rejected = 0
+            self.semesters = self.load_semesters()
+            if self.semesters and not self.circuit.rejected:
+                break
+            if not self.target_semester_code and not self.circuit.rejected:
+                break
+            # Daftar kosong/terpotong tidak boleh membuat task diam-diam memantau semester default
+            if self.run_once:
+                print(f"[ERROR] Daftar semester gagal diambil, semester '{self.target_semester_code}' tidak bisa dipilih.")
+                return False
+            print(f"[WARNING] Daftar semester gagal diambil, mencoba lagi dalam {self.scheduler.min_interval:.0f}s...")
+            if not self.pause(self.scheduler.min_interval):
+                return self.abort_start()
+
+        if self.semesters:
+            selected = None
+            if self.target_semester_code:
+                print(f"[INFO] Mencari semester dengan kode konfigurasi: {self.target_semester_code}")
+                for sem in self.semesters:
+                    if sem['code'] == self.target_semester_code:
+                        selected = sem
+                        break
+                if not selected:
+                    print(f"[ERROR] Semester dengan kode '{self.target_semester_code}' tidak ditemukan. Menggunakan default.")
+
+
+            if selected:
+                self.selected_semester_url = selected['url']
+                self.selected_semester_title = selected['title']
+                print(f"[SUCCESS] Memilih Semester: {selected['title']}")
+                print("[INFO] Mengaktifkan semester...")
+                self.session.get(self.selected_semester_url)
+                self.persist_session()
+                time.sleep(1)
+            else:
+                print("[INFO] Menggunakan semester aktif saat ini (tidak ada perubahan).")
+
+        # Task yang dihentikan selama login/aktivasi semester tidak boleh mengirim "Bot Aktif"
+        if self.stop_event.is_set():
+            return self.abort_start()
+
+        if self.monitor_type == 'krs':
+            print(f"[INFO] Target Matkul ({len(self.target_courses)}): {', '.join(self.target_courses)}")
+            if not self.target_courses:
+                print("[WARNING] Tidak ada matkul yang ditargetkan! Pastikan konfigurasi 'Target Courses' diisi.")
+
+            if not self.run_once:
+                self.send_notification(f"🤖 Bot Monitoring KRS Aktif!\nMemantau: {', '.join(self.target_courses)}")
+            return True
+
+        if not self.semesters:
+            print("[WARNING] Tidak dapat menemukan daftar semester. Menggunakan default sistem.")
+
+        if not self.run_once:
+            self.send_notification("🤖 Bot Monitoring Akademik Siakang Aktif!")
+        return True
+
+    def run_cycle(self):
+        """Menjalankan satu siklus pengecekan sesuai tipe monitoring."""
+        self.stats['cycles'] += 1
+        if not self.circuit.breaker.would_allow():
+            # Portal sedang down menurut circuit breaker bersama: jangan scraping maupun login ulang
+            self.stats['circuit_skipped'] = self.stats.get('circuit_skipped', 0) + 1
+            self.next_delay = self.scheduler.next_delay()
+            self.stats['next_delay'] = round(self.next_delay, 1)
+            print(f"[WARNING] Circuit {self.circuit.breaker.name} OPEN, siklus dilewati. (Berikutnya dalam {self.next_delay:.0f}s)")
+            self.write_stats()
+            return
+
+        self.server_errors = 0
+        self.circuit.rejected = 0
+        self.cycle_failures = self.scheduler.failures
+        self.cycle_outcome = None
+        started = time.monotonic()
+        if self.monitor_type == 'krs':
+            ok = self.run_krs_cycle()
+        else:
+            ok = self.run_nilai_cycle()
+        self.persist_session()
+
+        # Siklus yang gagal setelah jadwal dicatat (mis. error saat memproses data) dijadwalkan ulang
+        if self.cycle_outcome != ok:
+            self.schedule_next(ok)
+        self.stats['consecutive_failures'] = self.scheduler.failures
+        self.stats['resolver'] = resolver.stats()
+        self.stats['next_delay'] = round(self.next_delay, 1)
+        if self.scheduler.failures:
+            print(f"[WARNING] Siklus gagal {self.scheduler.failures}x berturut-turut, cek berikutnya dalam {self.next_delay:.0f}s.")
+
+        self.cycle_times.append(time.monotonic() - started)
+        self.stats['cycle_time_p50'] = round(percentile(self.cycle_times, 50), 3)
+        self.stats['cycle_time_p95'] = round(percentile(self.cycle_times, 95), 3)
+        print(f"[INFO] Durasi siklus: {self.cycle_times[-1]:.2f}s (p50: {self.stats['cycle_time_p50']:.2f}s | p95: {self.stats['cycle_time_p95']:.2f}s)")
+        self.write_stats()
+
+    def schedule_next(self, ok):
+        """
+        Mencatat hasil siklus ke scheduler dan menghitung self.next_delay.
+        Mengembalikan jam siklus berikutnya (HH:MM:SS) untuk log, dari jeda yang sama dengan sleep loop.
+        """
+        # Dihitung dari jumlah kegagalan sebelum siklus ini, sehingga aman dipanggil ulang
+        self.scheduler.failures = self.cycle_failures
+        # Siklus yang terpotong circuit breaker tidak dihitung sebagai kegagalan tambahan
+        if not self.circuit.rejected:
+            self.scheduler.record(ok and not self.server_errors)
+        self.next_delay = self.scheduler.next_delay()
+        self.cycle_outcome = ok
+        return time.strftime('%H:%M:%S', time.localtime(time.time() + self.next_delay))
+
+    def write_stats(self):
+        """Menyimpan counter siklus ke STATS_FILE agar bisa dibaca API."""
+        if not self.stats_file:
+            return
+        try:
+            stats = {**self.stats, "updated_at": time.strftime('%Y-%m-%d %H:%M:%S')}
+            write_file_atomic(self.stats_file, json.dumps(stats, separators=(',', ':')), fsync=False)
+        except Exception as e:
+            print(f"[WARNING] Gagal menyimpan statistik: {e}")
+
+    def load_snapshot(self):
+        """Membaca FILE_DATA, memakai hasil parse sebelumnya selama file tidak berubah. None jika tidak ada/rusak."""
+        try:
+            st = os.stat(self.file_data)
+        except OSError:
+            return None
+
+        if self.snapshot_cache and self.snapshot_cache[:2] == (st.st_mtime_ns, st.st_size):
+            return self.snapshot_cache[2]
+        try:
+            with open(self.file_data, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        self.snapshot_cache = (st.st_mtime_ns, st.st_size, data)
+        return data
+
+    def save_snapshot(self, data):
+        """Menyimpan snapshot secara atomik dan ringkas; dilewati jika isinya sama dengan file saat ini."""
+        if data == self.load_snapshot():
+            return False
+        write_file_atomic(self.file_data, json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+        st = os.stat(self.file_data)
+        self.snapshot_cache = (st.st_mtime_ns, st.st_size, data)
+        return True
+
+    def run_krs_cycle(self):
+        """Satu siklus monitoring KRS. Mengembalikan False jika data gagal diambil."""
+        try:
+            data = self.get_krs_data()
+            next_check = self.schedule_next(bool(data))
+
+            if data:
+                current_found = set(data['found'])
+
+                old_found = set()
+                old_data = self.load_snapshot()
+                if isinstance(old_data, dict):
+                    old_found = set(old_data.get('found', []))
+
+                newly_found = current_found - old_found
+
+                if newly_found:
+                    msg = "🔔 *MATKUL DITEMUKAN DI KRS!*\n"
+                    for course in newly_found:
+                        msg += f"✅ {course}\n"
+
+                    if len(current_found) >= len(self.target_courses) and len(self.target_courses) > 0:
+                         msg += "\n🎉 *SEMUA MATKUL INCARAN LENGKAP!* 💯\nSegera 'Ambil' sekarang sebelum habis!\n"
+
+                    msg += f"\nCek segera di: [KRS Online]({URL_KRS})"
+                    self.send_notification(msg)
+                    print(f"[SUCCESS] Ditemukan {len(newly_found)} matkul baru yang sebelumnya tidak ada.")
+
+                lost_found = old_found - current_found
+                if lost_found:
+                    print(f"[INFO] Matkul hilang dari pencarian: {', '.join(lost_found)}")
+
+                self.record_history("krs", history_store.krs_events(newly_found, lost_found))
+
+                print(f"[STATUS] Status: {len(current_found)}/{len(self.target_courses)} matkul ditemukan. (Next: {next_check})")
+
+                self.save_snapshot({"found": sorted(current_found)})
+                return True
+
+            print(f"[WARNING] Gagal mendapatkan data KRS. (Next: {next_check})")
+            return False
+
+        except Exception as e:
+            print(f"[ERROR] Error loop KRS: {e}")
+            import traceback
+            traceback.print_exc(file=log_stream.get())
+            return False
+
+    def run_nilai_cycle(self):
+        """Satu siklus monitoring nilai. Mengembalikan False jika data gagal diambil."""
         old_data = None
+        changed_courses, gpa_changes = [], []
         try:
-            current_data = get_data()
-            next_check = time.strftime('%H:%M:%S', time.localtime(time.time() + INTERVAL))
-            
+            current_data, page_state = self.get_data()
+            next_check = self.schedule_next(bool(current_data))
+
+            if current_data is PAGE_UNCHANGED:
+                self.stats['short_circuited'] += 1
+                print(f"[STATUS] Tidak ada perubahan (halaman identik, {self.stats['short_circuited']}/{self.stats['cycles']} siklus dilewati). (Berikutnya: {next_check})")
+                return True
+
             if not current_data:
                 print(f"[WARNING] Data kosong atau gagal diambil. Akan dicoba lagi pada: {next_check}")
-            elif os.path.exists(FILE_DATA):
-                try:
-                    with open(FILE_DATA, "r") as f:
-                        old_data = json.load(f)
-                except Exception:
-                    old_data = None
-                
+            elif os.path.exists(self.file_data):
+                old_data = self.load_snapshot()
+
                 old_courses = []
                 if isinstance(old_data, list):
                     old_courses = old_data
@@ -692,65 +1174,118 @@ def monitor():
 
                 current_courses = current_data.get('nilai', [])
 
-                changes = []
-                for cur, old in zip(current_courses, old_courses):
-                    if old['nilai'] != cur['nilai']:
-                        semester_info = f"🎓 *{SELECTED_SEMESTER_TITLE}*\n\n" if SELECTED_SEMESTER_TITLE else ""
-                        msg = (f"🔔 *NILAI KELUAR!*\n"
-                                f"{semester_info}"
-                                f"📚 *Matkul:* {cur['matkul']}\n"
-                                f"📊 *Nilai:* `{cur['nilai']}`\n"
-                                f"✨ *Mutu:* `{cur['mutu']}`\n\n"
-                                f"Cek di: [Siakang Untirta]({URL_TARGET})")
-                        changes.append(msg)
-                
+                # Snapshot lama kosong/rusak dianggap baseline baru agar tidak semua matkul dianggap "baru keluar"
+                released = []
+                diff = grade_diff.diff_courses(old_courses, current_courses)
+                if old_courses:
+                    released = grade_diff.released_grades(diff)
+                    if diff['added'] or diff['removed']:
+                        print(f"[INFO] Daftar matkul berubah: +{len(diff['added'])} / -{len(diff['removed'])}")
+                self.record_history("nilai", history_store.nilai_events(diff, old_data, current_data))
+
+                changed_courses.extend(released)
                 if isinstance(old_data, dict):
                     if old_data.get('ips') != current_data.get('ips') and current_data.get('ips') != "-":
-                         changes.append(f"📈 *IPS Berubah*: {old_data.get('ips')} -> {current_data.get('ips')}")
+                         gpa_changes.append(f"📈 *IPS Berubah*: {old_data.get('ips')} -> {current_data.get('ips')}")
                     if old_data.get('ipk') != current_data.get('ipk') and current_data.get('ipk') != "-":
-                         changes.append(f"📈 *IPK Berubah*: {old_data.get('ipk')} -> {current_data.get('ipk')}")
-
-                if changes:
-                    for change in changes:
-                        send_notification(change)
-                    print(f"[SUCCESS] Terdeteksi {len(changes)} perubahan nilai! (Cek lagi: {next_check})")
+                         gpa_changes.append(f"📈 *IPK Berubah*: {old_data.get('ipk')} -> {current_data.get('ipk')}")
+
+                total_changes = len(changed_courses) + len(gpa_changes)
+                if total_changes:
+                    # Mode digest mengirim satu pesan gabungan di bawah; pesan per matkul hanya untuk mode biasa
+                    if not self.digest:
+                        semester_info = f"🎓 *{self.selected_semester_title}*\n\n" if self.selected_semester_title else ""
+                        for cur in changed_courses:
+                            self.send_notification(f"🔔 *NILAI KELUAR!*\n"
+                                                   f"{semester_info}"
+                                                   f"📚 *Matkul:* {cur['matkul']}\n"
+                                                   f"📊 *Nilai:* `{cur['nilai']}`\n"
+                                                   f"✨ *Mutu:* `{cur['mutu']}`\n\n"
+                                                   f"Cek di: [Siakang Untirta]({URL_TARGET})")
+                        for change in gpa_changes:
+                            self.send_notification(change)
+                    print(f"[SUCCESS] Terdeteksi {total_changes} perubahan nilai! (Cek lagi: {next_check})")
                 else:
                     print(f"[STATUS] Tidak ada perubahan. (Terakhir: {time.strftime('%H:%M:%S')} | Berikutnya: {next_check})")
-            
+
             if current_data:
                 current_courses = current_data.get('nilai', [])
                 is_complete = all(d['nilai'] != "---" for d in current_courses)
-                
+
                 was_complete = False
                 if old_data:
                     old_c = old_data if isinstance(old_data, list) else old_data.get('nilai', [])
                     was_complete = all(d['nilai'] != "---" for d in old_c)
-            
+
+                msg_complete = None
                 if is_complete and not was_complete and len(current_courses) > 0:
-                    semester_info = f"🎓 *{SELECTED_SEMESTER_TITLE}*\n\n" if SELECTED_SEMESTER_TITLE else ""
+                    semester_info = f"🎓 *{self.selected_semester_title}*\n\n" if self.selected_semester_title else ""
                     msg_complete = (f"🎉 *SEMUA NILAI SUDAH KELUAR!*\n"
                                     f"{semester_info}"
                                     f"👤 *{current_data.get('nama')}*\n"
                                     f"📈 *IPS:* {current_data.get('ips')} | *IPK:* {current_data.get('ipk')}\n"
                                     f"Silakan cek portal Siakang untuk detail lengkap.\n"
                                     f"[Login Siakang]({URL_TARGET})")
-                    send_notification(msg_complete)
-                    print("[SUCCESS] Notifikasi semua nilai keluar telah dikirim!")
+                    if not self.digest:
+                        self.send_notification(msg_complete)
+                        print("[SUCCESS] Notifikasi semua nilai keluar telah dikirim!")
+
+                if self.digest and (changed_courses or gpa_changes or msg_complete):
+                    self.send_notification(self.build_nilai_digest(current_data.get('nama'), changed_courses, gpa_changes, msg_complete), digest=True)
+                    print("[SUCCESS] Digest perubahan nilai dikirim dalam satu pesan!")
 
             if current_data:
-                with open(FILE_DATA, "w") as f:
-                    json.dump(current_data, f, indent=4)
-                
+                if not os.path.exists(self.file_data):
+                    # Snapshot pertama menjadi baseline history
+                    baseline = grade_diff.diff_courses([], current_data.get('nilai', []))
+                    self.record_history("nilai", history_store.nilai_events(baseline, None, current_data))
+
+                self.save_snapshot(current_data)
+                # Fingerprint/validator baru dipakai setelah snapshot yang sesuai tersimpan,
+                # agar siklus berikutnya tidak melewati halaman yang belum pernah diproses
+                if page_state:
+                    self.page_fingerprint, self.page_validators = page_state
+            return bool(current_data)
+
         except Exception as e:
             print(f"[ERROR] Error di loop monitor: {e}")
             import traceback
-            traceback.print_exc()
-        
-        if run_once:
-            print("[SUCCESS] Selesai (Mode Sekali Jalan).")
-            break
-            
-        time.sleep(INTERVAL)
+            traceback.print_exc(file=log_stream.get())
+            return False
+
+    def monitor(self):
+        """
+        Loop utama monitoring.
+        1. Login ke sistem.
+        2. Cek tipe monitoring (Nilai / KRS).
+        3. Jalankan loop sesuai tipe.
+        """
+        if self.start_delay:
+            time.sleep(self.start_delay)
+
+        if not self.start():
+            return
+
+        while True:
+            self.run_cycle()
+
+            if self.run_once:
+                if self.monitor_type != 'krs':
+                    print("[SUCCESS] Selesai (Mode Sekali Jalan).")
+                break
+
+            time.sleep(self.next_delay)
+
+def monitor():
+    """Entry point mode subprocess: konfigurasi diambil dari environment proses."""
+    run_once = "--run-once" in sys.argv
+    # Di bawah server outbox dikirim oleh dispatcher server; standalone butuh dispatcher sendiri
+    dispatcher = notifier.start_dispatcher() if os.getenv("NOTIFY_DISPATCHER") != "server" else None
+
+    MonitorWorker(os.environ, run_once=run_once).monitor()
+
+    if dispatcher and run_once:
+        dispatcher.drain()
 
 if __name__ == "__main__":
-    monitor()
\ No newline at end of file
+    monitor()
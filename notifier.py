@@ -0,0 +1,257 @@
+"""Notification Outbox dan Dispatcher untuk Monitoring Akademik Siakang.
+
+Worker tidak lagi memanggil API Telegram/WAHA secara langsung. Pesan ditulis ke
+outbox di shared.db (lihat shared_state) lalu dikirim oleh NotificationDispatcher
+yang berjalan di thread terpisah, sehingga loop monitoring tidak pernah menunggu
+API pesan dan pesan yang belum terkirim tetap ada setelah crash/restart.
+
+Fitur:
+- Retry dengan exponential backoff + jitter, menghormati retry_after dari HTTP 429
+- Error permanen (4xx selain 429) ditandai failed tanpa retry
+- Pengiriman paralel antar chat, berurutan di dalam satu chat
+- Rate limit global per channel dan per chat (TokenBucket di shared.db) untuk semua
+  dispatcher, sesuai batas Telegram (~30 pesan/detik per bot, 1 pesan/detik per chat)
+- Sewa (lease) per pesan sehingga beberapa dispatcher aman berjalan bersamaan
+- Koneksi keep-alive ke API pesan lewat http_client.shared_session (tanpa TLS handshake per pesan)
+- Digest: pesan bertanda digest untuk chat yang sama (mis. dari beberapa task yang
+  mengirim ke satu grup) digabung menjadi satu pesan saat dikirim
+
+Dispatcher dijalankan oleh server/main.py. Worker yang dijalankan standalone
+(tanpa server) menjalankan dispatcher-nya sendiri.
+"""
+
+import concurrent.futures
+import json
+import os
+import random
+import threading
+import time
+import http_client
+import shared_state
+
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", 4))
+NOTIFY_POLL_INTERVAL = float(os.getenv("NOTIFY_POLL_INTERVAL", 1))
+NOTIFY_LEASE = float(os.getenv("NOTIFY_LEASE", 90))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 8))
+NOTIFY_BACKOFF_BASE = float(os.getenv("NOTIFY_BACKOFF_BASE", 5))
+NOTIFY_BACKOFF_MAX = float(os.getenv("NOTIFY_BACKOFF_MAX", 600))
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", 30))
+NOTIFY_DIGEST_MAX_CHARS = int(os.getenv("NOTIFY_DIGEST_MAX_CHARS", 4000))
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+# (pesan per detik untuk seluruh channel, pesan per detik per chat)
+CHANNEL_RATES = {
+    "telegram": (float(os.getenv("TELEGRAM_RATE", 30)), float(os.getenv("TELEGRAM_CHAT_RATE", 1))),
+    "waha": (float(os.getenv("WAHA_RATE", 10)), float(os.getenv("WAHA_CHAT_RATE", 1))),
+}
+
+# Dibangunkan saat ada pesan baru di proses yang sama agar tidak menunggu poll berikutnya
+_wakeup = threading.Event()
+
+def enqueue(channel, target, payload, delay=0):
+    """Menulis pesan ke outbox. channel: 'telegram' atau 'waha'.
+
+    Payload dengan "digest": True boleh digabung dengan pesan digest lain ke chat yang sama;
+    delay memberi waktu pesan dari task lain untuk ikut digabung.
+    """
+    notification_id = shared_state.enqueue_notification(channel, str(target), json.dumps(payload), delay)
+    if not delay:
+        _wakeup.set()
+    return notification_id
+
+def _merge_digest(row, lease):
+    """Menggabungkan pesan digest berikutnya ke chat yang sama. Mengembalikan (rows, payload)."""
+    payload = json.loads(row['payload'])
+    if not payload.get("digest"):
+        return [row], payload
+
+    length = len(payload["text"])
+
+    def accept(other):
+        nonlocal length
+        other_payload = json.loads(other['payload'])
+        if not other_payload.get("digest"):
+            return False
+        length += len(DIGEST_SEPARATOR) + len(other_payload["text"])
+        return length <= NOTIFY_DIGEST_MAX_CHARS
+
+    followers = shared_state.claim_following_notifications(row['channel'], row['target'], row['id'], lease, accept)
+    if not followers:
+        return [row], payload
+
+    texts = [payload["text"]] + [json.loads(other['payload'])["text"] for other in followers]
+    return [row] + [dict(other) for other in followers], dict(payload, text=DIGEST_SEPARATOR.join(texts))
+
+def _retry_after(response):
+    try:
+        return float(response.json().get("parameters", {}).get("retry_after"))
+    except Exception:
+        pass
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def _classify(response, ok_codes):
+    """Mengembalikan (hasil, retry_after, error) dari response API pesan."""
+    if response.status_code in ok_codes:
+        return "sent", None, None
+    error = f"HTTP {response.status_code}: {response.text[:300]}"
+    if response.status_code == 429:
+        return "retry", _retry_after(response), error
+    if 400 <= response.status_code < 500:
+        return "failed", None, error
+    return "retry", None, error
+
+def deliver_telegram(target, payload):
+    token = os.getenv("TELEGRAM_TOKEN")
+    if not token:
+        return "failed", None, "TELEGRAM_TOKEN tidak diset"
+
+    url = f"{TELEGRAM_API_URL}/bot{token}/sendMessage"
+    body = {"chat_id": target, "text": payload["text"], "parse_mode": payload.get("parse_mode", "Markdown")}
+    return _classify(http_client.shared_session().post(url, json=body, timeout=NOTIFY_TIMEOUT), (200,))
+
+def deliver_waha(target, payload):
+    base_url = os.getenv("WAHA_BASE_URL")
+    if not base_url:
+        return "failed", None, "WAHA_BASE_URL tidak diset"
+
+    headers = {}
+    api_key = os.getenv("WAHA_API_KEY")
+    if api_key:
+        headers["X-Api-Key"] = api_key
+
+    body = {"chatId": target, "text": payload["text"], "session": payload.get("session", "default")}
+    return _classify(http_client.shared_session().post(f"{base_url}/api/sendText", json=body, headers=headers, timeout=NOTIFY_TIMEOUT), (200, 201))
+
+DELIVERERS = {
+    "telegram": deliver_telegram,
+    "waha": deliver_waha,
+}
+
+def channel_buckets(channel, target):
+    """Token bucket (per chat, global channel) yang harus dilewati sebelum mengirim."""
+    rate, chat_rate = CHANNEL_RATES.get(channel, (0, 0))
+    # Kapasitas 1: pesan diratakan, bukan burst, karena batas API dihitung per jendela 1 detik
+    return (
+        shared_state.TokenBucket(f"notify:{channel}:{target}", chat_rate, 1),
+        shared_state.TokenBucket(f"notify:{channel}", rate, 1)
+    )
+
+def backoff_delay(attempts, retry_after=None):
+    """Jeda sebelum percobaan berikutnya: retry_after dari server, atau exponential backoff + jitter."""
+    if retry_after:
+        return retry_after
+    delay = min(NOTIFY_BACKOFF_MAX, NOTIFY_BACKOFF_BASE * (2 ** attempts))
+    return delay * random.uniform(0.5, 1.0)
+
+class NotificationDispatcher:
+    """Mengambil pesan dari outbox dan mengirimnya di thread pool sendiri."""
+
+    def __init__(self, concurrency=NOTIFY_CONCURRENCY, poll_interval=NOTIFY_POLL_INTERVAL, lease=NOTIFY_LEASE):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.concurrency, thread_name_prefix="notify")
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="notify-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        _wakeup.set()
+
+    def drain(self, timeout=60):
+        """Menunggu outbox kosong (dipakai worker standalone sebelum keluar)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if shared_state.count_pending_notifications() == 0:
+                return True
+            _wakeup.set()
+            time.sleep(0.5)
+        return False
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            _wakeup.clear()
+            try:
+                self._dispatch_due()
+            except Exception as e:
+                print(f"[WARNING] Notification dispatcher error: {e}")
+            _wakeup.wait(self.poll_interval)
+
+    def _dispatch_due(self):
+        free = 0
+        while self._slots.acquire(blocking=False):
+            free += 1
+
+        rows = shared_state.claim_notifications(free, self.lease) if free else []
+        for _ in range(free - len(rows)):
+            self._slots.release()
+
+        for row in rows:
+            self._executor.submit(self._deliver, dict(row))
+
+    def _deliver(self, row):
+        try:
+            deliverer = DELIVERERS.get(row['channel'])
+            if deliverer is None:
+                shared_state.fail_notification(row['id'], f"Channel tidak dikenal: {row['channel']}")
+                return
+
+            chat_bucket, channel_bucket = channel_buckets(row['channel'], row['target'])
+            # Jeda global hanya sepersekian detik sehingga cukup ditunggu. Jeda per chat bisa sampai
+            # beberapa detik: pesan ditunda agar slot dipakai chat lain. Token chat diambil terakhir
+            # supaya jarak antar pesan ke satu chat tidak dipersempit oleh antrian global; token
+            # global dikembalikan jika pesan ditunda agar throughput chat lain tidak ikut turun.
+            channel_bucket.acquire()
+            wait = chat_bucket.try_acquire()
+            if wait > 0:
+                channel_bucket.refund()
+                shared_state.defer_notification(row['id'], time.time() + wait)
+                return
+
+            rows, payload = _merge_digest(row, self.lease)
+            try:
+                result, retry_after, error = deliverer(row['target'], payload)
+            except Exception as e:
+                result, retry_after, error = "retry", None, str(e)
+
+            if result == "sent":
+                for item in rows:
+                    shared_state.complete_notification(item['id'])
+            elif result == "failed" or row['attempts'] + 1 >= NOTIFY_MAX_ATTEMPTS:
+                print(f"[WARNING] Notifikasi {row['channel']} #{row['id']} gagal permanen: {error}")
+                for item in rows:
+                    shared_state.fail_notification(item['id'], error)
+            else:
+                if retry_after:
+                    # 429 Telegram bisa berlaku per chat maupun untuk seluruh bot
+                    chat_bucket.pause(retry_after)
+                    channel_bucket.pause(retry_after)
+                delay = backoff_delay(row['attempts'], retry_after)
+                print(f"[WARNING] Gagal kirim {row['channel']} #{row['id']} (Percobaan {row['attempts'] + 1}/{NOTIFY_MAX_ATTEMPTS}), retry {delay:.0f}s: {error}")
+                for item in rows:
+                    shared_state.retry_notification(item['id'], time.time() + delay, error)
+        finally:
+            self._slots.release()
+            _wakeup.set()
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def start_dispatcher():
+    """Menjalankan dispatcher global proses ini (sekali saja)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher().start()
+        return _dispatcher
@@ -0,0 +1,367 @@
+"""Parser Library untuk halaman Hasil Studi Siakang.
+
+Library ini mengekstrak data nilai dari HTML halaman `hasil-studi` dengan backend
+yang bisa dipilih melalui env PARSER_BACKEND:
+- auto (default): lxml jika terpasang, selain itu bs4
+- lxml: Parser C yang jauh lebih cepat dari html.parser (opsional)
+- stream: Extractor berbasis html.parser stdlib yang hanya mengambil baris `<tbody>`,
+  paragraf IP/IPK, nama user dan link "Hitung IPS" tanpa membangun pohon DOM
+- bs4: BeautifulSoup + html.parser (fallback, perilaku lama)
+
+Semua backend mengembalikan dict dengan struktur yang sama (lihat parse_hasil_studi).
+fingerprint_hasil_studi menghasilkan hash region nilai untuk mendeteksi halaman yang
+tidak berubah tanpa perlu parsing.
+"""
+
+import hashlib
+import os
+import re
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "auto")
+
+# Bagian halaman yang berubah di setiap request walaupun data nilai sama.
+_VOLATILE_PATTERNS = [
+    re.compile(r'<script\b.*?</script>', re.S | re.I),
+    re.compile(r'<meta[^>]+csrf[^>]*>', re.I),
+    re.compile(r'<input[^>]+name=["\']_token["\'][^>]*>', re.I),
+    re.compile(r'wire:snapshot=(["\']).*?\1', re.S),
+]
+
+# Glyph ikon dropdown (Material Icons, private use area) yang ikut terbaca di elemen nama user
+_NAME_GLYPHS = "\ue5d7"
+
+def _join_stripped(strings):
+    """Meniru get_text(strip=True) milik bs4."""
+    return ''.join(s.strip() for s in strings if s.strip())
+
+def _parse_ip_text(text, result):
+    if "IP :" in text and "IPK" not in text:
+        result['ips'] = text.split(":")[-1].strip()
+    elif "IPK :" in text:
+        result['ipk'] = text.split(":")[-1].strip()
+
+def _build_course(matkul, sks, nilai_text, mutu_text, is_placeholder):
+    is_empty = not nilai_text
+    return {
+        "matkul": matkul,
+        "sks": sks,
+        "nilai": "---" if (is_placeholder or is_empty) else nilai_text,
+        "mutu": "---" if (is_placeholder or is_empty) else mutu_text
+    }
+
+def _parse_sks(badge_text):
+    if "SKS" in badge_text:
+        try:
+            return int(badge_text.replace("SKS", "").strip())
+        except ValueError:
+            pass
+    return None
+
+def _empty_result():
+    return {
+        "hitung_ips_url": None,
+        "has_table": False,
+        "nilai": [],
+        "total_sks": 0,
+        "ips": "-",
+        "ipk": "-",
+        "nama": "-"
+    }
+
+def _parse_bs4(text):
+    result = _empty_result()
+    soup = BeautifulSoup(text, 'html.parser')
+
+    for a_tag in soup.find_all('a'):
+        if "Hitung IPS" in a_tag.get_text():
+            result['hitung_ips_url'] = a_tag.get('href')
+            break
+
+    tbody = soup.find('tbody')
+    if tbody:
+        result['has_table'] = True
+        for row in tbody.find_all('tr'):
+            cols = row.find_all('td')
+            if len(cols) >= 6 and not row.get('class'):
+                matkul_cell = cols[2]
+
+                sks_val = 0
+                for badge in matkul_cell.find_all('span', class_='badge'):
+                    sks = _parse_sks(badge.get_text(strip=True))
+                    if sks is not None:
+                        sks_val = sks
+                    badge.decompose()
+
+                result['total_sks'] += sks_val
+                result['nilai'].append(_build_course(
+                    matkul_cell.get_text(strip=True),
+                    sks_val,
+                    cols[4].get_text(strip=True),
+                    cols[5].get_text(strip=True),
+                    "placeholder" in str(cols[4])
+                ))
+
+    for p in soup.find_all('p'):
+        _parse_ip_text(p.get_text(strip=True), result)
+
+    name_elem = soup.select_one('.pro-user-name') or soup.select_one('.user-box .dropdown-toggle')
+    if name_elem:
+        result['nama'] = name_elem.get_text(strip=True)
+
+    return result
+
+def _has_class(xpath_class):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {xpath_class} ")'
+
+def _parse_lxml(text):
+    result = _empty_result()
+    doc = lxml_html.fromstring(text)
+
+    for a_tag in doc.iter('a'):
+        if "Hitung IPS" in ''.join(a_tag.xpath('.//text()')):
+            result['hitung_ips_url'] = a_tag.get('href')
+            break
+
+    tbody = doc.find('.//tbody')
+    if tbody is not None:
+        result['has_table'] = True
+        for row in tbody.iter('tr'):
+            cols = list(row.iter('td'))
+            if len(cols) >= 6 and not row.get('class'):
+                matkul_cell = cols[2]
+
+                sks_val = 0
+                for badge in matkul_cell.xpath(f'.//span[{_has_class("badge")}]'):
+                    sks = _parse_sks(_join_stripped(badge.xpath('.//text()')))
+                    if sks is not None:
+                        sks_val = sks
+                    badge.drop_tree()
+
+                result['total_sks'] += sks_val
+                result['nilai'].append(_build_course(
+                    _join_stripped(matkul_cell.xpath('.//text()')),
+                    sks_val,
+                    _join_stripped(cols[4].xpath('.//text()')),
+                    _join_stripped(cols[5].xpath('.//text()')),
+                    "placeholder" in lxml_html.tostring(cols[4], encoding='unicode', with_tail=False)
+                ))
+
+    for p in doc.iter('p'):
+        _parse_ip_text(_join_stripped(p.xpath('.//text()')), result)
+
+    name_elems = (doc.xpath(f'//*[{_has_class("pro-user-name")}]')
+                  or doc.xpath(f'//*[{_has_class("user-box")}]//*[{_has_class("dropdown-toggle")}]'))
+    if name_elems:
+        result['nama'] = _join_stripped(name_elems[0].xpath('.//text()'))
+
+    return result
+
+class _HasilStudiExtractor(HTMLParser):
+    """Extractor streaming: hanya menyimpan teks dari region yang dibutuhkan.
+
+    Setiap region dilacak dengan menghitung kedalaman tag pembukanya, sehingga
+    tidak perlu menyimpan stack seluruh dokumen.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.result = _empty_result()
+        self.tbody_depth = 0
+        self.tbody_done = False
+        self.row = None
+        self.row_depth = 0
+        self.cell = None
+        self.cell_depth = 0
+        self.badge_depth = 0
+        self.badge_text = []
+        self.link = None
+        self.link_depth = 0
+        self.paragraph = None
+        self.name_tag = None
+        self.name_depth = 0
+        self.name_text = []
+        self.name_priority = 0
+        self.user_box_tag = None
+        self.user_box_depth = 0
+
+    def _classes(self, attrs):
+        for key, value in attrs:
+            if key == 'class' and value:
+                return value.split()
+        return []
+
+    def handle_starttag(self, tag, attrs):
+        classes = self._classes(attrs)
+
+        if tag == 'tbody' and not self.tbody_done:
+            self.tbody_depth += 1
+            self.result['has_table'] = True
+        elif tag == 'tr' and self.tbody_depth:
+            if self.row is None:
+                self.row = {"cells": [], "has_class": bool(classes)}
+            self.row_depth += 1
+        elif tag == 'td' and self.row is not None:
+            if self.cell is None:
+                self.cell = {"text": [], "sks": 0, "placeholder": False}
+            self.cell_depth += 1
+        elif tag == 'p' and self.paragraph is None:
+            self.paragraph = []
+
+        if self.cell is not None:
+            if any('placeholder' in (k or '') or 'placeholder' in (v or '') for k, v in attrs):
+                self.cell['placeholder'] = True
+            if tag == 'span' and ('badge' in classes or self.badge_depth):
+                self.badge_depth += 1
+
+        if self.result['hitung_ips_url'] is None:
+            if tag == 'a' and self.link is None:
+                self.link = {"href": dict(attrs).get('href'), "text": []}
+            if tag == 'a' and self.link is not None:
+                self.link_depth += 1
+
+        if self.user_box_tag is None and 'user-box' in classes:
+            self.user_box_tag = tag
+        if tag == self.user_box_tag:
+            self.user_box_depth += 1
+
+        if self.name_tag is None and self.name_priority < 2:
+            if 'pro-user-name' in classes:
+                self.name_tag, self.name_priority, self.name_text = tag, 2, []
+            elif self.name_priority < 1 and self.user_box_depth and 'dropdown-toggle' in classes:
+                self.name_tag, self.name_priority, self.name_text = tag, 1, []
+        if tag == self.name_tag:
+            self.name_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == self.name_tag:
+            self.name_depth -= 1
+            if self.name_depth == 0:
+                self.result['nama'] = _join_stripped(self.name_text)
+                self.name_tag = None
+
+        if tag == self.user_box_tag:
+            self.user_box_depth -= 1
+            if self.user_box_depth == 0:
+                self.user_box_tag = None
+
+        if tag == 'a' and self.link is not None:
+            self.link_depth -= 1
+            if self.link_depth == 0:
+                if "Hitung IPS" in ''.join(self.link['text']):
+                    self.result['hitung_ips_url'] = self.link['href']
+                self.link = None
+
+        if self.cell is not None and tag == 'span' and self.badge_depth:
+            self.badge_depth -= 1
+            if self.badge_depth == 0:
+                sks = _parse_sks(_join_stripped(self.badge_text))
+                if sks is not None:
+                    self.cell['sks'] = sks
+                self.badge_text = []
+
+        if tag == 'p' and self.paragraph is not None:
+            _parse_ip_text(_join_stripped(self.paragraph), self.result)
+            self.paragraph = None
+        elif tag == 'td' and self.cell is not None:
+            self.cell_depth -= 1
+            if self.cell_depth == 0:
+                self.row['cells'].append(self.cell)
+                self.cell = None
+        elif tag == 'tr' and self.row is not None:
+            self.row_depth -= 1
+            if self.row_depth == 0:
+                self._finish_row(self.row)
+                self.row = None
+        elif tag == 'tbody' and self.tbody_depth:
+            self.tbody_depth -= 1
+            if self.tbody_depth == 0:
+                self.tbody_done = True
+
+    def _finish_row(self, row):
+        cols = row['cells']
+        if len(cols) < 6 or row['has_class']:
+            return
+        sks_val = cols[2]['sks']
+        self.result['total_sks'] += sks_val
+        self.result['nilai'].append(_build_course(
+            _join_stripped(cols[2]['text']),
+            sks_val,
+            _join_stripped(cols[4]['text']),
+            _join_stripped(cols[5]['text']),
+            cols[4]['placeholder']
+        ))
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            if self.badge_depth:
+                self.badge_text.append(data)
+            else:
+                self.cell['text'].append(data)
+            if 'placeholder' in data:
+                self.cell['placeholder'] = True
+        if self.paragraph is not None:
+            self.paragraph.append(data)
+        if self.link is not None:
+            self.link['text'].append(data)
+        if self.name_tag is not None:
+            self.name_text.append(data)
+
+def _parse_stream(text):
+    extractor = _HasilStudiExtractor()
+    extractor.feed(text)
+    extractor.close()
+    return extractor.result
+
+BACKENDS = {
+    "bs4": _parse_bs4,
+    "lxml": _parse_lxml,
+    "stream": _parse_stream,
+}
+
+def resolve_backend(name=None):
+    """Menentukan backend yang dipakai; jatuh ke bs4 jika backend tidak tersedia."""
+    name = (name or PARSER_BACKEND).lower()
+    if name == "auto":
+        name = "lxml" if lxml_html else "bs4"
+    if name == "lxml" and not lxml_html:
+        name = "bs4"
+    return name if name in BACKENDS else "bs4"
+
+def parse_hasil_studi(text, backend=None):
+    """Mengekstrak data halaman Hasil Studi.
+
+    Returns:
+        dict: keys 'hitung_ips_url', 'has_table', 'nilai' (list matkul dengan keys
+        'matkul', 'sks', 'nilai', 'mutu'), 'total_sks', 'ips', 'ipk', dan 'nama'
+    """
+    result = BACKENDS[resolve_backend(backend)](text)
+    return _normalize(result)
+
+def _normalize(result):
+    """Post-processing yang sama untuk semua backend."""
+    for glyph in _NAME_GLYPHS:
+        result['nama'] = result['nama'].replace(glyph, "")
+    result['nama'] = result['nama'].strip()
+    return result
+
+def fingerprint_hasil_studi(text):
+    """Hash region nilai (mulai `<tbody>` sampai akhir halaman, tanpa token dinamis).
+
+    Mengembalikan None jika halaman tidak memuat tabel (mis. halaman login),
+    sehingga halaman seperti itu tidak pernah dianggap "tidak berubah".
+    """
+    start = text.find('<tbody')
+    if start == -1:
+        return None
+
+    region = text[start:]
+    for pattern in _VOLATILE_PATTERNS:
+        region = pattern.sub('', region)
+    return hashlib.blake2b(region.encode('utf-8', 'replace'), digest_size=16).hexdigest()
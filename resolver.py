@@ -0,0 +1,193 @@
+"""DNS resolver ber-cache untuk koneksi HTTP ke Siakang.
+
+Menggantikan patch global socket.getaddrinfo di scraper_lib. Resolver hanya dipakai
+oleh connection pool http_client untuk host yang dikonfigurasi, sehingga library lain
+(dan host lain seperti Telegram/WAHA) tetap memakai resolusi DNS sistem biasa.
+
+Fitur:
+- Cache alamat per host; jawaban disegarkan setelah TTL habis (TTL record DNS jika
+  package dnspython terpasang, selain itu RESOLVER_TTL), dibatasi RESOLVER_MIN_TTL/MAX_TTL
+- Hanya satu lookup per host yang berjalan bersamaan; thread lain memakai hasilnya
+- Jika lookup gagal, alamat lama tetap dipakai sampai RESOLVER_STALE_TTL detik
+- IPv4 dipaksa hanya untuk RESOLVER_IPV4_HOSTS
+- Alamat dicoba berurutan; jika semua gagal dihubungi, cache host dibuang
+- Counter hit/miss/refresh/failure/stale per proses (resolver.stats())
+"""
+
+import os
+import socket
+import threading
+import time
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+
+try:
+    import dns.resolver
+except ImportError:
+    dns = None
+
+def _host_list(value):
+    return {host.strip().lower() for host in value.split(",") if host.strip()}
+
+RESOLVER_HOSTS = _host_list(os.getenv("RESOLVER_HOSTS", "siakang.untirta.ac.id"))
+RESOLVER_IPV4_HOSTS = _host_list(os.getenv("RESOLVER_IPV4_HOSTS", "siakang.untirta.ac.id"))
+RESOLVER_TTL = float(os.getenv("RESOLVER_TTL", 300))
+RESOLVER_MIN_TTL = float(os.getenv("RESOLVER_MIN_TTL", 30))
+RESOLVER_MAX_TTL = float(os.getenv("RESOLVER_MAX_TTL", 3600))
+RESOLVER_STALE_TTL = float(os.getenv("RESOLVER_STALE_TTL", 3600))
+
+class CachingResolver:
+    """Cache jawaban DNS per host untuk host yang dikonfigurasi."""
+
+    def __init__(self, hosts, ipv4_hosts=(), ttl=300, min_ttl=30, max_ttl=3600, stale_ttl=3600):
+        self.ipv4_hosts = set(ipv4_hosts)
+        self.hosts = set(hosts) | self.ipv4_hosts
+        self.ttl = ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.stale_ttl = stale_ttl
+        self.counters = {"hits": 0, "misses": 0, "refreshes": 0, "failures": 0, "stale": 0}
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def handles(self, host):
+        return host.lower() in self.hosts
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _host_lock(self, host):
+        with self._lock:
+            return self._locks.setdefault(host, threading.Lock())
+
+    def _query(self, host, port):
+        """Lookup DNS. Mengembalikan (list alamat, ttl detik)."""
+        ipv4_only = host in self.ipv4_hosts
+        if dns is not None:
+            addresses, ttls = [], []
+            for record_type in ("A",) if ipv4_only else ("A", "AAAA"):
+                try:
+                    answer = dns.resolver.resolve(host, record_type)
+                except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+                    continue
+                addresses += [record.to_text() for record in answer]
+                ttls.append(answer.rrset.ttl)
+            if addresses:
+                return addresses, min(ttls)
+
+        family = socket.AF_INET if ipv4_only else socket.AF_UNSPEC
+        infos = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        return addresses, self.ttl
+
+    def resolve(self, host, port):
+        """Daftar alamat IP host dari cache, lookup ulang jika TTL sudah habis."""
+        host = host.lower()
+        entry = self._entries.get(host)
+        if entry and entry["expires_at"] > time.time():
+            self._count("hits")
+            return entry["addresses"]
+
+        with self._host_lock(host):
+            # Thread lain mungkin sudah menyegarkan entry selagi kita menunggu lock
+            entry = self._entries.get(host)
+            now = time.time()
+            if entry and entry["expires_at"] > now:
+                self._count("hits")
+                return entry["addresses"]
+
+            self._count("misses")
+            try:
+                addresses, ttl = self._query(host, port)
+                if not addresses:
+                    raise socket.gaierror(f"Tidak ada alamat untuk {host}")
+            except Exception as e:
+                self._count("failures")
+                if entry and entry["resolved_at"] + self.stale_ttl > now:
+                    self._count("stale")
+                    return entry["addresses"]
+                if isinstance(e, OSError):
+                    raise
+                raise socket.gaierror(str(e)) from e
+
+            if entry:
+                self._count("refreshes")
+            ttl = min(self.max_ttl, max(self.min_ttl, ttl))
+            self._entries[host] = {"addresses": addresses, "resolved_at": now, "expires_at": now + ttl}
+            return addresses
+
+    def invalidate(self, host):
+        self._entries.pop(host.lower(), None)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else 0.0
+        counters["hosts"] = {
+            host: {"addresses": entry["addresses"], "expires_in": round(entry["expires_at"] - now, 1)}
+            for host, entry in list(self._entries.items())
+        }
+        return counters
+
+resolver = CachingResolver(
+    RESOLVER_HOSTS, RESOLVER_IPV4_HOSTS,
+    ttl=RESOLVER_TTL, min_ttl=RESOLVER_MIN_TTL, max_ttl=RESOLVER_MAX_TTL, stale_ttl=RESOLVER_STALE_TTL
+)
+
+def stats():
+    return resolver.stats()
+
+class ResolvingConnectionMixin:
+    """Membuka socket ke alamat dari resolver untuk host yang dikonfigurasi.
+
+    Hanya alamat tujuan TCP yang diganti; self.host tetap nama host sehingga SNI,
+    verifikasi sertifikat, dan header Host tidak berubah.
+    """
+
+    def _new_conn(self):
+        if self.proxy or not resolver.handles(self.host):
+            return super()._new_conn()
+
+        try:
+            addresses = resolver.resolve(self.host, self.port)
+        except OSError as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        error = None
+        for address in addresses:
+            try:
+                return connection.create_connection(
+                    (address, self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+            except socket.timeout:
+                error = ConnectTimeoutError(
+                    self, f"Connection to {self.host} ({address}) timed out. (connect timeout={self.timeout})"
+                )
+            except OSError as e:
+                error = NewConnectionError(self, f"Failed to establish a new connection to {address}: {e}")
+
+        # Semua alamat gagal: kemungkinan host pindah IP, lookup ulang di koneksi berikutnya
+        resolver.invalidate(self.host)
+        raise error
+
+def pool_classes():
+    """Pool class http/https dengan koneksi ber-resolver, untuk PoolManager.pool_classes_by_scheme.
+
+    Class koneksi HTTPS diambil saat dipanggil sehingga tetap mengikuti HTTP/2 jika sudah di-inject.
+    """
+    https_base = HTTPSConnectionPool.ConnectionCls or HTTPSConnection
+    http_connection = type("ResolvingHTTPConnection", (ResolvingConnectionMixin, HTTPConnection), {})
+    https_connection = type("ResolvingHTTPSConnection", (ResolvingConnectionMixin, https_base), {})
+    return {
+        "http": type("ResolvingHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http_connection}),
+        "https": type("ResolvingHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https_connection}),
+    }
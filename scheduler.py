@@ -0,0 +1,124 @@
+"""Penjadwal polling adaptif untuk worker Monitoring Akademik Siakang.
+
+Menggantikan sleep INTERVAL tetap di loop monitor:
+- Fase per task: siklus setiap task diarahkan ke slot waktu sendiri di dalam interval
+  (berdasarkan TASK_ID), sehingga task yang dijalankan bersamaan tidak menembak server
+  pada detik yang sama
+- Jitter: jeda diacak +-SCHEDULE_JITTER (fraksi interval)
+- Backoff: setiap siklus gagal berturut-turut (error, data kosong, atau respon 5xx)
+  melipatgandakan jeda sampai batas maksimum
+- Hot window: dalam rentang waktu tertentu (mis. minggu rilis nilai atau jadwal KRS dibuka)
+  interval diperpendek
+- Semua jeda dibatasi min/max per task (INTERVAL_MIN / INTERVAL_MAX)
+
+Format HOT_WINDOWS, dipisah ";":
+    [nilai|krs:]MULAI/SELESAI[=interval]
+MULAI/SELESAI berformat ISO (2026-12-20 atau 2026-12-20T08:00). Tanggal tanpa jam pada
+SELESAI berarti sampai akhir hari tersebut. Tanpa "=interval" dipakai HOT_INTERVAL.
+Interval hot window juga dibatasi INTERVAL_MIN (default 30): untuk interval di bawahnya,
+INTERVAL_MIN harus ikut diturunkan.
+Contoh: "nilai:2026-12-20/2027-01-10=60;krs:2027-01-25T08:00/2027-01-25T12:00=30"
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+# Kelipatan golden ratio menyebar fase task berurutan serata mungkin di dalam interval
+PHASE_STEP = 0.6180339887498949
+
+def parse_hot_windows(spec, default_interval):
+    """Mengurai HOT_WINDOWS menjadi list (monitor_type atau None, start_ts, end_ts, interval)."""
+    windows = []
+    for item in (spec or "").split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            monitor_type = None
+            prefix = item.split(":", 1)[0].strip().lower()
+            if prefix in ("nilai", "krs"):
+                monitor_type, item = prefix, item.split(":", 1)[1]
+
+            interval = default_interval
+            if "=" in item:
+                item, value = item.rsplit("=", 1)
+                interval = float(value)
+
+            start_text, end_text = (part.strip() for part in item.split("/", 1))
+            start = datetime.fromisoformat(start_text)
+            end = datetime.fromisoformat(end_text)
+            if "T" not in end_text and " " not in end_text:
+                end += timedelta(days=1)
+            windows.append((monitor_type, start.timestamp(), end.timestamp(), interval))
+        except ValueError:
+            print(f"[WARNING] HOT_WINDOWS tidak valid, diabaikan: {item}")
+    return windows
+
+class PollScheduler:
+    """Menghitung jeda sampai siklus berikutnya untuk satu task."""
+
+    def __init__(self, interval, min_interval=30, max_interval=3600, jitter=0.1,
+                 hot_windows=(), monitor_type=None, task_id=0):
+        self.min_interval = max(1.0, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.interval = self._clamp(interval)
+        self.jitter = max(0.0, min(float(jitter), 0.5))
+        self.hot_windows = [w for w in hot_windows if w[0] in (None, monitor_type)]
+        self.phase = (task_id * PHASE_STEP) % 1.0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls, env, interval, monitor_type=None, task_id=0):
+        return cls(
+            interval,
+            min_interval=float(env.get("INTERVAL_MIN") or 30),
+            max_interval=float(env.get("INTERVAL_MAX") or 3600),
+            jitter=float(env.get("SCHEDULE_JITTER", 0.1)),
+            hot_windows=parse_hot_windows(env.get("HOT_WINDOWS"), float(env.get("HOT_INTERVAL", 60))),
+            monitor_type=monitor_type,
+            task_id=task_id
+        )
+
+    def _clamp(self, value):
+        return min(self.max_interval, max(self.min_interval, float(value)))
+
+    def hot_window(self, now=None):
+        """Interval hot window yang sedang aktif, atau None."""
+        now = time.time() if now is None else now
+        active = [interval for _, start, end, interval in self.hot_windows if start <= now < end]
+        return min(active) if active else None
+
+    def base_interval(self, now=None):
+        """Interval tanpa backoff/jitter: hot window jika aktif, selain itu INTERVAL task."""
+        hot = self.hot_window(now)
+        return self._clamp(min(hot, self.interval)) if hot is not None else self.interval
+
+    def record(self, ok):
+        """Mencatat hasil siklus; siklus gagal menaikkan level backoff."""
+        self.failures = 0 if ok else self.failures + 1
+
+    def next_delay(self, now=None):
+        """Jeda (detik) sebelum siklus berikutnya."""
+        now = time.time() if now is None else now
+        base = self.base_interval(now)
+        spread = random.uniform(1 - self.jitter, 1 + self.jitter)
+
+        if self.failures:
+            # Backoff tidak diselaraskan ke fase: server yang bermasalah justru perlu dijauhi
+            return self._clamp(base * (2 ** min(self.failures, 16)) * spread)
+
+        # Arahkan ke slot fase task berikutnya; slot yang terlalu dekat dilewati
+        offset = self.phase * base
+        delay = base - ((now - offset) % base)
+        if delay < base / 2:
+            delay += base
+        return self._clamp(delay + (spread - 1) * base)
+
+    def state(self):
+        return {
+            "interval": self.interval,
+            "effective_interval": self.base_interval(),
+            "hot_window": self.hot_window() is not None,
+            "failures": self.failures
+        }
@@ -8,35 +8,226 @@ Fungsi Utama:
 
 Fitur:
 - Session Management: Mengelola cookie dan session login
-- IPv4 Enforcement: Memaksa koneksi menggunakan IPv4 untuk menghindari timeout
+- Session Persistence: Cookie login disimpan di shared_state dan dipakai ulang sampai kedaluwarsa
+- IPv4 Enforcement: Koneksi ke Siakang memakai IPv4 lewat resolver ber-cache (resolver.py),
+  tanpa mengubah socket.getaddrinfo global
 - Pagination Support: Mendukung pengambilan data dari multiple pages
+- Semester Cache: Daftar semester disimpan per akun selama SEMESTER_CACHE_TTL detik
+- Adaptive Rate Limiting: Jeda antar request yang menyesuaikan kondisi server
+- HTTP Client: Session memakai connection pool, timeout, dan kompresi dari http_client
+- Circuit Breaker: Request ke Siakang ditolak lokal selama portal bermasalah; status dibagi
+  semua worker lewat shared_state.CircuitBreaker dan hanya satu probe yang dikirim
 
 Digunakan oleh:
 - server/main.py: Untuk validasi login dan fetch semester di API endpoint
-- main.py: Socket patch dijalankan saat import untuk memperbaiki koneksi
+- main.py: Session login, cache semester, rate limiter, dan circuit breaker
 """
 
 import requests
 from bs4 import BeautifulSoup
-import socket
+import hashlib
+import json
+import os
+import threading
+import time
+import http_client
+import shared_state
 
-orig_getaddrinfo = socket.getaddrinfo
-def getaddrinfo_ipv4(host, port, family=0, type=0, proto=0, flags=0):
-    return orig_getaddrinfo(host, port, socket.AF_INET, type, proto, flags)
-socket.getaddrinfo = getaddrinfo_ipv4
+SESSION_TTL = int(os.getenv("SESSION_TTL", 7200))
+SEMESTER_CACHE_TTL = int(os.getenv("SEMESTER_CACHE_TTL", 86400))
+
+SIAKANG_HOST = "siakang.untirta.ac.id"
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", 0.5))
+CIRCUIT_MIN_REQUESTS = int(os.getenv("CIRCUIT_MIN_REQUESTS", 10))
+CIRCUIT_WINDOW = float(os.getenv("CIRCUIT_WINDOW", 60))
+CIRCUIT_SLOW_THRESHOLD = float(os.getenv("CIRCUIT_SLOW_THRESHOLD", 15))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", 30))
+CIRCUIT_PROBE_LEASE = float(os.getenv("CIRCUIT_PROBE_LEASE", 60))
+
+def session_key(scope, login_id, password):
+    """Kunci session store. Password ikut di-hash agar session lama tidak dipakai
+    setelah password diganti atau oleh request dengan password yang salah."""
+    digest = hashlib.sha256(f"{login_id}\0{password}".encode('utf-8')).hexdigest()[:32]
+    return f"{scope}:{digest}"
+
+def save_cookies(session, key, ttl=SESSION_TTL):
+    """Menyimpan cookie session. Kedaluwarsa mengikuti cookie yang paling cepat habis."""
+    cookies = []
+    expires_at = time.time() + ttl
+    for cookie in session.cookies:
+        cookies.append({
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure
+        })
+        if cookie.expires:
+            expires_at = min(expires_at, cookie.expires)
+
+    if cookies:
+        shared_state.save_session(key, json.dumps(cookies), expires_at)
+
+def restore_cookies(session, key):
+    """Memuat cookie tersimpan ke session. Mengembalikan True jika ada session yang berlaku."""
+    try:
+        stored = shared_state.load_session(key)
+    except Exception:
+        return False
+    if not stored:
+        return False
+
+    for cookie in json.loads(stored):
+        session.cookies.set(
+            cookie['name'], cookie['value'],
+            domain=cookie['domain'], path=cookie['path'],
+            expires=cookie['expires'], secure=cookie['secure']
+        )
+    return True
+
+def load_cached_semesters(login_id, password, max_age=SEMESTER_CACHE_TTL):
+    """Mengambil daftar semester akun dari cache bersama.
+
+    Returns:
+        tuple: (list semester, True jika daftar lengkap) atau None jika tidak ada cache
+    """
+    try:
+        cached = shared_state.load_semesters(session_key("semesters", login_id, password), max_age)
+    except Exception:
+        return None
+    if not cached:
+        return None
+    return json.loads(cached[0]), cached[1]
+
+def cache_semesters(login_id, password, semesters, complete=True):
+    try:
+        shared_state.save_semesters(session_key("semesters", login_id, password), json.dumps(semesters), complete)
+    except Exception:
+        pass
+
+class AdaptiveRateLimiter:
+    """Jeda minimum antar request dengan pola AIMD.
+
+    Jeda diperpendek perlahan selama server merespon normal dan dilipatgandakan
+    saat server membalas 429/5xx atau lebih lambat dari slow_threshold detik.
+    Jeda dihitung dari awal request sebelumnya, jadi request yang lambat tidak
+    ditambah sleep lagi.
+    """
+
+    def __init__(self, min_delay=0.2, max_delay=10.0, slow_threshold=3.0):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.slow_threshold = slow_threshold
+        self.delay = min_delay
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._last_request + self.delay)
+            self._last_request = start_at
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def record(self, status_code, elapsed):
+        with self._lock:
+            if status_code == 429 or status_code >= 500 or elapsed > self.slow_threshold:
+                self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay))
+            else:
+                self.delay = max(self.min_delay, self.delay * 0.75)
+
+def siakang_circuit():
+    return shared_state.CircuitBreaker(
+        SIAKANG_HOST,
+        error_rate=CIRCUIT_ERROR_RATE,
+        min_requests=CIRCUIT_MIN_REQUESTS,
+        window=CIRCUIT_WINDOW,
+        slow_threshold=CIRCUIT_SLOW_THRESHOLD,
+        open_seconds=CIRCUIT_OPEN_SECONDS,
+        probe_lease=CIRCUIT_PROBE_LEASE
+    )
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Request ditolak lokal karena circuit breaker host sedang open."""
+
+class CircuitBreakerAdapter(http_client.PooledAdapter):
+    """Adapter (pool bersama + timeout default) yang meminta izin circuit breaker sebelum setiap
+    request dan mencatat hasilnya.
+
+    Turunan ConnectionError dipakai agar kode pemanggil menanganinya seperti server tidak terjangkau.
+    """
+
+    def __init__(self, breaker, **kwargs):
+        super().__init__(**kwargs)
+        self.breaker = breaker
+        # Satu adapter dipakai banyak thread (probe KRS paralel): counter dijaga lock
+        self._rejected_lock = threading.Lock()
+        self._rejected = 0
+
+    @property
+    def rejected(self):
+        """Jumlah request yang ditolak lokal sejak terakhir di-reset (rejected = 0)."""
+        with self._rejected_lock:
+            return self._rejected
+
+    @rejected.setter
+    def rejected(self, value):
+        with self._rejected_lock:
+            self._rejected = value
+
+    def send(self, request, **kwargs):
+        ticket = self.breaker.allow()
+        if ticket is None:
+            with self._rejected_lock:
+                self._rejected += 1
+            raise CircuitOpenError(f"Circuit {self.breaker.name} open, request ditolak", request=request)
+
+        started = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception as e:
+            self._record(False, time.monotonic() - started, ticket, str(e))
+            raise
+
+        failed = response.status_code >= 500 or response.status_code == 429
+        self._record(not failed, time.monotonic() - started, ticket, f"HTTP {response.status_code}" if failed else None)
+        return response
+
+    def _record(self, ok, elapsed, ticket, error):
+        transition = self.breaker.record(ok, elapsed, ticket, error)
+        if transition == 'open':
+            print(f"[WARNING] Circuit {self.breaker.name} OPEN ({error}), request ditahan {self.breaker.open_seconds:.0f}s.")
+        elif transition == 'closed':
+            print(f"[INFO] Circuit {self.breaker.name} kembali CLOSED.")
+
+def mount_circuit_breaker(session):
+    """Memasang circuit breaker Siakang ke session. Mengembalikan adapter-nya."""
+    adapter = CircuitBreakerAdapter(siakang_circuit())
+    session.mount(f"https://{SIAKANG_HOST}", adapter)
+    return adapter
 
 class SiakangScraper:
     def __init__(self, login_id, password):
         self.login_id = login_id
         self.password = password
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Cookie jar per akun, koneksi ke Siakang dipakai ulang antar panggilan lewat pool bersama
+        self.session = http_client.new_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         })
+        mount_circuit_breaker(self.session)
         self.url_login = "https://siakang.untirta.ac.id/auth/login"
         self.url_list_semester = "https://siakang.untirta.ac.id/dashboard/list-semester"
+        self.session_key = session_key("api", login_id, password)
 
     def login(self):
+        """Memakai session tersimpan jika masih berlaku, selain itu login baru."""
+        if restore_cookies(self.session, self.session_key):
+            return True, "Session restored"
+        return self.fresh_login()
+
+    def fresh_login(self):
         try:
             res_page = self.session.get(self.url_login)
             soup = BeautifulSoup(res_page.text, 'html.parser')
@@ -56,6 +247,10 @@ class SiakangScraper:
             if response.ok:
                 if "Identitas tersebut tidak cocok dengan data kami" in response.text:
                     return False, "Identitas Salah"
+                try:
+                    save_cookies(self.session, self.session_key)
+                except Exception:
+                    pass
                 return True, "Success"
             return False, f"HTTP {response.status_code}"
         except Exception as e:
@@ -65,10 +260,13 @@ class SiakangScraper:
         """Mengambil semua daftar semester dengan pagination support.
         
         Returns:
-            list: List of dict dengan keys 'title', 'code', dan 'url'
+            tuple: (list dict dengan keys 'title', 'code', dan 'url',
+                    True jika semua halaman sudah diambil)
         """
         semesters = []
         current_url = self.url_list_semester
+        relogged = False
+        complete = False
         
         while current_url:
             try:
@@ -76,6 +274,12 @@ class SiakangScraper:
                 if res.status_code != 200:
                     break
 
+                if "auth/login" in res.url:
+                    if relogged or not self.fresh_login()[0]:
+                        break
+                    relogged = True
+                    continue
+
                 soup = BeautifulSoup(res.text, 'html.parser')
                 
                 cards = soup.find_all('div', class_='col-12 col-md-6 col-lg-4')
@@ -102,6 +306,7 @@ class SiakangScraper:
                     current_url = next_link['href']
                 else:
                     current_url = None
+                    complete = True
             except Exception as e:
                 break
-        return semesters
+        return semesters, complete
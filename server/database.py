@@ -3,22 +3,74 @@
 Module ini menangani:
 - Inisialisasi database SQLite
 - Schema creation dan migration
-- Connection management
+- Connection management (pool koneksi thread-safe, WAL)
 
 Database path: data/db/tasks.db
+
+get_db_connection() meminjam koneksi dari pool; conn.close() mengembalikannya ke pool
+(transaksi yang belum di-commit di-rollback) sehingga pemanggil tetap memakai pola
+connect/commit/close yang sama tanpa membuka file database baru setiap kali.
 """
 
 import sqlite3
 import os
+import queue
 from pydantic import BaseModel
 from typing import Optional, List
 
 DATA_DIR = os.path.join(os.getcwd(), 'data', 'db')
 os.makedirs(DATA_DIR, exist_ok=True)
 DB_PATH = os.path.join(DATA_DIR, "tasks.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+
+class PooledConnection:
+    """Pembungkus sqlite3.Connection yang dikembalikan ke pool saat close()."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+class ConnectionPool:
+    def __init__(self, path, size):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-8000")
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+_pool = ConnectionPool(DB_PATH, DB_POOL_SIZE)
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS tasks
                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,7 +85,9 @@ def init_db():
                 position INTEGER DEFAULT 0,
                 monitor_type TEXT DEFAULT 'nilai',
                 target_courses TEXT,
-                whatsapp_number TEXT)''')
+                whatsapp_number TEXT,
+                min_interval INTEGER,
+                max_interval INTEGER)''')
     upgrade_db()
     conn.commit()
     conn.close()
@@ -60,11 +114,14 @@ def upgrade_db():
     if 'whatsapp_number' not in columns:
         print("[INFO] Migrating database: Adding 'whatsapp_number' column...")
         c.execute("ALTER TABLE tasks ADD COLUMN whatsapp_number TEXT")
+
+    if 'min_interval' not in columns:
+        print("[INFO] Migrating database: Adding 'min_interval' and 'max_interval' columns...")
+        c.execute("ALTER TABLE tasks ADD COLUMN min_interval INTEGER")
+        c.execute("ALTER TABLE tasks ADD COLUMN max_interval INTEGER")
         
     conn.commit()
     conn.close()
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _pool.acquire()
@@ -0,0 +1,131 @@
+"""Engine asyncio untuk menjalankan worker di dalam proses server.
+
+Alternatif dari mode subprocess (ENGINE_MODE=asyncio):
+- Satu event loop di thread terpisah menjadwalkan semua task
+- Setiap task adalah coroutine dengan MonitorWorker (session) sendiri
+- Siklus scraping yang blocking dijalankan lewat asyncio.to_thread
+- Output worker tetap ditulis ke data/logs/task_{id}.log
+
+Library berat (requests, bs4, colorama) cukup di-import sekali untuk semua task.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as worker_main
+
+ENGINE_MAX_THREADS = int(os.getenv("ENGINE_MAX_THREADS", 32))
+
+class AsyncEngine:
+    """Scheduler coroutine untuk banyak task monitoring."""
+
+    def __init__(self, max_threads=ENGINE_MAX_THREADS, on_exit=None):
+        self.max_threads = max_threads
+        self.on_exit = on_exit
+        self._loop = None
+        self._thread = None
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_threads, thread_name_prefix="engine-worker"
+            ))
+            self._thread = threading.Thread(target=loop.run_forever, name="engine-loop", daemon=True)
+            self._thread.start()
+            self._loop = loop
+            return loop
+
+    def _submit(self, coro):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def is_running(self, task_id: int):
+        task = self._tasks.get(task_id)
+        return bool(task and not task.done())
+
+    def running_ids(self):
+        return [task_id for task_id in list(self._tasks) if self.is_running(task_id)]
+
+    def pid(self, task_id: int):
+        return os.getpid()
+
+    def start(self, task_id: int, env: dict, log_path: str, tag=None):
+        """Menjadwalkan task. Mengembalikan False jika task sudah berjalan.
+
+        `tag` diteruskan ke callback on_exit(task_id, tag) saat coroutine task selesai.
+        """
+        return self._submit(self._spawn(task_id, env, log_path, tag)).result()
+
+    def stop(self, task_id: int):
+        """Membatalkan coroutine task dan menyetel stop_event worker-nya (siklus yang sedang berjalan dibiarkan selesai)."""
+        task = self._tasks.pop(task_id, None)
+        if not task or not self._loop:
+            return False
+        self._loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def run_once(self, task_id: int, env: dict, log_path: str, timeout=60):
+        """Menjalankan satu siklus task dan menunggu hasilnya (untuk endpoint refresh).
+
+        Mengembalikan False jika siklus belum selesai setelah timeout.
+        """
+        future = self._submit(self._run(task_id, env, log_path, run_once=True))
+        try:
+            future.result(timeout)
+            return True
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return False
+
+    async def _spawn(self, task_id, env, log_path, tag):
+        if self.is_running(task_id):
+            return False
+        task = asyncio.create_task(self._run(task_id, env, log_path), name=f"task-{task_id}")
+        if self.on_exit:
+            task.add_done_callback(lambda _: self.on_exit(task_id, tag))
+        self._tasks[task_id] = task
+        return True
+
+    async def _run(self, task_id, env, log_path, run_once=False):
+        log_file = open(log_path, "a", encoding="utf-8")
+        worker_main.log_stream.set(log_file)
+        worker = worker_main.MonitorWorker(env, run_once=run_once)
+        pending = None
+
+        try:
+            if worker.start_delay:
+                await asyncio.sleep(worker.start_delay)
+
+            pending = asyncio.ensure_future(asyncio.to_thread(worker.start))
+            if not await asyncio.shield(pending):
+                return
+
+            while True:
+                pending = asyncio.ensure_future(asyncio.to_thread(worker.run_cycle))
+                await asyncio.shield(pending)
+
+                if run_once:
+                    break
+                await asyncio.sleep(worker.next_delay)
+        except asyncio.CancelledError:
+            # Thread yang masih berada di worker.start (menunggu circuit/daftar semester) ikut berhenti
+            worker.stop_event.set()
+            worker_main.print("[INFO] Task dihentikan.")
+            raise
+        except Exception as e:
+            worker_main.print(f"[ERROR] Engine task {task_id} berhenti: {e}")
+        finally:
+            if pending and not pending.done():
+                pending.add_done_callback(lambda _: log_file.close())
+            else:
+                log_file.close()
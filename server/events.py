@@ -0,0 +1,56 @@
+"""Event broker untuk status task (Server-Sent Events).
+
+Module ini menangani:
+- Publish event dari thread mana pun (endpoint sync, watcher, manager)
+- Subscribe dari endpoint async sebagai asyncio.Queue per client
+- Format event SSE
+
+Jenis event:
+- status: status/pid satu task berubah (start, stop, proses mati)
+- tasks: daftar task berubah (create, update, delete, reorder), client perlu fetch ulang
+"""
+
+import asyncio
+import json
+import threading
+
+class EventBroker:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Mendaftarkan client baru. Harus dipanggil dari dalam event loop."""
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    def publish(self, event_type, data=None):
+        event = {"type": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _offer(queue, event):
+        # Client yang lambat kehilangan event paling lama, bukan memblokir publisher
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+def format_sse(event):
+    event_id = f"id: {event['id']}\n" if event.get('id') is not None else ""
+    return f"{event_id}event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+broker = EventBroker()
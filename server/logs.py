@@ -0,0 +1,180 @@
+"""Rotasi dan arsip log worker.
+
+Module ini menangani:
+- Rotasi data/logs/task_{id}.log berdasarkan ukuran dan umur segmen
+- Arsip segmen lama sebagai task_{id}.{timestamp}.log.gz
+- Batas retensi arsip per task dan global (arsip terlama dihapus lebih dulu)
+- Membaca log lintas segmen (arsip + file aktif)
+
+Rotasi memakai copy-truncate: isi file disalin ke arsip lalu file dipotong di tempat.
+Worker (subprocess, engine, maupun pool) membuka log dengan mode append sehingga
+handle-nya tetap valid dan tulisan berikutnya langsung masuk ke awal file baru.
+"""
+
+import glob
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+
+LOG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "logs"))
+
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 5 * 1024 * 1024))
+LOG_MAX_AGE = float(os.getenv("LOG_MAX_AGE", 7 * 24 * 3600))
+LOG_TASK_RETENTION_BYTES = int(os.getenv("LOG_TASK_RETENTION_BYTES", 50 * 1024 * 1024))
+LOG_TOTAL_RETENTION_BYTES = int(os.getenv("LOG_TOTAL_RETENTION_BYTES", 500 * 1024 * 1024))
+LOG_ROTATE_INTERVAL = float(os.getenv("LOG_ROTATE_INTERVAL", 60))
+
+_ARCHIVE_RE = re.compile(r"task_(\d+)\.(\d{8}-\d{6})(?:-(\d+))?\.log\.gz$")
+
+_lock = threading.Lock()
+_segment_started = {}
+
+def get_log_path(task_id: int):
+    os.makedirs(LOG_DIR, exist_ok=True)
+    return os.path.join(LOG_DIR, f"task_{task_id}.log")
+
+def list_archives(task_id=None):
+    """Daftar arsip (path, task_id, waktu rotasi) urut dari yang terlama."""
+    pattern = f"task_{task_id}.*.log.gz" if task_id is not None else "task_*.log.gz"
+    archives = []
+    for path in glob.glob(os.path.join(LOG_DIR, pattern)):
+        match = _ARCHIVE_RE.search(os.path.basename(path))
+        if match:
+            rotated_at = datetime.strptime(match.group(2), "%Y%m%d-%H%M%S").timestamp()
+            archives.append((rotated_at, int(match.group(3) or 0), path, int(match.group(1))))
+    return [(path, task_id, rotated_at) for rotated_at, _, path, task_id in sorted(archives)]
+
+def _segment_age(task_id, now):
+    """Umur segmen aktif: sejak rotasi terakhir, atau sejak pertama kali dilihat rotator."""
+    archives = list_archives(task_id)
+    started = archives[-1][2] if archives else _segment_started.setdefault(task_id, now)
+    return now - started
+
+def rotate_log(task_id: int, force=False):
+    """Mengarsipkan log aktif jika melewati LOG_MAX_BYTES atau LOG_MAX_AGE. Mengembalikan path arsip atau None."""
+    log_path = get_log_path(task_id)
+    with _lock:
+        if not os.path.exists(log_path):
+            return None
+
+        size = os.path.getsize(log_path)
+        now = time.time()
+        if size == 0 or not (force or size >= LOG_MAX_BYTES or _segment_age(task_id, now) >= LOG_MAX_AGE):
+            return None
+
+        stamp = datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M%S")
+        archive_path = os.path.join(LOG_DIR, f"task_{task_id}.{stamp}.log.gz")
+        suffix = 1
+        while os.path.exists(archive_path):
+            archive_path = os.path.join(LOG_DIR, f"task_{task_id}.{stamp}-{suffix}.log.gz")
+            suffix += 1
+
+        with open(log_path, "r+b") as src, gzip.open(archive_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+            # Salin juga byte yang ditulis worker selama kompresi, lalu potong secepatnya
+            dst.write(src.read())
+            src.truncate(0)
+
+        _segment_started[task_id] = now
+        return archive_path
+
+def enforce_retention():
+    """Menghapus arsip terlama sampai total per task dan total global di bawah batas retensi."""
+    with _lock:
+        archives = [(path, task_id, os.path.getsize(path)) for path, task_id, _ in list_archives()]
+
+        per_task = {}
+        for path, task_id, size in archives:
+            per_task[task_id] = per_task.get(task_id, 0) + size
+
+        removed = set()
+        for path, task_id, size in archives:
+            if per_task[task_id] > LOG_TASK_RETENTION_BYTES:
+                per_task[task_id] -= size
+                removed.add(path)
+
+        total = sum(per_task.values())
+        for path, task_id, size in archives:
+            if total <= LOG_TOTAL_RETENTION_BYTES:
+                break
+            if path not in removed:
+                total -= size
+                removed.add(path)
+
+        for path in removed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(removed)
+
+def rotate_all():
+    for path in glob.glob(os.path.join(LOG_DIR, "task_*.log")):
+        match = re.search(r"task_(\d+)\.log$", path)
+        if match:
+            rotate_log(int(match.group(1)))
+    enforce_retention()
+
+def watch_logs(interval=LOG_ROTATE_INTERVAL):
+    """Loop background rotasi dan retensi log."""
+    while True:
+        try:
+            rotate_all()
+        except Exception as e:
+            print(f"[WARNING] Log rotator error: {e}")
+        time.sleep(interval)
+
+def start_log_rotator():
+    threading.Thread(target=watch_logs, name="log-rotator", daemon=True).start()
+
+def delete_archives(task_id: int):
+    with _lock:
+        for path, _, _ in list_archives(task_id):
+            os.remove(path)
+        _segment_started.pop(task_id, None)
+
+def list_segments(task_id: int):
+    """Metadata segmen log task (arsip terlama dulu, file aktif terakhir)."""
+    segments = [{
+        "name": os.path.basename(path),
+        "size": os.path.getsize(path),
+        "rotated_at": rotated_at,
+        "compressed": True
+    } for path, _, rotated_at in list_archives(task_id)]
+
+    log_path = get_log_path(task_id)
+    if os.path.exists(log_path):
+        segments.append({
+            "name": os.path.basename(log_path),
+            "size": os.path.getsize(log_path),
+            "rotated_at": None,
+            "compressed": False
+        })
+    return segments
+
+def read_log_history(task_id: int, lines=1000, segment=None):
+    """Membaca N baris terakhir lintas segmen, atau satu segmen tertentu jika diberikan namanya."""
+    if segment is not None:
+        if segment == f"task_{task_id}.log":
+            paths = [get_log_path(task_id)]
+        else:
+            paths = [path for path, _, _ in list_archives(task_id) if os.path.basename(path) == segment]
+        if not paths or not os.path.exists(paths[0]):
+            return None
+    else:
+        paths = [path for path, _, _ in list_archives(task_id)] + [get_log_path(task_id)]
+
+    collected = []
+    for path in reversed(paths):
+        if not os.path.exists(path):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            collected = f.readlines()[-lines:] + collected
+        if len(collected) >= lines:
+            break
+    return "".join(collected[-lines:])
@@ -4,31 +4,53 @@ API ini menyediakan endpoints untuk:
 - CRUD operations untuk task monitoring
 - Start/Stop monitoring processes
 - View logs dan data hasil scraping
-- Validasi login dan fetch semester
+- Stream status task via Server-Sent Events (/tasks/events)
+- Tail log incremental (/tasks/{id}/logs/tail) dan stream log live (/tasks/{id}/logs/stream)
+- Baca log lintas segmen arsip (/tasks/{id}/logs/segments, /tasks/{id}/logs/history)
+- Riwayat perubahan nilai/KRS per task (/tasks/{id}/history)
+- Status dan reset circuit breaker bersama ke Siakang (/circuits)
+- Counter DNS cache resolver proses server (/resolver); counter worker ada di /tasks/{id}/stats
+- Validasi login dan fetch semester (async, request identik yang bersamaan digabung)
 
 Server ini menggunakan:
 - FastAPI untuk REST API
 - SQLite untuk persistence
 - Subprocess untuk menjalankan worker process
+- notifier.NotificationDispatcher untuk mengirim outbox notifikasi semua worker
 """
 
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from .database import init_db, get_db_connection
+from .events import broker, format_sse
+from .logs import start_log_rotator, list_segments, read_log_history
 from .models import TaskCreate, TaskUpdate, TaskResponse, ApiResponse
-from .manager import start_process, stop_process, get_logs, restore_running_tasks, get_last_values, cleanup_task_files, run_process_once, clear_logs, clear_data, check_process_status
-from typing import List
+from .manager import start_process, stop_process, get_logs, tail_logs, restore_running_tasks, start_status_watcher, get_last_values, get_stats, cleanup_task_files, run_process_once, clear_logs, clear_data
+from typing import List, Optional
+import asyncio
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import notifier
+import history_store
+import shared_state
+import resolver
 try:
-    from scraper_lib import SiakangScraper
+    from scraper_lib import SiakangScraper, load_cached_semesters, cache_semesters, session_key, siakang_circuit, CIRCUIT_OPEN_SECONDS
 except ImportError:
     SiakangScraper = None
 
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", 4))
+LOG_STREAM_INTERVAL = float(os.getenv("LOG_STREAM_INTERVAL", 1))
+
 app = FastAPI()
 
+# Batas scraping keluar dari API dan scrape yang sedang berjalan per akun (single-flight)
+scrape_semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+inflight_scrapes = {}
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -40,44 +62,64 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     init_db()
+    notifier.start_dispatcher()
     restore_running_tasks()
+    start_status_watcher()
+    start_log_rotator()
+    history_store.start_history_compactor()
 
 @app.get("/tasks", response_model=ApiResponse[List[dict]])
 def list_tasks():
+    # Status proses dijaga up-to-date oleh status watcher di manager
     conn = get_db_connection()
     tasks = conn.execute('SELECT * FROM tasks ORDER BY position ASC, id ASC').fetchall()
     conn.close()
     
-    task_list = [dict(t) for t in tasks]
-    for task in task_list:
-        if task['status'] == 'running':
-            check_process_status(task['id'])
+    return ApiResponse(code=200, message="Success", data=[dict(t) for t in tasks])
+
+@app.get("/tasks/events")
+async def task_events(request: Request):
+    queue = broker.subscribe()
     
-    conn = get_db_connection()
-    tasks = conn.execute('SELECT * FROM tasks ORDER BY position ASC, id ASC').fetchall()
-    conn.close()
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            broker.unsubscribe(queue)
     
-    return ApiResponse(code=200, message="Success", data=[dict(t) for t in tasks])
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 @app.put("/tasks/reorder", response_model=ApiResponse[None])
 def reorder_tasks(ordered_ids: List[int] = Body(...)):
     conn = get_db_connection()
-    for index, task_id in enumerate(ordered_ids):
-        conn.execute('UPDATE tasks SET position = ? WHERE id = ?', (index, task_id))
+    conn.executemany('UPDATE tasks SET position = ? WHERE id = ?',
+                     [(index, task_id) for index, task_id in enumerate(ordered_ids)])
     conn.commit()
     conn.close()
+    broker.publish("tasks")
     return ApiResponse(code=200, message="Tasks reordered")
 
 @app.post("/tasks", response_model=ApiResponse[dict])
 def create_task(task: TaskCreate):
     conn = get_db_connection()
     c = conn.execute(
-        'INSERT INTO tasks (name, login_id, password, chat_id, target_semester_code, interval, monitor_type, target_courses, whatsapp_number) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
-        (task.name, task.login_id, task.password, task.chat_id, task.target_semester_code, task.interval, task.monitor_type, task.target_courses, task.whatsapp_number)
+        'INSERT INTO tasks (name, login_id, password, chat_id, target_semester_code, interval, monitor_type, target_courses, whatsapp_number, min_interval, max_interval) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (task.name, task.login_id, task.password, task.chat_id, task.target_semester_code, task.interval, task.monitor_type, task.target_courses, task.whatsapp_number, task.min_interval, task.max_interval)
     )
     task_id = c.lastrowid
     conn.commit()
     conn.close()
+    broker.publish("tasks")
     return ApiResponse(code=201, message="Task created", data={"id": task_id, **task.dict(), "status": "stopped"})
 
 @app.put("/tasks/{task_id}", response_model=ApiResponse[None])
@@ -94,6 +136,7 @@ def update_task(task_id: int, task: TaskUpdate):
     conn.execute(query, values)
     conn.commit()
     conn.close()
+    broker.publish("tasks")
     
     return ApiResponse(code=200, message="Task updated")
 
@@ -105,6 +148,7 @@ def delete_task(task_id: int):
     conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
     conn.commit()
     conn.close()
+    broker.publish("tasks")
     return ApiResponse(code=200, message="Task deleted")
 
 @app.post("/tasks/{task_id}/start", response_model=ApiResponse[None])
@@ -123,6 +167,49 @@ def stop_task_endpoint(task_id: int):
 def get_logs_endpoint(task_id: int):
     return ApiResponse(code=200, message="Success", data=get_logs(task_id))
 
+@app.get("/tasks/{task_id}/logs/tail", response_model=ApiResponse[dict])
+def tail_logs_endpoint(task_id: int, offset: Optional[int] = None):
+    return ApiResponse(code=200, message="Success", data=tail_logs(task_id, offset))
+
+@app.get("/tasks/{task_id}/logs/segments", response_model=ApiResponse[List[dict]])
+def list_log_segments_endpoint(task_id: int):
+    return ApiResponse(code=200, message="Success", data=list_segments(task_id))
+
+@app.get("/tasks/{task_id}/logs/history", response_model=ApiResponse[str])
+def log_history_endpoint(task_id: int, lines: int = 1000, segment: Optional[str] = None):
+    text = read_log_history(task_id, max(1, min(lines, 20000)), segment)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Log segment not found")
+    return ApiResponse(code=200, message="Success", data=text)
+
+@app.get("/tasks/{task_id}/logs/stream")
+async def stream_logs_endpoint(task_id: int, request: Request, offset: Optional[int] = None):
+    # EventSource mengirim Last-Event-ID saat reconnect, sehingga stream dilanjutkan dari offset terakhir
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    
+    async def stream():
+        nonlocal offset
+        yield "retry: 3000\n\n"
+        idle = 0.0
+        while not await request.is_disconnected():
+            chunk = await asyncio.to_thread(tail_logs, task_id, offset)
+            if chunk["text"] or chunk["reset"] or offset is None:
+                offset = chunk["offset"]
+                idle = 0.0
+                yield format_sse({"type": "log", "id": offset, "data": chunk})
+            elif idle >= 15:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(LOG_STREAM_INTERVAL)
+            idle += LOG_STREAM_INTERVAL
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @app.delete("/tasks/{task_id}/logs", response_model=ApiResponse[None])
 def clear_logs_endpoint(task_id: int):
     success, msg = clear_logs(task_id)
@@ -142,6 +229,39 @@ def get_data_endpoint(task_id: int):
     data = get_last_values(task_id)
     return ApiResponse(code=200, message="Success", data=data if data else [])
 
+@app.get("/tasks/{task_id}/history", response_model=ApiResponse[List[dict]])
+def get_history_endpoint(task_id: int, start: Optional[float] = None, end: Optional[float] = None,
+                         kind: Optional[str] = None, item: Optional[str] = None, limit: int = 1000):
+    events = history_store.query_history(task_id, start, end, kind, item, max(1, min(limit, 10000)))
+    return ApiResponse(code=200, message="Success", data=events)
+
+@app.get("/tasks/{task_id}/history/{item:path}", response_model=ApiResponse[dict])
+def get_item_history_endpoint(task_id: int, item: str):
+    events = history_store.query_history(task_id, item=item, limit=10000)
+    if not events:
+        raise HTTPException(status_code=404, detail="No history for this item")
+    return ApiResponse(code=200, message="Success", data=history_store.summarize_item(events))
+
+@app.get("/tasks/{task_id}/stats", response_model=ApiResponse[dict])
+def get_stats_endpoint(task_id: int):
+    return ApiResponse(code=200, message="Success", data=get_stats(task_id) or {})
+
+@app.get("/circuits", response_model=ApiResponse[List[dict]])
+def list_circuits_endpoint():
+    circuits = shared_state.list_circuits(CIRCUIT_OPEN_SECONDS)
+    if not circuits:
+        circuits = [siakang_circuit().state()]
+    return ApiResponse(code=200, message="Success", data=circuits)
+
+@app.post("/circuits/{name}/reset", response_model=ApiResponse[None])
+def reset_circuit_endpoint(name: str):
+    shared_state.CircuitBreaker(name).reset()
+    return ApiResponse(code=200, message="Circuit reset")
+
+@app.get("/resolver", response_model=ApiResponse[dict])
+def resolver_stats_endpoint():
+    return ApiResponse(code=200, message="Success", data=resolver.stats())
+
 @app.post("/tasks/{task_id}/refresh", response_model=ApiResponse[None])
 def refresh_task_data(task_id: int):
     success, msg = run_process_once(task_id)
@@ -149,8 +269,36 @@ def refresh_task_data(task_id: int):
         raise HTTPException(status_code=400, detail=msg)
     return ApiResponse(code=200, message=msg)
 
+def scrape_semesters(login_id, password):
+    scraper = SiakangScraper(login_id, password)
+    success, msg = scraper.login()
+    
+    if not success:
+        raise HTTPException(status_code=401, detail=f"Login failed: {msg}")
+        
+    semesters, complete = scraper.get_semesters()
+    if semesters:
+        cache_semesters(login_id, password, semesters, complete)
+    return semesters
+
+async def coalesced_scrape_semesters(login_id, password):
+    """Request bersamaan untuk akun yang sama menunggu satu scrape yang sama."""
+    key = session_key("check", login_id, password)
+    task = inflight_scrapes.get(key)
+    
+    if task is None:
+        async def run():
+            async with scrape_semaphore:
+                return await asyncio.to_thread(scrape_semesters, login_id, password)
+            
+        task = asyncio.ensure_future(run())
+        inflight_scrapes[key] = task
+        task.add_done_callback(lambda _: inflight_scrapes.pop(key, None))
+    
+    return await asyncio.shield(task)
+
 @app.post("/check-semesters")
-def check_semesters(credentials: dict = Body(...)):
+async def check_semesters(credentials: dict = Body(...)):
     login_id = credentials.get("login_id")
     password = credentials.get("password")
     
@@ -159,12 +307,11 @@ def check_semesters(credentials: dict = Body(...)):
         
     if not SiakangScraper:
         raise HTTPException(status_code=500, detail="Scraper library not loaded")
+
+    if not credentials.get("refresh"):
+        cached = load_cached_semesters(login_id, password)
+        if cached and cached[1]:
+            return {"semesters": cached[0], "cached": True}
         
-    scraper = SiakangScraper(login_id, password)
-    success, msg = scraper.login()
-    
-    if not success:
-        raise HTTPException(status_code=401, detail=f"Login failed: {msg}")
-        
-    semesters = scraper.get_semesters()
-    return {"semesters": semesters}
+    semesters = await coalesced_scrape_semesters(login_id, password)
+    return {"semesters": semesters, "cached": False}
@@ -2,12 +2,15 @@
 
 Module ini mengelola lifecycle worker process:
 - Start/Stop subprocess monitoring
-- Process status monitoring
-- Log management
+- Process status monitoring (watcher background + event status ke dashboard)
+- Log management (tail incremental berbasis offset byte, rotasi di server/logs.py)
 - Data file cleanup
 
 Worker process dijalankan dengan environment variable injection.
-Setiap task dijalankan sebagai subprocess terpisah dari main.py.
+Mode eksekusi dipilih lewat ENGINE_MODE:
+- subprocess (default): setiap task dijalankan sebagai subprocess terpisah dari main.py
+- asyncio: semua task dijalankan sebagai coroutine di server/engine.py
+- pool: task dibagi ke beberapa worker process tetap di server/pool.py
 """
 
 import subprocess
@@ -16,15 +19,65 @@ import sys
 import signal
 import time
 import json
+import random
+import threading
 from .database import get_db_connection
+from .events import broker
+from .logs import get_log_path, delete_archives
+from .engine import AsyncEngine
+from .pool import WorkerPool
+import history_store
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
 PYTHON_EXE = sys.executable
 SCRIPT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "main.py"))
+ENGINE_MODE = os.getenv("ENGINE_MODE", "subprocess")
+RESTORE_STAGGER = float(os.getenv("RESTORE_STAGGER", 0.5))
+STATUS_WATCH_INTERVAL = float(os.getenv("STATUS_WATCH_INTERVAL", 2))
+LOG_TAIL_LINES = 200
+LOG_TAIL_MAX_BYTES = 1024 * 1024
 
 active_processes = {}
+if ENGINE_MODE == 'asyncio':
+    engine = AsyncEngine()
+elif ENGINE_MODE == 'pool':
+    engine = WorkerPool()
+else:
+    engine = None
+
+def set_task_statuses(updates):
+    """Update status beberapa task (task_id, status, pid) dalam satu transaksi dan publish event-nya."""
+    if not updates:
+        return
+    conn = get_db_connection()
+    conn.executemany('UPDATE tasks SET status = ?, pid = ? WHERE id = ?',
+                     [(status, pid, task_id) for task_id, status, pid in updates])
+    conn.commit()
+    conn.close()
+    for task_id, status, pid in updates:
+        broker.publish("status", {"id": task_id, "status": status, "pid": pid})
+
+def set_task_status(task_id: int, status: str, pid=None):
+    """Update status task di database dan publish event ke dashboard."""
+    set_task_statuses([(task_id, status, pid)])
+
+def watch_processes(interval=STATUS_WATCH_INTERVAL):
+    """Loop background: cek proses task yang berjalan dan publish event saat ada yang mati."""
+    while True:
+        time.sleep(interval)
+        try:
+            conn = get_db_connection()
+            tasks = conn.execute("SELECT id, pid FROM tasks WHERE status = 'running'").fetchall()
+            conn.close()
+            dead = [(task['id'], 'stopped', None) for task in tasks if not is_process_alive(task['id'], task['pid'])]
+            set_task_statuses(dead)
+        except Exception as e:
+            print(f"{Fore.YELLOW}[WARNING]{Style.RESET_ALL} Status watcher error: {e}")
+
+def start_status_watcher():
+    threading.Thread(target=watch_processes, name="status-watcher", daemon=True).start()
 
 def restore_running_tasks():
     """Restores tasks that were marked as 'running' in the database."""
@@ -33,23 +86,17 @@ def restore_running_tasks():
     tasks = conn.execute("SELECT * FROM tasks WHERE status = 'running'").fetchall()
     conn.close()
     
-    for task in tasks:
+    for index, task in enumerate(tasks):
         task_id = task['id']
         print(f"{Fore.CYAN}[INFO]{Style.RESET_ALL} Restarting task: {task['name']} (ID: {task_id})")
-        start_process(task_id)
-
-def start_process(task_id: int):
-    conn = get_db_connection()
-    task = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
-    conn.close()
-    
-    if not task:
-        return False, "Task not found"
-        
-    if task_id in active_processes and active_processes[task_id].poll() is None:
-        return True, "Already running"
+        # Sebar waktu login worker agar restart tidak memicu login serentak
+        start_process(task_id, start_delay=index * RESTORE_STAGGER + random.uniform(0, RESTORE_STAGGER))
 
+def build_task_env(task, interval=None, start_delay=0):
+    """Menyusun environment worker dari baris task di database."""
     env = os.environ.copy()
+    env["TASK_ID"] = str(task['id'])
+    env["START_DELAY"] = str(start_delay)
     env["LOGIN_ID"] = task['login_id']
     env["PASSWORD"] = task['password']
     
@@ -68,17 +115,43 @@ def start_process(task_id: int):
         env["TARGET_COURSES"] = task['target_courses']
     if task['target_semester_code']:
         env["TARGET_SEMESTER_CODE"] = task['target_semester_code']
-    env["INTERVAL"] = str(task['interval'])
+    env["INTERVAL"] = str(task['interval'] if interval is None else interval)
+    # Batas jeda adaptif per task; kosong berarti memakai INTERVAL_MIN/INTERVAL_MAX global
+    if task['min_interval']:
+        env["INTERVAL_MIN"] = str(task['min_interval'])
+    if task['max_interval']:
+        env["INTERVAL_MAX"] = str(task['max_interval'])
     env["PYTHONIOENCODING"] = "utf-8"
     
     data_dir = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value")
     os.makedirs(data_dir, exist_ok=True)
 
-    env["FILE_DATA"] = os.path.join(data_dir, f"last_values_{task_id}.json")
+    env["FILE_DATA"] = os.path.join(data_dir, f"last_values_{task['id']}.json")
+    env["STATS_FILE"] = os.path.join(data_dir, f"stats_{task['id']}.json")
+    # Outbox notifikasi dikirim oleh dispatcher di proses server
+    env["NOTIFY_DISPATCHER"] = "server"
+    return env
+
+def start_process(task_id: int, start_delay=0):
+    conn = get_db_connection()
+    task = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+    conn.close()
     
-    log_dir = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = open(os.path.join(log_dir, f"task_{task_id}.log"), "a", encoding="utf-8")
+    if not task:
+        return False, "Task not found"
+
+    if engine:
+        if not engine.start(task_id, build_task_env(task, start_delay=start_delay), get_log_path(task_id)):
+            return True, "Already running"
+
+        set_task_status(task_id, 'running', engine.pid(task_id))
+        return True, "Started"
+        
+    if task_id in active_processes and active_processes[task_id].poll() is None:
+        return True, "Already running"
+
+    env = build_task_env(task, start_delay=start_delay)
+    log_file = open(get_log_path(task_id), "a", encoding="utf-8")
     
     try:
         creationflags = subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
@@ -94,10 +167,7 @@ def start_process(task_id: int):
         
         active_processes[task_id] = proc
         
-        conn = get_db_connection()
-        conn.execute('UPDATE tasks SET status = ?, pid = ? WHERE id = ?', ('running', proc.pid, task_id))
-        conn.commit()
-        conn.close()
+        set_task_status(task_id, 'running', proc.pid)
         
         return True, "Started"
     except Exception as e:
@@ -106,7 +176,9 @@ def start_process(task_id: int):
 def stop_process(task_id: int):
     proc = active_processes.get(task_id)
     
-    if not proc:
+    if engine:
+        engine.stop(task_id)
+    elif not proc:
         conn = get_db_connection()
         task = conn.execute('SELECT pid, status FROM tasks WHERE id = ?', (task_id,)).fetchone()
         conn.close()
@@ -124,75 +196,126 @@ def stop_process(task_id: int):
         
         del active_processes[task_id]
 
-    conn = get_db_connection()
-    conn.execute('UPDATE tasks SET status = ?, pid = NULL WHERE id = ?', ('stopped', task_id))
-    conn.commit()
-    conn.close()
+    set_task_status(task_id, 'stopped')
     return True, "Stopped"
 
-def check_process_status(task_id: int):
-    """Check if process is still alive and update DB if dead."""
+def is_process_alive(task_id: int, pid=None):
+    """Check if the task's process is still alive, without touching the DB.
+
+    pid is the value stored in the DB, only used for processes not started by this server.
+    """
+    if engine:
+        return engine.is_running(task_id)
+
     proc = active_processes.get(task_id)
     
-    if proc and proc.poll() is not None:
-        del active_processes[task_id]
-        conn = get_db_connection()
-        conn.execute('UPDATE tasks SET status = ?, pid = NULL WHERE id = ?', ('stopped', task_id))
-        conn.commit()
-        conn.close()
-        return False
+    if proc:
+        if proc.poll() is not None:
+            del active_processes[task_id]
+            return False
+        return True
     
-    if not proc:
-        conn = get_db_connection()
-        task = conn.execute('SELECT pid, status FROM tasks WHERE id = ?', (task_id,)).fetchone()
-        conn.close()
-        
-        if task and task['status'] == 'running' and task['pid']:
-            try:
-                if os.name == 'nt':
-                    result = subprocess.run(['tasklist', '/FI', f'PID eq {task["pid"]}'], 
-                                        capture_output=True, text=True, timeout=2)
-                    if str(task['pid']) not in result.stdout:
-                        conn = get_db_connection()
-                        conn.execute('UPDATE tasks SET status = ?, pid = NULL WHERE id = ?', ('stopped', task_id))
-                        conn.commit()
-                        conn.close()
-                        return False
-                else:
-                    os.kill(task['pid'], 0)
-            except (ProcessLookupError, subprocess.TimeoutExpired, PermissionError):
-                conn = get_db_connection()
-                conn.execute('UPDATE tasks SET status = ?, pid = NULL WHERE id = ?', ('stopped', task_id))
-                conn.commit()
-                conn.close()
-                return False
+    if pid:
+        try:
+            if os.name == 'nt':
+                result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}'], 
+                                    capture_output=True, text=True, timeout=2)
+                return str(pid) in result.stdout
+            os.kill(pid, 0)
+        except (ProcessLookupError, subprocess.TimeoutExpired, PermissionError):
+            return False
     
     return True
 
+def _read_tail(f, size, max_lines):
+    """Membaca max_lines baris terakhir dengan seek mundur per blok dari akhir file."""
+    block = 8192
+    pos = size
+    data = b""
+    while pos > 0 and data.count(b"\n") <= max_lines:
+        step = min(block, pos)
+        pos -= step
+        f.seek(pos)
+        data = f.read(step) + data
+    lines = data.splitlines(keepends=True)
+    if pos > 0:
+        lines = lines[1:]
+    return b"".join(lines[-max_lines:])
+
+def tail_logs(task_id: int, offset=None, max_lines=LOG_TAIL_LINES):
+    """Membaca log secara incremental.
+
+    Tanpa offset: max_lines baris terakhir. Dengan offset: hanya byte yang ditambahkan
+    sejak offset tersebut (dipotong di baris utuh terakhir). Jika file mengecil (clear/rotasi)
+    atau ketinggalan lebih dari LOG_TAIL_MAX_BYTES, kembali ke mode tail dengan reset=True.
+    """
+    log_path = get_log_path(task_id)
+    if not os.path.exists(log_path):
+        return {"text": "", "offset": 0, "reset": offset is not None and offset > 0}
+
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        reset = offset is None or offset > size or size - offset > LOG_TAIL_MAX_BYTES
+        if reset:
+            data = _read_tail(f, size, max_lines)
+            new_offset = size
+        else:
+            f.seek(offset)
+            data = f.read(size - offset)
+            end = data.rfind(b"\n") + 1
+            data = data[:end]
+            new_offset = offset + end
+
+    return {"text": data.decode("utf-8", errors="replace"), "offset": new_offset, "reset": reset and offset is not None}
+
 def get_logs(task_id: int):
-    log_path = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "logs", f"task_{task_id}.log")
-    if os.path.exists(log_path):
-        with open(log_path, "r", encoding="utf-8", errors='replace') as f:
-            lines = f.readlines()
-            return "".join(lines[-200:])
-    return "No logs found."
+    text = tail_logs(task_id)["text"]
+    return text if text or os.path.exists(get_log_path(task_id)) else "No logs found."
+
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+
+def read_json_cached(file_path):
+    """Membaca file JSON dengan cache in-memory yang di-key mtime+size file.
+
+    Worker menulis snapshot secara atomik (rename), sehingga mtime/size berubah setiap
+    kali isi file berubah dan dashboard tidak perlu parse ulang di setiap request.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        with _json_cache_lock:
+            _json_cache.pop(file_path, None)
+        return None
+
+    key = (st.st_mtime_ns, st.st_size)
+    with _json_cache_lock:
+        cached = _json_cache.get(file_path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    with _json_cache_lock:
+        _json_cache[file_path] = (key, data)
+    return data
 
 def get_last_values(task_id: int):
-    file_path = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value", f"last_values_{task_id}.json")
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return None
-    return None
+    return read_json_cached(os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value", f"last_values_{task_id}.json"))
+
+def get_stats(task_id: int):
+    return read_json_cached(os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value", f"stats_{task_id}.json"))
 
 def clear_logs(task_id: int):
     try:
-        log_path = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "logs", f"task_{task_id}.log")
+        log_path = get_log_path(task_id)
         if os.path.exists(log_path):
             with open(log_path, 'w') as f:
                 pass
+        delete_archives(task_id)
         return True, "Logs cleared"
     except Exception as e:
         return False, str(e)
@@ -207,15 +330,22 @@ def clear_data(task_id: int):
         return False, str(e)
 
 def cleanup_task_files(task_id: int):
-    """Deletes json data and log files associated with the task."""
+    """Deletes json data, log files and history associated with the task."""
     try:
+        history_store.delete_history(task_id)
+
         json_path = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value", f"last_values_{task_id}.json")
         if os.path.exists(json_path):
             os.remove(json_path)
+
+        stats_path = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value", f"stats_{task_id}.json")
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
             
-        log_path = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "logs", f"task_{task_id}.log")
+        log_path = get_log_path(task_id)
         if os.path.exists(log_path):
             os.remove(log_path)
+        delete_archives(task_id)
             
         return True
     except Exception as e:
@@ -231,36 +361,21 @@ def run_process_once(task_id: int):
     if not task:
         return False, "Task not found"
         
+    if engine:
+        if engine.is_running(task_id):
+            return False, "Task is currently running. Please stop it first."
+        try:
+            if not engine.run_once(task_id, build_task_env(task, interval=0), get_log_path(task_id)):
+                return False, "Refresh timed out"
+            return True, "Data refreshed successfully"
+        except Exception as e:
+            return False, str(e)
+        
     if task_id in active_processes and active_processes[task_id].poll() is None:
         return False, "Task is currently running. Please stop it first."
 
-    env = os.environ.copy()
-    env["LOGIN_ID"] = task['login_id']
-    env["PASSWORD"] = task['password']
-    
-    if task['chat_id']:
-        env["CHAT_ID"] = task['chat_id']
-    if task['whatsapp_number']:
-        env["WHATSAPP_NUMBER"] = task['whatsapp_number']
-        
-    waha_key = os.getenv("WAHA_API_KEY")
-    if waha_key:
-        env["WAHA_API_KEY"] = waha_key
-
-    if task['monitor_type']:
-        env["MONITOR_TYPE"] = task['monitor_type']
-    if task['target_courses']:
-        env["TARGET_COURSES"] = task['target_courses']
-    if task['target_semester_code']:
-        env["TARGET_SEMESTER_CODE"] = task['target_semester_code']
-    env["INTERVAL"] = "0"
-    env["PYTHONIOENCODING"] = "utf-8"
-    
-    data_dir = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "value")
-    env["FILE_DATA"] = os.path.join(data_dir, f"last_values_{task_id}.json")
-    
-    log_dir = os.path.join(os.path.dirname(SCRIPT_PATH), "data", "logs")
-    log_path = os.path.join(log_dir, f"task_{task_id}.log")
+    env = build_task_env(task, interval=0)
+    log_path = get_log_path(task_id)
     
     try:
         log_file = open(log_path, "a", encoding="utf-8")
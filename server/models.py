@@ -28,6 +28,8 @@ class TaskCreate(BaseModel):
     monitor_type: str = 'nilai'
     target_courses: Optional[str] = None
     whatsapp_number: Optional[str] = None
+    min_interval: Optional[int] = None
+    max_interval: Optional[int] = None
 
 class TaskUpdate(BaseModel):
     name: Optional[str] = None
@@ -39,6 +41,8 @@ class TaskUpdate(BaseModel):
     monitor_type: Optional[str] = None
     target_courses: Optional[str] = None
     whatsapp_number: Optional[str] = None
+    min_interval: Optional[int] = None
+    max_interval: Optional[int] = None
 
 class TaskResponse(BaseModel):
     id: int
@@ -50,3 +54,5 @@ class TaskResponse(BaseModel):
     pid: Optional[int]
     monitor_type: str
     target_courses: Optional[str]
+    min_interval: Optional[int] = None
+    max_interval: Optional[int] = None
@@ -0,0 +1,180 @@
+"""Worker pool untuk menjalankan task secara sharded (ENGINE_MODE=pool).
+
+Jalan tengah antara mode subprocess dan mode asyncio:
+- Sejumlah worker process tetap (default satu per core) yang hidup selama server berjalan
+- Setiap worker menjalankan AsyncEngine untuk shard task miliknya
+- Start/Stop task dikirim sebagai pesan IPC (multiprocessing.Queue), bukan spawn/kill proses
+- Rebalancing dilakukan saat task (re)start: task baru, task yang di-start ulang, dan task
+  dari worker yang mati ditempatkan ke shard paling ringan. Task yang sedang berjalan tidak
+  dipindah (memindah berarti start ulang: login, fetch semester, dan notifikasi "Bot Aktif" lagi)
+- Worker yang mati di-spawn ulang dan task-nya dijalankan kembali
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from .engine import AsyncEngine
+
+POOL_WORKERS = int(os.getenv("POOL_WORKERS", 0)) or os.cpu_count() or 1
+
+def _worker_main(commands, events):
+    """Entry point worker process: menjalankan perintah manager di AsyncEngine lokal."""
+    engine = AsyncEngine(on_exit=lambda task_id, tag: events.put(("exited", task_id, tag)))
+
+    def run_once(task_id, env, log_path, tag):
+        try:
+            ok = engine.run_once(task_id, env, log_path)
+        except Exception:
+            ok = False
+        events.put(("once_done", task_id, tag, ok))
+
+    while True:
+        msg = commands.get()
+        action = msg[0]
+
+        if action == "start":
+            _, task_id, env, log_path, tag = msg
+            engine.start(task_id, env, log_path, tag)
+        elif action == "stop":
+            engine.stop(msg[1])
+        elif action == "run_once":
+            threading.Thread(target=run_once, args=msg[1:], daemon=True).start()
+        elif action == "shutdown":
+            break
+
+class WorkerPool:
+    """Mengelola worker process dan pembagian task ke setiap shard."""
+
+    def __init__(self, size=POOL_WORKERS):
+        self.size = size
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = None
+        self._shards = []
+        self._assignment = {}
+        self._specs = {}
+        self._pending_once = {}
+        self._tags = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._shards:
+                return
+
+            self._events = self._ctx.Queue()
+            self._shards = [self._spawn_shard(i) for i in range(self.size)]
+            threading.Thread(target=self._listen, name="pool-listener", daemon=True).start()
+
+    def _spawn_shard(self, index):
+        commands = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(commands, self._events),
+            name=f"siakang-worker-{index}",
+            daemon=True
+        )
+        proc.start()
+        return {"process": proc, "commands": commands}
+
+    def _load(self):
+        counts = [0] * self.size
+        for index in self._assignment.values():
+            counts[index] += 1
+        return counts
+
+    def _least_loaded(self):
+        counts = self._load()
+        return min(range(self.size), key=counts.__getitem__)
+
+    def _dispatch(self, index, task_id, env, log_path):
+        tag = next(self._tags)
+        self._assignment[task_id] = index
+        self._specs[task_id] = (env, log_path, tag)
+        self._shards[index]["commands"].put(("start", task_id, env, log_path, tag))
+
+    def _check_shards(self):
+        with self._lock:
+            orphaned = []
+            for index, shard in enumerate(self._shards):
+                if shard["process"].is_alive():
+                    continue
+
+                print(f"[WARNING] Worker {index} mati (exit code {shard['process'].exitcode}), menjalankan ulang...")
+                self._shards[index] = self._spawn_shard(index)
+                for task_id, assigned in list(self._assignment.items()):
+                    if assigned == index:
+                        del self._assignment[task_id]
+                        orphaned.append(task_id)
+
+            # Task dari worker yang mati dijalankan ulang di shard paling ringan, bukan otomatis
+            # di shard pengganti, sehingga beban tetap rata
+            for task_id in orphaned:
+                env, log_path, _ = self._specs[task_id]
+                self._dispatch(self._least_loaded(), task_id, env, log_path)
+
+    def _listen(self):
+        while True:
+            try:
+                event = self._events.get(timeout=5)
+            except queue.Empty:
+                event = None
+
+            if event and event[0] == "exited":
+                _, task_id, tag = event
+                with self._lock:
+                    spec = self._specs.get(task_id)
+                    if spec and spec[2] == tag:
+                        self._assignment.pop(task_id, None)
+                        self._specs.pop(task_id, None)
+            elif event and event[0] == "once_done":
+                _, task_id, tag, ok = event
+                pending = self._pending_once.pop(tag, None)
+                if pending:
+                    pending[1] = ok
+                    pending[0].set()
+
+            self._check_shards()
+
+    def is_running(self, task_id: int):
+        return task_id in self._assignment
+
+    def running_ids(self):
+        return list(self._assignment)
+
+    def pid(self, task_id: int):
+        index = self._assignment.get(task_id)
+        return self._shards[index]["process"].pid if index is not None else None
+
+    def start(self, task_id: int, env: dict, log_path: str):
+        """Menempatkan task ke shard paling ringan. Mengembalikan False jika task sudah berjalan."""
+        self._ensure_started()
+        with self._lock:
+            if task_id in self._assignment:
+                return False
+            self._dispatch(self._least_loaded(), task_id, env, log_path)
+            return True
+
+    def stop(self, task_id: int):
+        with self._lock:
+            index = self._assignment.pop(task_id, None)
+            self._specs.pop(task_id, None)
+            if index is None:
+                return False
+            self._shards[index]["commands"].put(("stop", task_id))
+            return True
+
+    def run_once(self, task_id: int, env: dict, log_path: str, timeout=60):
+        """Menjalankan satu siklus task di shard paling ringan dan menunggu hasilnya."""
+        self._ensure_started()
+        pending = [threading.Event(), False]
+        with self._lock:
+            tag = next(self._tags)
+            self._pending_once[tag] = pending
+            self._shards[self._least_loaded()]["commands"].put(("run_once", task_id, env, log_path, tag))
+
+        if not pending[0].wait(timeout):
+            self._pending_once.pop(tag, None)
+            return False
+        return pending[1]
@@ -0,0 +1,506 @@
+"""State bersama antar worker untuk Monitoring Akademik Siakang.
+
+Worker bisa berjalan sebagai subprocess terpisah, coroutine di proses server, atau
+di worker pool, sehingga state yang harus berlaku untuk seluruh deployment disimpan
+di SQLite (data/db/shared.db) yang bisa diakses semua proses.
+
+Fitur:
+- TokenBucket: Rate limit global per host/channel yang dibagi semua task
+- CircuitBreaker: Status closed/open/half-open per host yang dibagi semua task
+- Session Store: Cookie login tersimpan agar worker tidak perlu login ulang setelah restart
+- Semester Cache: Daftar semester per akun yang dipakai bersama API dan worker
+- Notification Outbox: Antrian notifikasi durable yang dikirim oleh notifier.NotificationDispatcher
+- KRS Search Cache: Hasil pencarian matkul KRS yang dibagi antar akun (single-flight per matkul)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'db')
+SHARED_DB_PATH = os.path.join(DATA_DIR, "shared.db")
+
+_local = threading.local()
+
+def get_shared_connection():
+    """Koneksi SQLite per thread ke shared.db (autocommit, transaksi eksplisit)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        conn = sqlite3.connect(SHARED_DB_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute('''CREATE TABLE IF NOT EXISTS token_buckets
+                    (name TEXT PRIMARY KEY,
+                    tokens REAL,
+                    updated_at REAL)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS sessions
+                    (key TEXT PRIMARY KEY,
+                    cookies TEXT,
+                    saved_at REAL,
+                    expires_at REAL)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS semester_cache
+                    (key TEXT PRIMARY KEY,
+                    semesters TEXT,
+                    complete INTEGER,
+                    fetched_at REAL)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS krs_search_cache
+                    (key TEXT PRIMARY KEY,
+                    found INTEGER,
+                    checked_at REAL DEFAULT 0,
+                    probe_until REAL DEFAULT 0)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS notification_outbox
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT,
+                    target TEXT,
+                    payload TEXT,
+                    status TEXT DEFAULT 'pending',
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL,
+                    lease_until REAL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL)''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_outbox_pending
+                    ON notification_outbox (status, channel, target, id)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS circuit_breakers
+                    (name TEXT PRIMARY KEY,
+                    state TEXT DEFAULT 'closed',
+                    window_start REAL DEFAULT 0,
+                    requests INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    opened_at REAL DEFAULT 0,
+                    probe_until REAL DEFAULT 0,
+                    trips INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    updated_at REAL)''')
+        _local.conn = conn
+    return conn
+
+def save_session(key, cookies, expires_at):
+    """Menyimpan cookie jar (JSON) beserta waktu kedaluwarsanya."""
+    get_shared_connection().execute(
+        "INSERT OR REPLACE INTO sessions (key, cookies, saved_at, expires_at) VALUES (?, ?, ?, ?)",
+        (key, cookies, time.time(), expires_at)
+    )
+
+def load_session(key):
+    """Mengambil cookie jar (JSON) yang masih berlaku, atau None."""
+    conn = get_shared_connection()
+    row = conn.execute("SELECT cookies, expires_at FROM sessions WHERE key = ?", (key,)).fetchone()
+    if not row:
+        return None
+    if row['expires_at'] <= time.time():
+        delete_session(key)
+        return None
+    return row['cookies']
+
+def delete_session(key):
+    get_shared_connection().execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+def save_semesters(key, semesters, complete):
+    """Menyimpan daftar semester (JSON). complete=False untuk hasil pagination yang dihentikan lebih awal."""
+    get_shared_connection().execute(
+        "INSERT OR REPLACE INTO semester_cache (key, semesters, complete, fetched_at) VALUES (?, ?, ?, ?)",
+        (key, semesters, 1 if complete else 0, time.time())
+    )
+
+def load_semesters(key, max_age):
+    """Mengambil (semesters JSON, complete) yang umurnya belum lewat max_age detik, atau None."""
+    row = get_shared_connection().execute(
+        "SELECT semesters, complete FROM semester_cache WHERE key = ? AND fetched_at > ?",
+        (key, time.time() - max_age)
+    ).fetchone()
+    if not row:
+        return None
+    return row['semesters'], bool(row['complete'])
+
+def claim_krs_searches(keys, ttl, lease):
+    """Menentukan nasib pencarian setiap key KRS dalam satu transaksi.
+
+    Returns:
+        dict key -> ("hit", found) jika hasil masih segar, ("wait", None) jika proses lain
+        sedang mencari key tersebut, atau ("probe", None) jika pemanggil harus mencarinya
+        (key langsung disewa selama lease detik agar task lain menunggu hasilnya).
+    """
+    conn = get_shared_connection()
+    now = time.time()
+    decisions = {}
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for key in keys:
+            row = conn.execute("SELECT found, checked_at, probe_until FROM krs_search_cache WHERE key = ?", (key,)).fetchone()
+            if row and row['checked_at'] > now - ttl:
+                decisions[key] = ("hit", bool(row['found']))
+            elif row and row['probe_until'] > now:
+                decisions[key] = ("wait", None)
+            else:
+                conn.execute(
+                    "INSERT INTO krs_search_cache (key, found, checked_at, probe_until) VALUES (?, 0, 0, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET probe_until = excluded.probe_until",
+                    (key, now + lease)
+                )
+                decisions[key] = ("probe", None)
+        conn.execute("COMMIT")
+        return decisions
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def store_krs_searches(results):
+    """Menyimpan hasil pencarian {key: found} dan melepas sewanya."""
+    now = time.time()
+    get_shared_connection().executemany(
+        "INSERT OR REPLACE INTO krs_search_cache (key, found, checked_at, probe_until) VALUES (?, ?, ?, 0)",
+        [(key, 1 if found else 0, now) for key, found in results.items()]
+    )
+
+def release_krs_searches(keys):
+    """Melepas sewa pencarian yang gagal agar task lain bisa langsung mencoba."""
+    get_shared_connection().executemany(
+        "UPDATE krs_search_cache SET probe_until = 0 WHERE key = ?", [(key,) for key in keys]
+    )
+
+def load_krs_searches(keys, ttl):
+    """Hasil pencarian yang masih segar untuk keys, {key: found}."""
+    conn = get_shared_connection()
+    since = time.time() - ttl
+    results = {}
+    for key in keys:
+        row = conn.execute("SELECT found FROM krs_search_cache WHERE key = ? AND checked_at > ?", (key, since)).fetchone()
+        if row:
+            results[key] = bool(row['found'])
+    return results
+
+def enqueue_notification(channel, target, payload, delay=0):
+    """Menambahkan notifikasi (payload JSON) ke outbox, siap dikirim setelah delay detik. Mengembalikan id baris."""
+    now = time.time()
+    cur = get_shared_connection().execute(
+        "INSERT INTO notification_outbox (channel, target, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+        (channel, target, payload, now + delay, now)
+    )
+    return cur.lastrowid
+
+def claim_notifications(limit, lease):
+    """Mengambil notifikasi yang siap dikirim dan menyewanya selama lease detik.
+
+    Hanya pesan terlama per (channel, target) yang diambil agar urutan pesan ke satu chat
+    tetap terjaga, dan sewa mencegah dispatcher lain mengirim pesan yang sama.
+    """
+    conn = get_shared_connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            """SELECT * FROM notification_outbox n
+               WHERE status = 'pending' AND next_attempt_at <= ? AND lease_until <= ?
+               AND id = (SELECT MIN(id) FROM notification_outbox m
+                         WHERE m.status = 'pending' AND m.channel = n.channel AND m.target = n.target)
+               ORDER BY id LIMIT ?""",
+            (now, now, limit)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE notification_outbox SET lease_until = ? WHERE id = ?",
+            [(now + lease, row['id']) for row in rows]
+        )
+        conn.execute("COMMIT")
+        return rows
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def claim_following_notifications(channel, target, after_id, lease, accept):
+    """Menyewa pesan pending berikutnya untuk chat yang sama selama accept(row) bernilai True.
+
+    Dipakai untuk menggabungkan pesan digest; berhenti di pesan pertama yang tidak diterima
+    agar urutan pesan ke chat tersebut tetap terjaga.
+    """
+    conn = get_shared_connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            """SELECT * FROM notification_outbox
+               WHERE status = 'pending' AND channel = ? AND target = ? AND id > ? AND lease_until <= ?
+               ORDER BY id""",
+            (channel, target, after_id, now)
+        ).fetchall()
+        taken = []
+        for row in rows:
+            if not accept(row):
+                break
+            taken.append(row)
+        conn.executemany(
+            "UPDATE notification_outbox SET lease_until = ? WHERE id = ?",
+            [(now + lease, row['id']) for row in taken]
+        )
+        conn.execute("COMMIT")
+        return taken
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def complete_notification(notification_id):
+    get_shared_connection().execute("DELETE FROM notification_outbox WHERE id = ?", (notification_id,))
+
+def retry_notification(notification_id, next_attempt_at, error):
+    get_shared_connection().execute(
+        "UPDATE notification_outbox SET attempts = attempts + 1, next_attempt_at = ?, lease_until = 0, last_error = ? WHERE id = ?",
+        (next_attempt_at, error, notification_id)
+    )
+
+def defer_notification(notification_id, next_attempt_at):
+    """Menunda notifikasi tanpa menghitungnya sebagai percobaan (mis. menunggu rate limit)."""
+    get_shared_connection().execute(
+        "UPDATE notification_outbox SET next_attempt_at = ?, lease_until = 0 WHERE id = ?",
+        (next_attempt_at, notification_id)
+    )
+
+def fail_notification(notification_id, error):
+    """Menandai notifikasi gagal permanen (tetap disimpan untuk diperiksa)."""
+    get_shared_connection().execute(
+        "UPDATE notification_outbox SET status = 'failed', attempts = attempts + 1, lease_until = 0, last_error = ? WHERE id = ?",
+        (error, notification_id)
+    )
+
+def count_pending_notifications():
+    row = get_shared_connection().execute("SELECT COUNT(*) FROM notification_outbox WHERE status = 'pending'").fetchone()
+    return row[0]
+
+class TokenBucket:
+    """Token bucket yang dibagi seluruh proses melalui shared.db.
+
+    Args:
+        name: Kunci bucket, mis. nama host
+        rate: Jumlah token yang diisi ulang per detik
+        capacity: Jumlah token maksimum (burst)
+    """
+
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+
+    def _try_take(self, tokens):
+        """Mengambil token jika tersedia. Mengembalikan lama tunggu (0 jika berhasil)."""
+        conn = get_shared_connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (self.name,)).fetchone()
+            available = self.capacity
+            if row:
+                available = min(self.capacity, row['tokens'] + max(0.0, now - row['updated_at']) * self.rate)
+
+            wait = 0.0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / self.rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, available, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def try_acquire(self, tokens=1):
+        """Mengambil token tanpa menunggu. Mengembalikan lama tunggu yang dibutuhkan (0 jika berhasil)."""
+        if self.rate <= 0:
+            return 0.0
+        return self._try_take(tokens)
+
+    def refund(self, tokens=1):
+        """Mengembalikan token yang sudah diambil tetapi tidak dipakai (dibatasi capacity)."""
+        if self.rate <= 0:
+            return
+        conn = get_shared_connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (self.name,)).fetchone()
+            if row:
+                available = min(self.capacity, row['tokens'] + max(0.0, now - row['updated_at']) * self.rate + tokens)
+                conn.execute(
+                    "UPDATE token_buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                    (available, now, self.name)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def pause(self, seconds):
+        """Mengosongkan bucket sampai seconds detik ke depan (mis. retry_after dari HTTP 429)."""
+        get_shared_connection().execute(
+            "INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+            (self.name, -seconds * self.rate, time.time())
+        )
+
+    def acquire(self, tokens=1):
+        """Menunggu sampai token tersedia lalu mengambilnya. Mengembalikan total waktu tunggu."""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+class CircuitBreaker:
+    """Circuit breaker yang dibagi seluruh proses melalui shared.db.
+
+    - closed: request berjalan normal; kegagalan (error koneksi, 5xx/429, atau respon
+      lebih lambat dari slow_threshold) dihitung per jendela `window` detik. Jika minimal
+      min_requests request dan rasio gagal >= error_rate, circuit menjadi open.
+    - open: semua request ditolak selama open_seconds detik.
+    - half_open: setelah open_seconds, tepat satu pemanggil mendapat izin probe (disewa
+      probe_lease detik). Probe sukses menutup circuit, probe gagal membukanya lagi.
+    """
+
+    def __init__(self, name, error_rate=0.5, min_requests=10, window=60, slow_threshold=15,
+                 open_seconds=30, probe_lease=60):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.slow_threshold = slow_threshold
+        self.open_seconds = open_seconds
+        self.probe_lease = probe_lease
+
+    def _row(self, conn):
+        return conn.execute("SELECT * FROM circuit_breakers WHERE name = ?", (self.name,)).fetchone()
+
+    def _probe_ready(self, row, now):
+        return now >= row['opened_at'] + self.open_seconds and row['probe_until'] <= now
+
+    def would_allow(self):
+        """Cek tanpa efek samping: True jika request berikutnya boleh dicoba (closed atau probe tersedia)."""
+        row = self._row(get_shared_connection())
+        return not row or row['state'] == 'closed' or self._probe_ready(row, time.time())
+
+    def allow(self):
+        """Meminta izin request. Mengembalikan "closed", "probe" (pemanggil menjadi satu-satunya
+        probe), atau None jika request harus ditolak."""
+        conn = get_shared_connection()
+        row = self._row(conn)
+        if not row or row['state'] == 'closed':
+            return "closed"
+
+        now = time.time()
+        if not self._probe_ready(row, now):
+            return None
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._row(conn)
+            if row['state'] == 'closed':
+                conn.execute("COMMIT")
+                return "closed"
+            if not self._probe_ready(row, now):
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE circuit_breakers SET state = 'half_open', probe_until = ?, updated_at = ? WHERE name = ?",
+                (now + self.probe_lease, now, self.name)
+            )
+            conn.execute("COMMIT")
+            return "probe"
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record(self, ok, elapsed, ticket="closed", error=None):
+        """Mencatat hasil request yang diizinkan allow(). Mengembalikan state baru jika berubah, selain itu None."""
+        failed = not ok or elapsed > self.slow_threshold
+        if failed and error is None:
+            error = f"Respon lambat ({elapsed:.1f}s)"
+
+        conn = get_shared_connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._row(conn)
+            state = row['state'] if row else 'closed'
+            trips = row['trips'] if row else 0
+            transition = None
+
+            if ticket == "probe":
+                if failed:
+                    state, transition, trips = 'open', 'open', trips + 1
+                    conn.execute(
+                        "UPDATE circuit_breakers SET state = 'open', opened_at = ?, probe_until = 0, trips = ?, "
+                        "last_error = ?, updated_at = ? WHERE name = ?",
+                        (now, trips, error, now, self.name)
+                    )
+                else:
+                    transition = 'closed'
+                    conn.execute(
+                        "UPDATE circuit_breakers SET state = 'closed', window_start = ?, requests = 0, failures = 0, "
+                        "probe_until = 0, updated_at = ? WHERE name = ?",
+                        (now, now, self.name)
+                    )
+            elif state == 'closed':
+                # Respon dari request yang dimulai sebelum circuit terbuka tidak dihitung lagi
+                window_start = row['window_start'] if row else now
+                requests_count = row['requests'] if row else 0
+                failures = row['failures'] if row else 0
+                if now - window_start > self.window:
+                    window_start, requests_count, failures = now, 0, 0
+                requests_count += 1
+                failures += 1 if failed else 0
+
+                opened_at = row['opened_at'] if row else 0
+                if requests_count >= self.min_requests and failures / requests_count >= self.error_rate:
+                    state, transition, trips, opened_at = 'open', 'open', trips + 1, now
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO circuit_breakers (name, state, window_start, requests, failures, opened_at, "
+                    "probe_until, trips, last_error, updated_at) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                    (self.name, state, window_start, requests_count, failures, opened_at, trips,
+                     error if failed else (row['last_error'] if row else None), now)
+                )
+            conn.execute("COMMIT")
+            return transition
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reset(self):
+        """Menutup circuit secara manual."""
+        get_shared_connection().execute("DELETE FROM circuit_breakers WHERE name = ?", (self.name,))
+
+    def state(self):
+        row = self._row(get_shared_connection())
+        return circuit_state(row, self.open_seconds) if row else {
+            "name": self.name, "state": "closed", "requests": 0, "failures": 0, "error_rate": 0.0,
+            "opened_at": None, "retry_at": None, "trips": 0, "last_error": None
+        }
+
+def circuit_state(row, open_seconds):
+    """Bentuk dict status circuit untuk API."""
+    requests_count = row['requests'] or 0
+    is_closed = row['state'] == 'closed'
+    return {
+        "name": row['name'],
+        "state": row['state'],
+        "requests": requests_count,
+        "failures": row['failures'] or 0,
+        "error_rate": round((row['failures'] or 0) / requests_count, 3) if requests_count else 0.0,
+        "opened_at": None if is_closed else row['opened_at'],
+        "retry_at": None if is_closed else max(row['opened_at'] + open_seconds, row['probe_until']),
+        "trips": row['trips'],
+        "last_error": row['last_error']
+    }
+
+def list_circuits(open_seconds):
+    rows = get_shared_connection().execute("SELECT * FROM circuit_breakers ORDER BY name").fetchall()
+    return [circuit_state(row, open_seconds) for row in rows]
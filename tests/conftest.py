@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Module worker ada di root repo (bukan package), sama seperti saat dijalankan oleh server
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shared_state
+
+@pytest.fixture
+def shared_db(tmp_path, monkeypatch):
+    """shared.db sementara per test; koneksi per thread dibuat ulang."""
+    monkeypatch.setattr(shared_state, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(shared_state, "SHARED_DB_PATH", str(tmp_path / "shared.db"))
+    monkeypatch.setattr(shared_state, "_local", threading.local())
+    return tmp_path
+
+class StubServer:
+    """Server HTTP lokal. respond(method, path, body) mengembalikan (status, body bytes/dict)."""
+
+    def __init__(self):
+        self.hits = []
+        self.respond = lambda method, path, body: (200, b"ok")
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.hits.append((time.monotonic(), self.command, self.path, body))
+                status, payload = stub.respond(self.command, self.path, body)
+                if isinstance(payload, dict):
+                    payload = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
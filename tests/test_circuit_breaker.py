@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import scraper_lib
+import shared_state
+
+OPEN_SECONDS = 0.5
+
+def breaker():
+    return shared_state.CircuitBreaker("stub", min_requests=5, window=60, open_seconds=OPEN_SECONDS, probe_lease=5)
+
+@pytest.fixture
+def switchable(stub_server):
+    """Stub yang menjawab 200 atau 503 sesuai state["status"], setelah jeda state["delay"] detik."""
+    state = {"status": 200, "delay": 0}
+
+    def respond(method, path, body):
+        time.sleep(state["delay"])
+        return state["status"], b"x"
+
+    stub_server.respond = respond
+    return state
+
+def get(url):
+    session = requests.Session()
+    adapter = scraper_lib.CircuitBreakerAdapter(breaker())
+    session.mount(url, adapter)
+    try:
+        return session.get(url + "/").status_code
+    except scraper_lib.CircuitOpenError:
+        return "rejected"
+
+def concurrent_get(url, callers=20):
+    results = [None] * callers
+    barrier = threading.Barrier(callers)
+
+    def call(i):
+        barrier.wait()
+        results[i] = get(url)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def state():
+    return breaker().state()["state"]
+
+def test_healthy_server_keeps_circuit_closed(shared_db, stub_server, switchable):
+    assert [get(stub_server.url) for _ in range(10)] == [200] * 10
+    assert state() == "closed"
+
+def test_failures_open_circuit_and_reject_locally(shared_db, stub_server, switchable):
+    switchable["status"] = 503
+    results = [get(stub_server.url) for _ in range(8)]
+
+    assert results == [503] * 5 + ["rejected"] * 3
+    assert len(stub_server.hits) == 5
+    assert state() == "open"
+
+def test_half_open_allows_single_probe(shared_db, stub_server, switchable):
+    switchable["status"] = 503
+    for _ in range(5):
+        get(stub_server.url)
+    assert state() == "open"
+
+    # Server masih gagal: dari 20 pemanggil bersamaan hanya satu probe yang sampai ke server.
+    # Probe ditahan di stub agar semua pemanggil datang selama probe berjalan, bukan setelahnya
+    switchable["delay"] = 0.5
+    time.sleep(OPEN_SECONDS + 0.1)
+    stub_server.hits.clear()
+    results = concurrent_get(stub_server.url)
+    assert len(stub_server.hits) == 1
+    assert sorted(map(str, results)) == ["503"] + ["rejected"] * 19
+    assert state() == "open"
+
+    # Server pulih: satu probe lagi menutup circuit, lalu request berjalan normal
+    switchable["status"] = 200
+    time.sleep(OPEN_SECONDS + 0.1)
+    stub_server.hits.clear()
+    results = concurrent_get(stub_server.url)
+    assert len(stub_server.hits) == 1
+    assert results.count(200) == 1
+    assert state() == "closed"
+    switchable["delay"] = 0
+    assert [get(stub_server.url) for _ in range(3)] == [200] * 3
+
+def test_reset_closes_open_circuit(shared_db, stub_server, switchable):
+    switchable["status"] = 503
+    for _ in range(5):
+        get(stub_server.url)
+    assert get(stub_server.url) == "rejected"
+
+    breaker().reset()
+    switchable["status"] = 200
+    assert get(stub_server.url) == 200
+
+def test_rejected_counter_is_exact_across_threads(shared_db, stub_server):
+    # Satu session/adapter dipakai bersama seperti thread probe KRS di main._probe_courses
+    adapter = scraper_lib.CircuitBreakerAdapter(breaker())
+    adapter.breaker.allow = lambda: None
+    session = requests.Session()
+    session.mount(stub_server.url, adapter)
+
+    def call(_):
+        for _ in range(200):
+            with pytest.raises(scraper_lib.CircuitOpenError):
+                session.get(stub_server.url + "/")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert adapter.rejected == 8 * 200
+    assert stub_server.hits == []
+    adapter.rejected = 0
+    assert adapter.rejected == 0
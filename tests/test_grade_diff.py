@@ -0,0 +1,95 @@
+import random
+
+import grade_diff
+
+def course(matkul, nilai="---", mutu="---", sks=3):
+    return {"matkul": matkul, "sks": sks, "nilai": nilai, "mutu": mutu}
+
+def keys(courses):
+    return sorted(grade_diff.course_key(c) for c in courses)
+
+COURSES = [
+    course("Algoritma dan Pemrograman", "A", "4.00"),
+    course("Matematika Diskrit", "B+", "3.50"),
+    course("Sistem Digital"),
+    course("Bahasa Inggris", "A-", "3.75", sks=2),
+    course("Kalkulus I"),
+    course("Pendidikan Pancasila", "A", "4.00", sks=2),
+]
+
+def test_identical_snapshots_have_no_changes():
+    diff = grade_diff.diff_courses(COURSES, [dict(c) for c in COURSES])
+    assert diff["added"] == diff["removed"] == diff["changed"] == []
+    assert len(diff["unchanged"]) == len(COURSES)
+
+def test_shuffled_rows_are_not_changes():
+    rng = random.Random(1234)
+    for _ in range(200):
+        shuffled = [dict(c) for c in COURSES]
+        rng.shuffle(shuffled)
+        diff = grade_diff.diff_courses(COURSES, shuffled)
+        assert diff["added"] == diff["removed"] == diff["changed"] == []
+        assert grade_diff.released_grades(diff) == []
+
+def test_shuffle_does_not_change_the_detected_release():
+    rng = random.Random(5678)
+    new = [dict(c) for c in COURSES]
+    new[2] = course("Sistem Digital", "B", "3.00")
+    for _ in range(200):
+        shuffled_old = COURSES[:]
+        shuffled_new = new[:]
+        rng.shuffle(shuffled_old)
+        rng.shuffle(shuffled_new)
+        diff = grade_diff.diff_courses(shuffled_old, shuffled_new)
+        assert [c["key"] for c in diff["changed"]] == ["sistem digital"]
+        assert grade_diff.released_grades(diff) == [new[2]]
+
+def test_name_normalization():
+    old = [course("Kalkulus  I")]
+    new = [course(" kalkulus i ", "A", "4.00")]
+    diff = grade_diff.diff_courses(old, new)
+    assert diff["added"] == diff["removed"] == []
+    assert diff["changed"][0]["key"] == "kalkulus i"
+
+def test_added_course_alerts_only_when_graded():
+    new = COURSES + [course("Statistika", "A", "4.00"), course("Fisika Dasar")]
+    diff = grade_diff.diff_courses(COURSES, new)
+    assert keys(diff["added"]) == ["fisika dasar", "statistika"]
+    assert diff["removed"] == diff["changed"] == []
+    assert grade_diff.released_grades(diff) == [course("Statistika", "A", "4.00")]
+
+def test_removed_course_does_not_shift_other_rows():
+    new = [c for c in COURSES if c["matkul"] != "Matematika Diskrit"]
+    diff = grade_diff.diff_courses(COURSES, new)
+    assert keys(diff["removed"]) == ["matematika diskrit"]
+    assert diff["added"] == diff["changed"] == []
+    assert grade_diff.released_grades(diff) == []
+
+def test_added_and_removed_with_shuffle():
+    rng = random.Random(42)
+    new = [c for c in COURSES if c["matkul"] != "Kalkulus I"] + [course("Kalkulus II", "A", "4.00")]
+    rng.shuffle(new)
+    diff = grade_diff.diff_courses(COURSES, new)
+    assert keys(diff["added"]) == ["kalkulus ii"]
+    assert keys(diff["removed"]) == ["kalkulus i"]
+    assert diff["changed"] == []
+
+def test_duplicate_names_are_matched_by_occurrence():
+    old = [course("Praktikum Basis Data", "C", "2.00"), course("Praktikum Basis Data")]
+    new = [course("Praktikum Basis Data", "C", "2.00"), course("Praktikum Basis Data", "A", "4.00")]
+    diff = grade_diff.diff_courses(old, new)
+    assert diff["added"] == diff["removed"] == []
+    assert len(diff["unchanged"]) == 1
+    assert [(c["old"]["nilai"], c["new"]["nilai"]) for c in diff["changed"]] == [("---", "A")]
+
+def test_duplicate_name_added():
+    old = [course("Praktikum Basis Data", "C", "2.00")]
+    new = old + [course("Praktikum Basis Data", "A", "4.00")]
+    diff = grade_diff.diff_courses(old, new)
+    assert diff["added"] == [new[1]]
+    assert diff["removed"] == diff["changed"] == []
+
+def test_empty_old_snapshot_reports_everything_as_added():
+    diff = grade_diff.diff_courses(None, COURSES)
+    assert len(diff["added"]) == len(COURSES)
+    assert diff["removed"] == diff["changed"] == diff["unchanged"] == []
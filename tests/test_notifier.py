@@ -0,0 +1,101 @@
+import collections
+import json
+
+import notifier
+import shared_state
+
+CHAT_RATE = 1
+GLOBAL_RATE = 30
+
+def run_dispatcher(messages, stub_server, monkeypatch):
+    """Mengirim messages [(chat, text)] lewat dispatcher ke stub Telegram; mengembalikan {chat: [waktu kirim]}."""
+    monkeypatch.setenv("TELEGRAM_TOKEN", "test")
+    monkeypatch.setattr(notifier, "TELEGRAM_API_URL", stub_server.url)
+    monkeypatch.setattr(notifier, "CHANNEL_RATES", {"telegram": (GLOBAL_RATE, CHAT_RATE)})
+    stub_server.respond = lambda method, path, body: (200, {"ok": True})
+
+    for chat, text in messages:
+        notifier.enqueue("telegram", chat, {"text": text})
+
+    dispatcher = notifier.NotificationDispatcher(concurrency=8, poll_interval=0.05).start()
+    try:
+        assert dispatcher.drain(timeout=30)
+    finally:
+        dispatcher.stop()
+
+    sent = collections.defaultdict(list)
+    for at, _, path, body in stub_server.hits:
+        assert path == "/bottest/sendMessage"
+        sent[json.loads(body)["chat_id"]].append(at)
+    return sent
+
+def test_per_chat_rate(shared_db, stub_server, monkeypatch):
+    messages = [(chat, f"pesan {i}") for i in range(3) for chat in ("111", "222")]
+    sent = run_dispatcher(messages, stub_server, monkeypatch)
+
+    assert {chat: len(times) for chat, times in sent.items()} == {"111": 3, "222": 3}
+    for times in sent.values():
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        # Toleransi kecil untuk pembulatan waktu antara shared.db (time.time) dan stub (monotonic)
+        assert min(gaps) >= 1 / CHAT_RATE - 0.05, gaps
+
+def test_global_rate(shared_db, stub_server, monkeypatch):
+    messages = [(str(chat), "pesan") for chat in range(75)]
+    sent = run_dispatcher(messages, stub_server, monkeypatch)
+
+    times = sorted(at for chat_times in sent.values() for at in chat_times)
+    assert len(times) == 75
+    # Kapasitas bucket 1: dalam jendela 1 detik mana pun paling banyak rate + 1 pesan
+    for i, start in enumerate(times):
+        in_window = sum(1 for at in times[i:] if at < start + 1)
+        assert in_window <= GLOBAL_RATE + 1
+    assert times[-1] - times[0] >= (len(times) - 1) / GLOBAL_RATE - 0.1
+
+def test_permanent_error_is_not_retried(shared_db, stub_server, monkeypatch):
+    monkeypatch.setenv("TELEGRAM_TOKEN", "test")
+    monkeypatch.setattr(notifier, "TELEGRAM_API_URL", stub_server.url)
+    stub_server.respond = lambda method, path, body: (400, {"ok": False, "description": "chat not found"})
+
+    notifier.enqueue("telegram", "333", {"text": "pesan"})
+    dispatcher = notifier.NotificationDispatcher(poll_interval=0.05).start()
+    try:
+        assert dispatcher.drain(timeout=10)
+    finally:
+        dispatcher.stop()
+
+    assert len(stub_server.hits) == 1
+    row = shared_state.get_shared_connection().execute("SELECT status FROM notification_outbox").fetchone()
+    assert row["status"] == "failed"
+
+def test_deferral_refunds_global_token(shared_db):
+    bucket = shared_state.TokenBucket("notify:test", 1, 1)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+    bucket.refund()
+    # Token yang dikembalikan langsung bisa dipakai pesan lain, tanpa melebihi kapasitas
+    assert bucket.try_acquire() == 0
+    bucket.refund()
+    bucket.refund()
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+
+def test_retry_after_pauses_every_chat(shared_db, stub_server, monkeypatch):
+    monkeypatch.setenv("TELEGRAM_TOKEN", "test")
+    monkeypatch.setattr(notifier, "TELEGRAM_API_URL", stub_server.url)
+    monkeypatch.setattr(notifier, "CHANNEL_RATES", {"telegram": (GLOBAL_RATE, CHAT_RATE)})
+    responses = [(429, {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 1}})]
+    stub_server.respond = lambda method, path, body: responses.pop() if responses else (200, {"ok": True})
+
+    notifier.enqueue("telegram", "111", {"text": "pesan"})
+    notifier.enqueue("telegram", "222", {"text": "pesan"})
+    dispatcher = notifier.NotificationDispatcher(concurrency=1, poll_interval=0.05).start()
+    try:
+        assert dispatcher.drain(timeout=10)
+    finally:
+        dispatcher.stop()
+
+    (limited_at, _, _, first), *rest = stub_server.hits
+    assert json.loads(first)["chat_id"] == "111"
+    other = [at for at, _, _, body in rest if json.loads(body)["chat_id"] == "222"]
+    # 429 dianggap berlaku untuk seluruh bot: chat lain juga menunggu retry_after
+    assert other and other[0] - limited_at >= 1 - 0.05
@@ -0,0 +1,49 @@
+from server.pool import WorkerPool
+
+class FakeProcess:
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+        self.pid = 0
+
+    def is_alive(self):
+        return self.alive
+
+class FakeQueue(list):
+    put = list.append
+
+def pool(size, monkeypatch):
+    """WorkerPool tanpa worker process sungguhan; perintah ke shard dicatat di shard['commands']."""
+    p = WorkerPool(size)
+    monkeypatch.setattr(p, "_spawn_shard", lambda index: {"process": FakeProcess(), "commands": FakeQueue()})
+    p._shards = [p._spawn_shard(i) for i in range(size)]
+    monkeypatch.setattr(p, "_ensure_started", lambda: None)
+    return p
+
+def test_new_tasks_go_to_least_loaded_shard(monkeypatch):
+    p = pool(3, monkeypatch)
+    for task_id in range(1, 7):
+        assert p.start(task_id, {}, "log")
+    assert p._load() == [2, 2, 2]
+
+    for task_id in [t for t, index in p._assignment.items() if index == 0]:
+        p.stop(task_id)
+    assert p.start(7, {}, "log")
+    assert p._assignment[7] == 0
+
+def test_tasks_of_dead_shard_are_spread_over_least_loaded(monkeypatch):
+    p = pool(3, monkeypatch)
+    for task_id in range(1, 7):
+        p.start(task_id, {}, "log")
+    # Shard 1 dan 2 kosong, shard 0 memegang dua task lalu mati
+    for task_id in [t for t, index in p._assignment.items() if index != 0]:
+        p.stop(task_id)
+    orphaned = set(p._assignment)
+
+    p._shards[0]["process"].alive = False
+    p._check_shards()
+
+    assert set(p._assignment) == orphaned
+    assert sorted(p._load()) == [0, 1, 1]
+    restarted = {msg[1] for shard in p._shards for msg in shard["commands"] if msg[0] == "start"}
+    assert restarted >= orphaned
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import main
+
+# Login dan notifikasi yang sempat dilakukan worker
+calls = []
+
+def worker(tmp_path, **env):
+    w = main.MonitorWorker({
+        "LOGIN_ID": "x", "PASSWORD": "y", "TASK_ID": "1",
+        "FILE_DATA": str(tmp_path / "data.json"), **env
+    })
+    w.send_notification = lambda *args, **kwargs: calls.append("notify")
+    w.restore_session = lambda: False
+    w.do_login = lambda: calls.append("login") or True
+    w.persist_session = lambda: None
+    return w
+
+def run_start(w):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(ok=w.start()), daemon=True)
+    thread.start()
+    return thread, result
+
+def test_stop_while_circuit_open_ends_start(shared_db, tmp_path):
+    calls.clear()
+    w = worker(tmp_path)
+    w.circuit.breaker.would_allow = lambda: False
+    thread, result = run_start(w)
+
+    time.sleep(0.2)
+    started = time.monotonic()
+    w.stop_event.set()
+    thread.join(2)
+
+    assert not thread.is_alive()
+    assert time.monotonic() - started < 1
+    assert result["ok"] is False
+    assert calls == []
+
+def test_circuit_wait_is_bounded(shared_db, tmp_path):
+    calls.clear()
+    w = worker(tmp_path, START_MAX_WAIT="0.3")
+    w.circuit.breaker.would_allow = lambda: False
+    thread, result = run_start(w)
+    thread.join(3)
+
+    assert not thread.is_alive()
+    assert result["ok"] is False
+    assert calls == []
+
+def test_empty_semester_list_with_target_is_bounded(shared_db, tmp_path):
+    calls.clear()
+    w = worker(tmp_path, START_MAX_WAIT="0.3", TARGET_SEMESTER_CODE="20251", INTERVAL_MIN="1")
+    w.load_semesters = lambda: []
+    thread, result = run_start(w)
+    thread.join(3)
+
+    assert not thread.is_alive()
+    assert result["ok"] is False
+    # Login sudah terjadi, tetapi task tidak diam-diam memantau semester default
+    assert calls == ["login"]
+
+def test_stop_during_login_skips_active_notification(shared_db, tmp_path):
+    calls.clear()
+    w = worker(tmp_path)
+    w.load_semesters = lambda: []
+
+    def login():
+        calls.append("login")
+        w.stop_event.set()
+        return True
+
+    w.do_login = login
+    assert w.start() is False
+    assert calls == ["login"]